@@ -3,67 +3,391 @@
 Antigravity Build Validator
 Checks index.html for common issues before deployment.
 Exit code 0 = PASS, Exit code 1 = FAIL
+
+The page is scanned once with a combined tokenizer (placeholders, <h1>,
+hero, <img> tags and image references all in one pass), and image paths
+are checked against an index of the images/ tree built once, not one
+stat() per reference. Results are structured findings with timings, and
+--watch re-validates on every save.
+
+Given a directory, every built page under it (e.g. batch_build.py's
+dist/<sku>/index.html) is validated in parallel against one index of the
+whole tree, with a combined JSON and/or JUnit report.
+
+Usage:
+    python3 validate_build.py [index.html] [--json] [--watch]
+    python3 validate_build.py DIR [--jobs N] [--report report.json] [--junit junit.xml]
 """
 
-import sys
+import argparse
+import json
+import os
 import re
+import sys
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-def validate_build():
-    errors = []
-    warnings = []
-    
-    # Check if index.html exists
-    index_path = Path("index.html")
-    if not index_path.exists():
-        errors.append("CRITICAL: index.html does not exist!")
-        return errors, warnings
-    
-    content = index_path.read_text()
-    
-    # Check for raw placeholders
-    placeholders = re.findall(r'\{\{[A-Z_]+\}\}', content)
+# Pages smaller than this are probably a failed build
+MIN_PAGE_BYTES = 50000
+
+# One alternation, one pass: whichever construct starts first wins. The
+# lookahead on the possible first characters lets the engine skip plain
+# text cheaply. Everything but placeholders (which must stay uppercase) is
+# case-insensitive, by hand for tag names and with scoped (?i:) groups.
+TOKENIZER = re.compile(
+    r'(?=[{<cCsS])(?:'
+    r'(?P<placeholder>\{\{[A-Z][A-Z0-9_]*\}\})'
+    r'|<(?:(?P<img>[iI][mM][gG]\b[^>]*)>'
+    r'|(?P<h1_open>[hH]1\b)[^>]*>'
+    r'|(?P<h1_close>/[hH]1>))'
+    r'|(?P<hero>(?i:class="hero"))'
+    r'|(?i:src="(?P<src>images/[^"]+)"))'
+)
+# Scanned inside an <img> tag the tokenizer consumed whole
+IMG_SRC = re.compile(r'src="[^"]+"', re.IGNORECASE)
+IMG_IMAGE_SRC = re.compile(r'src="(images/[^"]+)"', re.IGNORECASE)
+PLACEHOLDER = re.compile(r'\{\{[A-Z][A-Z0-9_]*\}\}')
+
+
+class AssetIndex:
+    """
+    Relative paths of every file under root/subdir, from one walk.
+    subdir="" indexes the whole tree (shared by every page in a batch).
+    """
+
+    def __init__(self, root, subdir="images"):
+        self.root = Path(root)
+        self.subdir = subdir
+        self.files = set()
+        self.dir_mtimes = {}
+        self.build_ms = 0.0
+        self.refresh()
+
+    def refresh(self):
+        start = time.perf_counter()
+        self.files = set()
+        self.dir_mtimes = {}
+        for dirpath, _, filenames in os.walk(self.root / self.subdir):
+            rel_dir = Path(dirpath).relative_to(self.root).as_posix()
+            prefix = "" if rel_dir == "." else rel_dir + "/"
+            self.dir_mtimes[dirpath] = os.stat(dirpath).st_mtime_ns
+            self.files.update(prefix + name for name in filenames)
+        self.build_ms = (time.perf_counter() - start) * 1000
+
+    def stale(self):
+        """True if any indexed directory was added to, removed or renamed"""
+        for dirpath, mtime_ns in self.dir_mtimes.items():
+            try:
+                if os.stat(dirpath).st_mtime_ns != mtime_ns:
+                    return True
+            except OSError:
+                return True
+        return not self.dir_mtimes and (self.root / self.subdir).is_dir()
+
+    def __contains__(self, path):
+        return path in self.files
+
+
+def finding(severity, check, message, **details):
+    return {"severity": severity, "check": check, "message": message, **details}
+
+
+def scan(content):
+    """Single pass over the page. Returns what the checks need."""
+    result = {
+        "placeholders": set(),
+        "has_h1": False,
+        "has_hero": False,
+        "has_img": False,
+        "image_refs": {},
+    }
+    h1_open = False
+
+    def add_ref(path):
+        result["image_refs"][path] = result["image_refs"].get(path, 0) + 1
+
+    for m in TOKENIZER.finditer(content):
+        kind = m.lastgroup
+        if kind == "placeholder":
+            result["placeholders"].add(m.group(0))
+            continue
+        # Tags and src values are consumed whole; placeholders inside still count
+        result["placeholders"].update(PLACEHOLDER.findall(m.group(0)))
+        if kind == "img":
+            tag = m.group(0)
+            result["has_img"] = result["has_img"] or bool(IMG_SRC.search(tag))
+            for path in IMG_IMAGE_SRC.findall(tag):
+                add_ref(path)
+        elif kind == "h1_open":
+            h1_open = True
+        elif kind == "h1_close":
+            result["has_h1"] = result["has_h1"] or h1_open
+        elif kind == "hero":
+            result["has_hero"] = True
+        elif kind == "src":
+            add_ref(m.group("src"))
+    return result
+
+
+def validate_page(page_path="index.html", asset_index=None, asset_prefix=""):
+    """
+    Validate one built page. asset_index defaults to the images/ tree next
+    to the page; with a shared tree index, asset_prefix is the page's
+    directory relative to the index root ("sku/").
+    Returns {"page", "bytes", "passed", "findings", "timings"}.
+    """
+    timings = {}
+    findings = []
+    page_path = Path(page_path)
+    report = {"page": str(page_path), "bytes": 0, "passed": False, "findings": findings, "timings": timings}
+
+    if not page_path.exists():
+        findings.append(finding("error", "exists", f"CRITICAL: {page_path} does not exist!"))
+        return report
+
+    start = time.perf_counter()
+    content = page_path.read_text()
+    report["bytes"] = len(content)
+    timings["read_ms"] = (time.perf_counter() - start) * 1000
+
+    if asset_index is None:
+        asset_index = AssetIndex(page_path.parent)
+        timings["index_ms"] = asset_index.build_ms
+
+    start = time.perf_counter()
+    scanned = scan(content)
+    timings["scan_ms"] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    placeholders = sorted(scanned["placeholders"])
     if placeholders:
-        unique_placeholders = set(placeholders)
-        errors.append(f"CRITICAL: {len(unique_placeholders)} unresolved placeholders found: {', '.join(list(unique_placeholders)[:10])}")
-    
-    # Check for empty critical sections
-    critical_checks = [
-        (r'<h1[^>]*>.*?</h1>', "No <h1> headline found"),
-        (r'class="hero"', "No hero section found"),
-        (r'<img[^>]+src="[^"]+"', "No images found"),
-    ]
-    
-    for pattern, error_msg in critical_checks:
-        if not re.search(pattern, content, re.IGNORECASE | re.DOTALL):
-            warnings.append(f"WARNING: {error_msg}")
-    
-    # Check for broken image paths
-    img_paths = re.findall(r'src="(images/[^"]+)"', content)
-    for img_path in img_paths:
-        if not Path(img_path).exists():
-            errors.append(f"CRITICAL: Missing image: {img_path}")
-    
-    # Check minimum content length (should be a real page)
-    if len(content) < 50000:
-        warnings.append(f"WARNING: index.html seems too small ({len(content)} bytes). Expected 50KB+")
-    
+        findings.append(finding(
+            "error", "placeholders",
+            f"CRITICAL: {len(placeholders)} unresolved placeholders found: {', '.join(placeholders[:10])}",
+            placeholders=placeholders,
+        ))
+
+    for check, present, message in [
+        ("h1", scanned["has_h1"], "No <h1> headline found"),
+        ("hero", scanned["has_hero"], "No hero section found"),
+        ("images", scanned["has_img"], "No images found"),
+    ]:
+        if not present:
+            findings.append(finding("warning", check, f"WARNING: {message}"))
+
+    for path, count in scanned["image_refs"].items():
+        if asset_prefix + path not in asset_index:
+            findings.append(finding("error", "missing_image", f"CRITICAL: Missing image: {path}",
+                                    path=path, count=count))
+
+    if len(content) < MIN_PAGE_BYTES:
+        findings.append(finding(
+            "warning", "size",
+            f"WARNING: {page_path.name} seems too small ({len(content)} bytes). Expected 50KB+",
+        ))
+    timings["checks_ms"] = (time.perf_counter() - start) * 1000
+
+    report["passed"] = not any(f["severity"] == "error" for f in findings)
+    return report
+
+
+def validate_build():
+    """index.html in the current directory. Returns (errors, warnings)"""
+    report = validate_page("index.html")
+    errors = [f["message"] for f in report["findings"] if f["severity"] == "error"]
+    warnings = [f["message"] for f in report["findings"] if f["severity"] == "warning"]
     return errors, warnings
 
+
+def print_report(report):
+    for f in report["findings"]:
+        if f["severity"] == "warning":
+            print(f"⚠️  {f['message']}")
+    for f in report["findings"]:
+        if f["severity"] == "error":
+            print(f"❌ {f['message']}")
+    timings = ", ".join(f"{k[:-3]} {v:.1f} ms" for k, v in report["timings"].items())
+    print(f"\n⏱️  {timings}")
+
+
+# Set once per worker process by _init_worker
+_asset_index = None
+
+
+def _init_worker(asset_index):
+    global _asset_index
+    _asset_index = asset_index
+
+
+def _validate_in_worker(page_path, asset_prefix):
+    return validate_page(page_path, _asset_index, asset_prefix)
+
+
+def find_pages(root, pattern="index.html"):
+    """Built pages under root, sorted"""
+    return sorted(Path(root).rglob(pattern))
+
+
+def validate_tree(root, pattern="index.html", jobs=0):
+    """
+    Validate every page under root concurrently against one shared index
+    of the tree. Returns the combined report.
+    """
+    root = Path(root)
+    start = time.perf_counter()
+    asset_index = AssetIndex(root, subdir="")
+    pages = find_pages(root, pattern)
+    work = []
+    for page in pages:
+        rel_dir = page.parent.relative_to(root).as_posix()
+        work.append((str(page), "" if rel_dir == "." else rel_dir + "/"))
+
+    jobs = jobs if jobs > 0 else (os.cpu_count() or 1)
+    if jobs > 1 and len(work) > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(work)), initializer=_init_worker,
+                                 initargs=(asset_index,)) as pool:
+            futures = [pool.submit(_validate_in_worker, page, prefix) for page, prefix in work]
+            results = [f.result() for f in futures]
+    else:
+        results = [validate_page(page, asset_index, prefix) for page, prefix in work]
+
+    failed = sum(not r["passed"] for r in results)
+    return {
+        "root": str(root),
+        "pages": len(results),
+        "passed": len(results) - failed,
+        "failed": failed,
+        "jobs": jobs,
+        "index_files": len(asset_index.files),
+        "index_ms": round(asset_index.build_ms, 1),
+        "wall_ms": round((time.perf_counter() - start) * 1000, 1),
+        "results": results,
+    }
+
+
+def write_junit(batch, junit_path):
+    """One <testcase> per page; errors become <failure>, warnings go to system-out"""
+    suite = ET.Element("testsuite", {
+        "name": "validate_build",
+        "tests": str(batch["pages"]),
+        "failures": str(batch["failed"]),
+        "time": f"{batch['wall_ms'] / 1000:.3f}",
+    })
+    for result in batch["results"]:
+        case = ET.SubElement(suite, "testcase", {
+            "classname": "validate_build",
+            "name": result["page"],
+            "time": f"{sum(result['timings'].values()) / 1000:.3f}",
+        })
+        errors = [f["message"] for f in result["findings"] if f["severity"] == "error"]
+        warnings = [f["message"] for f in result["findings"] if f["severity"] == "warning"]
+        if errors:
+            failure = ET.SubElement(case, "failure", {"message": errors[0]})
+            failure.text = "\n".join(errors)
+        if warnings:
+            ET.SubElement(case, "system-out").text = "\n".join(warnings)
+    Path(junit_path).parent.mkdir(parents=True, exist_ok=True)
+    ET.ElementTree(suite).write(junit_path, encoding="utf-8", xml_declaration=True)
+
+
+def run_batch(args):
+    batch = validate_tree(args.page, args.pattern, args.jobs)
+    if args.report:
+        Path(args.report).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.report).write_text(json.dumps(batch, indent=2))
+    if args.junit:
+        write_junit(batch, args.junit)
+
+    if args.json:
+        print(json.dumps(batch, indent=2))
+        sys.exit(1 if batch["failed"] or not batch["pages"] else 0)
+
+    print("=" * 60)
+    print(f"🔍 ANTIGRAVITY BUILD VALIDATOR: {batch['pages']} pages, {batch['jobs']} job(s)")
+    print("=" * 60)
+    for result in batch["results"]:
+        errors = sum(f["severity"] == "error" for f in result["findings"])
+        warnings = len(result["findings"]) - errors
+        print(f"   {'✅' if result['passed'] else '❌'} {result['page']:50} "
+              f"{errors} errors, {warnings} warnings")
+        for f in result["findings"]:
+            if f["severity"] == "error":
+                print(f"      {f['message']}")
+
+    print("\n" + "=" * 60)
+    print(f"   Index: {batch['index_files']} files in {batch['index_ms']:.0f} ms | Wall: {batch['wall_ms']:.0f} ms")
+    if not batch["pages"]:
+        print(f"❌ No {args.pattern} found under {args.page}")
+        sys.exit(1)
+    if batch["failed"]:
+        print(f"❌ VALIDATION FAILED - {batch['failed']}/{batch['pages']} pages have errors")
+    else:
+        print(f"✅ VALIDATION PASSED - all {batch['pages']} pages ready for deployment")
+    print("=" * 60)
+    sys.exit(1 if batch["failed"] else 0)
+
+
+def watch(page_path, interval=0.5):
+    """Re-validate whenever the page changes, reusing the asset index"""
+    page_path = Path(page_path)
+    asset_index = AssetIndex(page_path.parent)
+    last = None
+    print(f"👀 Watching {page_path} (Ctrl+C to stop)")
+    try:
+        while True:
+            try:
+                st = page_path.stat()
+                stamp = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                stamp = None
+            if stamp != last:
+                last = stamp
+                if asset_index.stale():
+                    asset_index.refresh()
+                report = validate_page(page_path, asset_index)
+                print("\n" + "=" * 60)
+                print(f"{'✅ PASS' if report['passed'] else '❌ FAIL'}  {time.strftime('%H:%M:%S')}")
+                print_report(report)
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print()
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Antigravity build validator")
+    parser.add_argument("page", nargs="?", default="index.html",
+                        help="Built page, or a directory of built pages (default: index.html)")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    parser.add_argument("--watch", action="store_true", help="Re-validate every time the page is saved")
+    parser.add_argument("--jobs", "-j", type=int, default=0, help="Directory mode: worker processes (default: one per CPU)")
+    parser.add_argument("--pattern", default="index.html", help="Directory mode: page filename (default: index.html)")
+    parser.add_argument("--report", metavar="PATH", help="Directory mode: write the combined JSON report")
+    parser.add_argument("--junit", metavar="PATH", help="Directory mode: write a JUnit XML report")
+    args = parser.parse_args()
+
+    if Path(args.page).is_dir():
+        run_batch(args)
+        return
+
+    if args.watch:
+        watch(args.page)
+        return
+
+    report = validate_page(args.page)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        sys.exit(0 if report["passed"] else 1)
+
     print("=" * 60)
     print("🔍 ANTIGRAVITY BUILD VALIDATOR")
     print("=" * 60)
-    
-    errors, warnings = validate_build()
-    
-    for warning in warnings:
-        print(f"⚠️  {warning}")
-    
-    for error in errors:
-        print(f"❌ {error}")
-    
-    if errors:
+
+    print_report(report)
+
+    if not report["passed"]:
         print("\n" + "=" * 60)
         print("❌ VALIDATION FAILED - Fix errors before deployment")
         print("=" * 60)
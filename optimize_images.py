@@ -4,109 +4,831 @@ Brunson-Protocol Image Optimizer
 Standardizes all images to WebP format with consistent naming
 
 Requires: pip install Pillow
+
+Usage:
+    python3 optimize_images.py [images_dir] [--jobs N] [--force] [--skip-variants]
+                               [--adaptive] [--avif]
+
+--adaptive searches WebP quality per image (QUALITY_MIN..QUALITY) for the
+lowest setting whose SSIM against the resized source still meets
+SSIM_TARGET; chosen settings are kept per content hash in
+.optimize-quality.json so each image is only searched once; responsive
+variants reuse their source's choice. --avif also writes {name}.avif next
+to each output (needs Pillow with AVIF support). The .avif files are not
+served yet: the page would need <picture> sources, and the colour and
+gallery scripts swap <img src>, which a <source> would override. A run
+without --avif deletes the .avif next to each output it re-encodes, so
+none is left describing an older image.
 """
 
-import sys
+import argparse
+import hashlib
+import io
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from operator import mul
 from pathlib import Path
 
-from PIL import Image
+from PIL import Image, features
+
+try:
+    import pillow_avif  # noqa: F401  registers AVIF on Pillow < 11.2
+except ImportError:
+    pass
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
 
 # Configuration
 QUALITY = 85
 MAX_WIDTH = 1200
 MAX_HEIGHT = 1600
+WEBP_METHOD = 6
+AVIF_SPEED = 6
+
+# Adaptive quality search (--adaptive)
+SSIM_TARGET = 0.96  # 8x8 box windows score lower than Gaussian SSIM; q85 photos land ~0.975
+QUALITY_MIN = 50
+QUALITY_STEP = 5
+SSIM_BLOCK = 8
+SSIM_MAX_BLOCKS = 1024  # blocks sampled on an even grid, at full output resolution
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".gif", ".bmp"}
+BACKUP_PREFIX = "_original_"
+
+# Incremental cache (lives inside the images directory)
+CACHE_FILE = ".optimize-cache.json"
+CACHE_VERSION = 1
+# Adaptive quality choices by source content hash
+CHOICES_FILE = ".optimize-quality.json"
+
+# Responsive variants: width ladder written next to each output as
+# {prefix}-{NN}-{W}w.webp, plus a manifest the build reads for srcset
+RESPONSIVE_WIDTHS = (246, 493, 713, 990)
+RESPONSIVE_MANIFEST = "responsive.json"
+VARIANT_PATTERN = re.compile(r"-\d+w\.webp$", re.IGNORECASE)
 
 # Standard folder structure (EXACT - matches user's actual folders)
 # NOTE: Product images are ALSO used as hero images (no separate hero folder)
 # Testimonial images are used for Features, Secrets, Testimonials, and Reviews
 FOLDERS = {
-    "product": {"prefix": "product", "count": 6},  # Hero carousel
-    "testimonials": {"prefix": "testimonial", "count": 25},  # Features, Secrets, Reviews
+    "product": {"prefix": "product", "count": 6, "responsive": True},  # Hero carousel
+    "testimonials": {"prefix": "testimonial", "count": 25, "responsive": True},  # Features, Secrets, Reviews
     "order-bump": {"prefix": "order-bump", "count": 1},  # Order bump product
-    "founder": {"prefix": "founder", "count": 1},  # Founder story only (static ok)
+    "founder": {"prefix": "founder", "count": 1, "responsive": True},  # Founder story only (static ok)
     "comparison": {"prefix": "comparison", "count": 1},  # Combined before/after
     "awards": {"prefix": "awards", "count": 5},  # Awards/trust badges (static)
     "universal": {"prefix": "universal", "count": 2},  # Logo + size chart (static)
 }
 
 
-def optimize_image(input_path: Path, output_path: Path) -> bool:
-    """Optimize and convert image to WebP"""
+# Pre-shrink by box reduction to at most this multiple of the output size
+# before the LANCZOS pass (same trade-off as Image.thumbnail's reducing_gap)
+REDUCING_GAP = 2
+# Source rows converted at a time when shrinking RGBA/palette images
+BAND_ROWS = 256
+
+
+def fit_size(size: tuple) -> tuple:
+    """Output size for an image of ``size`` (aspect kept, never upscaled)"""
+    width, height = size
+    scale = min(MAX_WIDTH / width, MAX_HEIGHT / height, 1.0)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def reduce_factor(size: tuple, target: tuple) -> int:
+    """Integer box-reduction factor that keeps REDUCING_GAP x the target size"""
+    return max(1, min(size[0] // (target[0] * REDUCING_GAP), size[1] // (target[1] * REDUCING_GAP)))
+
+
+def shrink_to_rgb(img: Image.Image, target: tuple) -> Image.Image:
+    """
+    Resize ``img`` to ``target`` as RGB, converting a band of rows at a
+    time so no full-size RGB (or premultiplied RGBA) copy is ever made.
+    LANCZOS is separable: each band is resampled horizontally on its own,
+    then the narrow full-height strip is resampled vertically once.
+    """
+    width, height = img.size
+    factor = reduce_factor(img.size, target)
+    band = BAND_ROWS // factor * factor or factor
+    narrow = Image.new("RGB", (target[0], -(-height // factor)))
+    for top in range(0, height, band):
+        strip = img.crop((0, top, width, min(top + band, height))).convert("RGB")
+        if factor > 1:
+            strip = strip.reduce(factor)
+        narrow.paste(strip.resize((target[0], strip.height), Image.Resampling.LANCZOS), (0, top // factor))
+    return narrow.resize(target, Image.Resampling.LANCZOS)
+
+
+def prepare_image(input_path: Path, timings: dict = None) -> Image.Image:
+    """
+    Decode one source at its output size.
+    Only the decoded source is ever held at full size: JPEGs decode in
+    draft mode (1/2, 1/4 or 1/8 scale inside the decoder), transparent and
+    palette images are shrunk before their colour conversion, and
+    thumbnail() box-reduces everything else before resampling.
+    ``timings`` (optional) accumulates "decode" and "resize" seconds.
+    """
+    start = time.perf_counter()
+    with Image.open(input_path) as source:
+        img = source
+        target = fit_size(img.size)
+        # Decode up front, with the draft thumbnail() would request, so the
+        # decode can be timed on its own
+        img.draft(None, (target[0] * REDUCING_GAP, target[1] * REDUCING_GAP))
+        img.load()
+        decoded = time.perf_counter()
+
+        # Convert to RGB if necessary (for PNG with transparency)
+        if img.mode in ("RGBA", "P"):
+            img = shrink_to_rgb(img, target) if target != img.size else img.convert("RGB")
+
+        # Resize if too large
+        if img.width > MAX_WIDTH or img.height > MAX_HEIGHT:
+            img.thumbnail((MAX_WIDTH, MAX_HEIGHT), Image.Resampling.LANCZOS, reducing_gap=REDUCING_GAP)
+
+        # Closing the source releases its pixels; keep an output-size copy
+        img = img.copy() if img is source else img
+
+    if timings is not None:
+        timings["decode"] = timings.get("decode", 0.0) + decoded - start
+        timings["resize"] = timings.get("resize", 0.0) + time.perf_counter() - decoded
+    return img
+
+
+def save_image(img: Image.Image, output_path: Path, fmt: str = "WEBP", quality: int = None) -> None:
+    """
+    Save via a temp file: output_path may be the input itself, or a hard
+    link image-sorter.py --link=hard shares with its source
+    """
+    tmp_path = output_path.with_name(f".{output_path.name}.tmp")
+    try:
+        img.save(tmp_path, fmt, **encoder_options(fmt, quality))
+    except Exception:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    os.replace(tmp_path, output_path)
+
+
+def encode_image(input_path: Path, output_path: Path) -> None:
+    """Convert one image to WebP at QUALITY (raises on failure)"""
+    save_image(prepare_image(input_path), output_path)
+
+
+def encoder_options(fmt: str, quality: int = None) -> dict:
+    quality = QUALITY if quality is None else quality
+    if fmt == "AVIF":
+        return {"quality": quality, "speed": AVIF_SPEED}
+    return {"quality": quality, "method": WEBP_METHOD}
+
+
+def avif_available() -> bool:
+    return features.check("avif")
+
+
+def avif_path(output_path: Path) -> Path:
+    """product-01.webp -> product-01.avif"""
+    return output_path.with_suffix(".avif")
+
+
+def ssim_positions(size: tuple) -> list:
+    """Top-left corners of the SSIM blocks, an even grid of at most SSIM_MAX_BLOCKS"""
+    cols, rows = size[0] // SSIM_BLOCK, size[1] // SSIM_BLOCK
+    stride = 1
+    while (-(-cols // stride)) * (-(-rows // stride)) > SSIM_MAX_BLOCKS:
+        stride += 1
+    return [(x * SSIM_BLOCK, y * SSIM_BLOCK) for y in range(0, rows, stride) for x in range(0, cols, stride)]
+
+
+def ssim(reference: Image.Image, candidate: Image.Image, positions: list = None) -> float:
+    """
+    Mean SSIM of two same-size grayscale images over SSIM_BLOCK-square
+    windows. Blocks are sampled, not downscaled, so compression artifacts
+    are judged at the resolution they are shown.
+    """
+    c1, c2 = (0.01 * 255) ** 2, (0.03 * 255) ** 2
+    n = SSIM_BLOCK * SSIM_BLOCK
+    a, b = reference.tobytes(), candidate.tobytes()
+    width = reference.width
+    positions = ssim_positions(reference.size) if positions is None else positions
+    if not positions:
+        return 1.0
+
+    total = 0.0
+    for x, y in positions:
+        sa = sb = saa = sbb = sab = 0
+        for offset in range(y * width + x, (y + SSIM_BLOCK) * width + x, width):
+            ra, rb = a[offset:offset + SSIM_BLOCK], b[offset:offset + SSIM_BLOCK]
+            sa += sum(ra)
+            sb += sum(rb)
+            saa += sum(map(mul, ra, ra))
+            sbb += sum(map(mul, rb, rb))
+            sab += sum(map(mul, ra, rb))
+        mean_a, mean_b = sa / n, sb / n
+        var_a = saa / n - mean_a * mean_a
+        var_b = sbb / n - mean_b * mean_b
+        cov = sab / n - mean_a * mean_b
+        total += ((2 * mean_a * mean_b + c1) * (2 * cov + c2)) / (
+            (mean_a * mean_a + mean_b * mean_b + c1) * (var_a + var_b + c2)
+        )
+    return total / len(positions)
+
+
+def search_quality(img: Image.Image, fmt: str = "WEBP") -> tuple:
+    """
+    Lowest quality on the QUALITY_MIN..QUALITY ladder whose encode keeps
+    SSIM_TARGET, by binary search (SSIM rises with quality). Returns
+    (quality, ssim); QUALITY itself when nothing lower is good enough.
+    """
+    reference = img.convert("L")
+    positions = ssim_positions(reference.size)
+    ladder = list(range(QUALITY_MIN, QUALITY, QUALITY_STEP)) + [QUALITY]
+    scores = {}
+
+    def score(quality):
+        if quality not in scores:
+            buffer = io.BytesIO()
+            img.save(buffer, fmt, **encoder_options(fmt, quality))
+            buffer.seek(0)
+            with Image.open(buffer) as decoded:
+                scores[quality] = ssim(reference, decoded.convert("L"), positions)
+        return scores[quality]
+
+    lo, hi = 0, len(ladder) - 1
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if score(ladder[mid]) >= SSIM_TARGET:
+            hi = mid
+        else:
+            lo = mid + 1
+    return ladder[lo], round(score(ladder[lo]), 5)
+
+
+def encode_adaptive(input_path: Path, output_path: Path, choice: dict = None, avif: bool = False) -> dict:
+    """
+    Encode one image at searched quality (raises on failure).
+    ``choice`` holds settings found earlier for the same content
+    ({"webp": q, "webp_ssim": s, "avif": ...}); only missing formats are
+    searched. Returns the complete choice.
+    """
+    img = prepare_image(input_path)
+    choice = dict(choice or {})
+    formats = [("webp", "WEBP", output_path)]
+    if avif:
+        formats.append(("avif", "AVIF", avif_path(output_path)))
+    for key, fmt, path in formats:
+        if key not in choice:
+            choice[key], choice[f"{key}_ssim"] = search_quality(img, fmt)
+        save_image(img, path, fmt, choice[key])
+    return choice
+
+
+def reset_peak_rss() -> bool:
+    """Restart this process's peak-RSS counter (Linux only)"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb() -> float:
+    """
+    Peak resident memory of this process in MB since the last
+    reset_peak_rss(). Where the counter can't be reset this is the peak
+    over the process lifetime, an upper bound for the current image.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if resource is None:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kB on Linux, bytes on macOS
+    return peak / (1024 * 1024) if os.uname().sysname == "Darwin" else peak / 1024
+
+
+def settings_key(adaptive: bool = False, avif: bool = False) -> str:
+    """Encoder settings that invalidate cached outputs when changed"""
+    key = f"q{QUALITY}-w{MAX_WIDTH}-h{MAX_HEIGHT}-m{WEBP_METHOD}"
+    if adaptive:
+        key = f"{search_key()}-m{WEBP_METHOD}"
+    if avif:
+        key += f"-avif{AVIF_SPEED}"
+    return key
+
+
+def search_key() -> str:
+    """
+    Search settings that invalidate cached quality choices when changed.
+    SSIM is measured at the resized output, so the size limits count too.
+    """
+    return (f"ssim{SSIM_TARGET}-q{QUALITY_MIN}-{QUALITY}-s{QUALITY_STEP}-b{SSIM_BLOCK}x{SSIM_MAX_BLOCKS}"
+            f"-w{MAX_WIDTH}-h{MAX_HEIGHT}")
+
+
+def file_digest(path: Path) -> str:
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_key(output_path: Path) -> str:
+    """Cache entries are keyed by <folder>/<output name>"""
+    return f"{output_path.parent.name}/{output_path.name}"
+
+
+def load_cache(images_dir: Path) -> dict:
+    """Load the incremental cache manifest (empty on first run or mismatch)"""
+    cache_path = images_dir / CACHE_FILE
     try:
-        with Image.open(input_path) as img:
-            # Convert to RGB if necessary (for PNG with transparency)
-            if img.mode in ("RGBA", "P"):
-                img = img.convert("RGB")
+        with open(cache_path) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get("version") != CACHE_VERSION:
+        return {}
+    return data.get("entries", {})
+
+
+def source_exists(images_dir: Path, key: str, entry: dict) -> bool:
+    """True if an entry's output is on disk and its source is too (as itself or its backup)"""
+    folder = images_dir / key.split("/", 1)[0]
+    if not (images_dir / key).exists():
+        return False
+    source = entry.get("source", "")
+    return (folder / source).exists() or (folder / f"{BACKUP_PREFIX}{source}").exists()
+
+
+def save_cache(images_dir: Path, entries: dict) -> None:
+    """Atomically write the incremental cache manifest, dropping entries whose files are gone"""
+    entries = {key: entry for key, entry in entries.items() if source_exists(images_dir, key, entry)}
+    cache_path = images_dir / CACHE_FILE
+    tmp_path = cache_path.with_suffix(".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump({"version": CACHE_VERSION, "entries": entries}, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, cache_path)
 
-            # Resize if too large
-            if img.width > MAX_WIDTH or img.height > MAX_HEIGHT:
-                img.thumbnail((MAX_WIDTH, MAX_HEIGHT), Image.Resampling.LANCZOS)
 
-            # Save as WebP
-            img.save(output_path, "WEBP", quality=QUALITY, method=6)
+def load_choices(images_dir: Path) -> dict:
+    """Adaptive quality choices by source hash (empty if the search changed)"""
+    try:
+        with open(images_dir / CHOICES_FILE) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get("settings") != search_key():
+        return {}
+    return data.get("choices", {})
+
+
+def save_choices(images_dir: Path, choices: dict) -> None:
+    choices_path = images_dir / CHOICES_FILE
+    tmp_path = choices_path.with_suffix(".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump({"settings": search_key(), "choices": choices}, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, choices_path)
+
+
+def source_fingerprint(image_path: Path, entry: dict = None) -> dict:
+    """
+    Stat + content hash of a source image.
+    The hash from ``entry`` is reused when path, size and mtime still match,
+    so unchanged inputs cost a single stat().
+    """
+    st = image_path.stat()
+    fingerprint = {
+        "source": image_path.name,
+        "source_size": st.st_size,
+        "source_mtime_ns": st.st_mtime_ns,
+    }
+    if entry and all(entry.get(k) == v for k, v in fingerprint.items()):
+        fingerprint["source_hash"] = entry["source_hash"]
+    else:
+        fingerprint["source_hash"] = file_digest(image_path)
+    return fingerprint
+
 
+def is_fresh(entry: dict, fingerprint: dict, output_path: Path, settings: str = None) -> bool:
+    """True if the cached outputs were built from this content and settings"""
+    if not entry:
+        return False
+    if entry.get("source_hash") != fingerprint["source_hash"]:
+        return False
+    if entry.get("settings") != (settings or settings_key()):
+        return False
+    try:
+        st = output_path.stat()
+        if "avif_size" in entry and avif_path(output_path).stat().st_size != entry["avif_size"]:
+            return False
+    except OSError:
+        return False
+    return entry.get("output_size") == st.st_size and entry.get("output_mtime_ns") == st.st_mtime_ns
+
+
+def optimize_image(input_path: Path, output_path: Path) -> bool:
+    """Optimize and convert image to WebP"""
+    try:
+        encode_image(input_path, output_path)
         return True
     except Exception as e:
         print(f"  Error processing {input_path}: {e}")
         return False
 
 
-def process_folder(folder_path: Path, config: dict) -> int:
-    """Process all images in a folder"""
-    if not folder_path.exists():
-        print(f"  Folder not found: {folder_path}")
-        return 0
-
+def plan_folder(folder_path: Path, config: dict) -> list:
+    """List (source, output) pairs for a folder in output-name order"""
     prefix = config["prefix"]
     max_count = config["count"]
-    processed = 0
 
-    # Get all image files
-    image_extensions = {".jpg", ".jpeg", ".png", ".webp", ".gif", ".bmp"}
+    # Backed-up originals and responsive variants are not inputs
     images = sorted(
-        [f for f in folder_path.iterdir() if f.suffix.lower() in image_extensions]
+        [f for f in folder_path.iterdir()
+         if f.suffix.lower() in IMAGE_EXTENSIONS
+         and not f.name.startswith(BACKUP_PREFIX)
+         and not VARIANT_PATTERN.search(f.name)]
     )
 
-    if not images:
-        print(f"  No images found in {folder_path}")
-        return 0
+    return [
+        (image_path, folder_path / f"{prefix}-{i:02d}.webp")
+        for i, image_path in enumerate(images[:max_count], 1)
+    ]
+
+
+def encode_pairs(pairs: list, cache: dict = None, choices: dict = None, avif: bool = False) -> list:
+    """
+    Encode (source, output) pairs in order.
+    Returns one (status, seconds, error, entry, peak_mb) tuple per pair,
+    where status is "skipped", "cached", "ok" or "error", entry is the cache
+    record for the output and peak_mb the worker's peak RSS while encoding.
+    Pass ``cache`` (entries by cache_key) to skip outputs that are still
+    fresh. Passing ``choices`` (quality choices by source hash, may be
+    empty) switches to adaptive quality; ``avif`` adds AVIF outputs. The
+    choice each entry used is recorded on it. Used both inline and as the
+    pool worker.
+    """
+    adaptive = choices is not None
+    settings = settings_key(adaptive, avif)
+    outcomes = []
+    for image_path, output_path in pairs:
+        if image_path.name == output_path.name:
+            outcomes.append(("skipped", 0.0, None, None, 0.0))
+            continue
 
-    for i, image_path in enumerate(images[:max_count], 1):
-        output_name = f"{prefix}-{i:02d}.webp"
-        output_path = folder_path / output_name
+        start = time.perf_counter()
+        try:
+            # Checked here rather than at plan time: an earlier pair in the
+            # same group may have just rewritten this source
+            entry = cache.get(cache_key(output_path)) if cache is not None else None
+            fingerprint = source_fingerprint(image_path, entry)
+            if is_fresh(entry, fingerprint, output_path, settings):
+                outcomes.append(("cached", time.perf_counter() - start, None, entry, 0.0))
+                continue
+
+            reset_peak_rss()
+            if adaptive:
+                choice = encode_adaptive(image_path, output_path, choices.get(fingerprint["source_hash"]), avif)
+            else:
+                encode_image(image_path, output_path)
+            if not avif:
+                # Left by an earlier --avif run, now older than the WebP
+                avif_path(output_path).unlink(missing_ok=True)
+            peak_mb = peak_rss_mb()
+            st = output_path.stat()
+            entry = {
+                **fingerprint,
+                "settings": settings,
+                "output_size": st.st_size,
+                "output_mtime_ns": st.st_mtime_ns,
+            }
+            if adaptive:
+                entry["choice"] = choice
+            if avif:
+                entry["avif_size"] = avif_path(output_path).stat().st_size
+            outcomes.append(("ok", time.perf_counter() - start, None, entry, peak_mb))
+        except Exception as e:
+            outcomes.append(("error", time.perf_counter() - start, str(e), None, 0.0))
+    return outcomes
+
+
+def group_dependent_pairs(pairs: list) -> list:
+    """
+    Split pairs into groups that can be encoded independently.
+    Pairs touching the same file (one reads what another writes) share a
+    group and keep their plan order, so a parallel run matches a serial one.
+    """
+    group_ids = list(range(len(pairs)))
+
+    def find(i):
+        while group_ids[i] != i:
+            group_ids[i] = group_ids[group_ids[i]]
+            i = group_ids[i]
+        return i
+
+    owner = {}
+    for i, pair in enumerate(pairs):
+        for path in pair:
+            if path in owner:
+                group_ids[find(i)] = find(owner[path])
+            else:
+                owner[path] = i
+
+    groups = {}
+    for i, pair in enumerate(pairs):
+        groups.setdefault(find(i), []).append(pair)
+    return list(groups.values())
+
+
+def report_folder(pairs: list, outcomes, timings: list, backups: list, cache: dict = None) -> int:
+    """
+    Print progress for a folder while consuming its encode outcomes.
+    Successful conversions are appended to ``timings`` as (output, seconds,
+    peak_mb); originals that need
+    an ``_original_`` backup rename are queued on ``backups``. Fresh cache
+    records are written back into ``cache`` when given.
+    """
+    processed = 0
+    outcomes = iter(outcomes)
 
-        # Skip if already optimized
-        if image_path.name == output_name:
-            print(f"  Already optimized: {output_name}")
+    for image_path, output_path in pairs:
+        if image_path.name == output_path.name:
+            next(outcomes)
+            print(f"  Already optimized: {output_path.name}")
             processed += 1
             continue
 
-        print(f"  Converting: {image_path.name} -> {output_name}")
+        status, seconds, error, entry, peak_mb = next(outcomes)
 
-        if optimize_image(image_path, output_path):
-            processed += 1
+        if status == "cached":
+            print(f"  Unchanged: {image_path.name} -> {output_path.name}")
+        else:
+            print(f"  Converting: {image_path.name} -> {output_path.name}")
 
-            # Remove original if different from output
-            if image_path != output_path and image_path.suffix.lower() != ".webp":
-                # Keep original in case of issues
-                backup_path = folder_path / f"_original_{image_path.name}"
-                image_path.rename(backup_path)
+        if status == "error":
+            print(f"  Error processing {image_path}: {error}")
+            continue
+
+        processed += 1
+        if cache is not None:
+            cache[cache_key(output_path)] = entry
+        if status == "ok":
+            timings.append((output_path, seconds, peak_mb))
+            if "choice" in entry:
+                # The choice may remember an AVIF setting this run did not write
+                choice = entry["choice"]
+                written = ("webp", "avif") if "avif_size" in entry else ("webp",)
+                formats = [f"{fmt} q{choice[fmt]} (SSIM {choice[f'{fmt}_ssim']:.4f})"
+                           for fmt in written if fmt in choice]
+                print(f"    Quality: {', '.join(formats)}")
+
+        # Remove original if different from output
+        if image_path != output_path and image_path.suffix.lower() != ".webp":
+            # Keep original in case of issues
+            backups.append(image_path)
 
     return processed
 
 
+def apply_backups(backups: list) -> None:
+    """Rename converted originals to _original_<name>"""
+    for image_path in backups:
+        image_path.rename(image_path.parent / f"{BACKUP_PREFIX}{image_path.name}")
+
+
+def process_folder(folder_path: Path, config: dict, cache: dict = None) -> int:
+    """Process all images in a folder"""
+    if not folder_path.exists():
+        print(f"  Folder not found: {folder_path}")
+        return 0
+
+    pairs = plan_folder(folder_path, config)
+    if not pairs:
+        print(f"  No images found in {folder_path}")
+        return 0
+
+    backups = []
+    outcomes = (encode_pairs([pair], cache)[0] for pair in pairs)
+    processed = report_folder(pairs, outcomes, [], backups, cache)
+    apply_backups(backups)
+    return processed
+
+
+def variant_path(output_path: Path, width: int) -> Path:
+    """product-01.webp -> product-01-493w.webp"""
+    return output_path.with_name(f"{output_path.stem}-{width}w.webp")
+
+
+def build_variants(output_path: Path, entry: dict = None, quality: int = None) -> tuple:
+    """
+    Write the responsive width ladder for one optimized image.
+    The image is decoded once and downscaled progressively, widest first,
+    each rung resized from the previous one and encoded at ``quality``
+    (the source's adaptive choice; QUALITY when None). Returns (record,
+    rebuilt); ``entry`` (the previous record) is reused when still fresh.
+    """
+    quality = QUALITY if quality is None else quality
+    st = output_path.stat()
+    if (
+        entry
+        and entry.get("size") == st.st_size
+        and entry.get("mtime_ns") == st.st_mtime_ns
+        and entry.get("ladder") == list(RESPONSIVE_WIDTHS)
+        and entry.get("quality", QUALITY) == quality
+        and all(variant_path(output_path, c["width"]).exists() for c in entry["variants"])
+    ):
+        return entry, False
+
+    variants = []
+    with Image.open(output_path) as img:
+        width, height = img.size
+        current = img.convert("RGB") if img.mode not in ("RGB", "RGBA") else img
+        for target in sorted(RESPONSIVE_WIDTHS, reverse=True):
+            if target >= width:
+                continue
+            size = (target, max(1, round(height * target / width)))
+            current = current.resize(size, Image.Resampling.LANCZOS)
+            path = variant_path(output_path, target)
+            save_image(current, path, "WEBP", quality)
+            variants.append({"width": target, "bytes": path.stat().st_size})
+
+    record = {
+        "width": width,
+        "height": height,
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "ladder": list(RESPONSIVE_WIDTHS),
+        "quality": quality,
+        "variants": sorted(variants, key=lambda v: v["width"]),
+    }
+    return record, True
+
+
+def load_responsive_manifest(images_dir: Path) -> dict:
+    """Load previous variant records keyed by site-relative image path"""
+    try:
+        with open(images_dir / RESPONSIVE_MANIFEST) as f:
+            return json.load(f).get("images", {})
+    except (OSError, ValueError):
+        return {}
+
+
+def save_responsive_manifest(images_dir: Path, records: dict) -> None:
+    """
+    Write images/responsive.json.
+    Each image lists its full srcset (variants plus the original at its
+    real width) so the build can emit it without touching the files.
+    """
+    images = {}
+    for key, record in sorted(records.items()):
+        base = key.rsplit("/", 1)[0]
+        stem = Path(key).stem
+        srcset = [
+            {"src": f"{base}/{stem}-{v['width']}w.webp", "width": v["width"]}
+            for v in record["variants"]
+        ]
+        srcset.append({"src": key, "width": record["width"]})
+        images[key] = {**record, "srcset": srcset}
+
+    manifest_path = images_dir / RESPONSIVE_MANIFEST
+    tmp_path = manifest_path.with_suffix(".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump({"version": 1, "widths": list(RESPONSIVE_WIDTHS), "images": images}, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+
+def run_variants_stage(images_dir: Path, pool: ProcessPoolExecutor = None, cache: dict = None) -> int:
+    """
+    Build width ladders for every responsive folder and write the manifest.
+    Variants use the adaptive WebP quality recorded for their output in
+    ``cache``, if any.
+    """
+    previous = load_responsive_manifest(images_dir)
+    site_root = images_dir.parent
+
+    outputs = []
+    for folder_name, config in FOLDERS.items():
+        if not config.get("responsive"):
+            continue
+        for i in range(1, config["count"] + 1):
+            output_path = images_dir / folder_name / f"{config['prefix']}-{i:02d}.webp"
+            if output_path.exists():
+                choice = (cache or {}).get(cache_key(output_path), {}).get("choice", {})
+                outputs.append((output_path.relative_to(site_root).as_posix(), output_path, choice.get("webp")))
+
+    print("[responsive]")
+    if pool:
+        futures = [pool.submit(build_variants, path, previous.get(key), quality) for key, path, quality in outputs]
+        results = (f.result() for f in futures)
+    else:
+        results = (build_variants(path, previous.get(key), quality) for key, path, quality in outputs)
+
+    records = {}
+    built = 0
+    for (key, _, _), (record, rebuilt) in zip(outputs, results):
+        widths = ", ".join(f"{v['width']}w" for v in record["variants"]) or "none needed"
+        built += rebuilt
+        print(f"  {'Variants' if rebuilt else 'Unchanged'}: {key} -> {widths}")
+        records[key] = record
+
+    save_responsive_manifest(images_dir, records)
+    print(f"  Manifest: {images_dir / RESPONSIVE_MANIFEST} ({len(records)} images, {built} rebuilt)")
+    print()
+    return built
+
+
+def submit_folder(pool: ProcessPoolExecutor, pairs: list, cache: dict = None,
+                  choices: dict = None, avif: bool = False) -> list:
+    """
+    Queue a folder's pairs on the pool, one task per independent group.
+    Returns (pair, future, index) entries in plan order, where index is the
+    pair's position in its group's result list.
+    """
+    entries = []
+    for group in group_dependent_pairs(pairs):
+        group_cache = None
+        if cache is not None:
+            keys = (cache_key(output_path) for _, output_path in group)
+            group_cache = {k: cache[k] for k in keys if k in cache}
+        future = pool.submit(encode_pairs, group, group_cache, choices, avif)
+        entries.extend((pair, future, i) for i, pair in enumerate(group))
+    return sorted(entries, key=lambda entry: pairs.index(entry[0]))
+
+
+def print_timing_summary(timings: list, wall_seconds: float, jobs: int) -> None:
+    """Print per-file encode times and peak RSS, slowest first"""
+    if not timings:
+        return
+
+    print("Timing summary:")
+    for output_path, seconds, peak_mb in sorted(timings, key=lambda t: -t[1]):
+        print(f"  {seconds:7.2f}s  {peak_mb:7.1f} MB  {output_path.parent.name}/{output_path.name}")
+    encode_total = sum(t[1] for t in timings)
+    print(f"  Encode time: {encode_total:.2f}s across {len(timings)} files")
+    print(f"  Peak RSS:    {max(t[2] for t in timings):.1f} MB per worker")
+    print(f"  Wall time:   {wall_seconds:.2f}s with {jobs} job(s)")
+    print()
+
+
 def main():
     """Main optimization routine"""
+    parser = argparse.ArgumentParser(description="Brunson-Protocol Image Optimizer")
+    parser.add_argument(
+        "images_dir",
+        nargs="?",
+        default="images",
+        help="Images directory (default: images)"
+    )
+    parser.add_argument(
+        "--jobs", "-j",
+        type=int,
+        default=1,
+        help="Encode with N worker processes (0 = one per CPU, default: 1)"
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help=f"Ignore {CACHE_FILE} and re-encode every image"
+    )
+    parser.add_argument(
+        "--skip-variants",
+        action="store_true",
+        help=f"Don't build responsive width variants or {RESPONSIVE_MANIFEST}"
+    )
+    parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        help=f"Search quality per image for SSIM >= {SSIM_TARGET} (q{QUALITY_MIN}-{QUALITY})"
+    )
+    parser.add_argument(
+        "--avif",
+        action="store_true",
+        help="Also write an .avif next to each WebP output (not referenced by the page yet)"
+    )
+    args = parser.parse_args()
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    if args.avif and not avif_available():
+        print("Warning: this Pillow has no AVIF support (pip install pillow-avif-plugin); writing WebP only")
+        args.avif = False
+
     print("=" * 50)
     print("  BRUNSON-PROTOCOL IMAGE OPTIMIZER")
     print("=" * 50)
     print()
 
-    # Determine images directory
-    if len(sys.argv) > 1:
-        images_dir = Path(sys.argv[1])
-    else:
-        images_dir = Path("images")
+    images_dir = Path(args.images_dir)
 
     if not images_dir.exists():
         print(f"Creating images directory structure...")
@@ -123,20 +845,69 @@ def main():
     print()
 
     total_processed = 0
-
+    timings = []
+    backups = []
+    cache = {} if args.force else load_cache(images_dir)
+    choices = None
+    if args.adaptive:
+        choices = {} if args.force else load_choices(images_dir)
+    start = time.perf_counter()
+
+    # Plan every folder up front so the pool sees the whole catalog at once
+    plans = {}
     for folder_name, config in FOLDERS.items():
         folder_path = images_dir / folder_name
-        print(f"[{folder_name}]")
+        plans[folder_name] = plan_folder(folder_path, config) if folder_path.exists() else None
 
-        if not folder_path.exists():
-            folder_path.mkdir(parents=True, exist_ok=True)
-            print(f"  Created folder: {folder_path}")
-            continue
-
-        count = process_folder(folder_path, config)
-        total_processed += count
-        print(f"  Processed: {count} images")
-        print()
+    pool = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+    try:
+        futures = {}
+        if pool:
+            for folder_name, pairs in plans.items():
+                if pairs:
+                    futures[folder_name] = submit_folder(pool, pairs, cache, choices, args.avif)
+
+        # Report in FOLDERS order regardless of which worker finishes first
+        for folder_name, config in FOLDERS.items():
+            folder_path = images_dir / folder_name
+            pairs = plans[folder_name]
+            print(f"[{folder_name}]")
+
+            if pairs is None:
+                folder_path.mkdir(parents=True, exist_ok=True)
+                print(f"  Created folder: {folder_path}")
+                continue
+
+            if not pairs:
+                print(f"  No images found in {folder_path}")
+                count = 0
+            else:
+                if pool:
+                    outcomes = (f.result()[i] for _, f, i in futures[folder_name])
+                else:
+                    outcomes = (encode_pairs([pair], cache, choices, args.avif)[0] for pair in pairs)
+                count = report_folder(pairs, outcomes, timings, backups, cache)
+
+            total_processed += count
+            print(f"  Processed: {count} images")
+            print()
+
+        # Backups are renamed only once every encode has finished reading its source
+        apply_backups(backups)
+        save_cache(images_dir, cache)
+        if choices is not None:
+            choices.update(
+                (entry["source_hash"], entry["choice"]) for entry in cache.values() if "choice" in entry
+            )
+            save_choices(images_dir, choices)
+
+        if not args.skip_variants:
+            run_variants_stage(images_dir, pool, cache)
+    finally:
+        if pool:
+            pool.shutdown()
+
+    print_timing_summary(timings, time.perf_counter() - start, jobs)
 
     print("=" * 50)
     print(f"  COMPLETE: {total_processed} images optimized")
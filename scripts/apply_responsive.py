@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Responsive srcset writer
+Rewrites placeholder srcset attributes in the built page with the real
+width ladder recorded by optimize_images.py in images/responsive.json.
+
+The sections declare srcset entries from 246w to 1946w that all point at
+the same file. Any <img> whose srcset only repeats its own src is given
+the manifest's actual variants instead; authored sizes are kept.
+
+render_template.py runs the same rewrite as a streaming stage
+(responsive_stage) with --responsive, so the page is not rewritten twice.
+
+Usage:
+    python3 scripts/apply_responsive.py [index.html] [images/responsive.json]
+"""
+
+import json
+import re
+import sys
+from pathlib import Path
+
+from html_pipeline import SLOT, TEXT
+
+IMG_TAG = re.compile(r"<img\b[^>]*>", re.IGNORECASE | re.DOTALL)
+SRC_ATTR = re.compile(r'\ssrc="([^"]*)"', re.IGNORECASE)
+SRCSET_ATTR = re.compile(r'(\ssrcset=")([^"]*)(")', re.IGNORECASE)
+SIZES_ATTR = re.compile(r'\ssizes="', re.IGNORECASE)
+
+# Used when a rewritten <img> has no sizes attribute of its own
+DEFAULT_SIZES = "100vw"
+
+
+def load_manifest(manifest_path):
+    """Return {image path: [{"src", "width"}, ...]} from responsive.json"""
+    with open(manifest_path) as f:
+        data = json.load(f)
+    return {key: record["srcset"] for key, record in data.get("images", {}).items()}
+
+
+def format_srcset(candidates):
+    return ", ".join(f"{c['src']} {c['width']}w" for c in candidates)
+
+
+def srcset_urls(srcset):
+    return {part.strip().split()[0] for part in srcset.split(",") if part.strip()}
+
+
+def rewrite_img(tag, manifest):
+    """Return (tag, changed) with a real srcset if the image has variants"""
+    src = SRC_ATTR.search(tag)
+    srcset = SRCSET_ATTR.search(tag)
+    if not src or not srcset:
+        return tag, False
+
+    src_path = src.group(1).split("?")[0]
+    candidates = manifest.get(src_path)
+    if not candidates or srcset_urls(srcset.group(2)) != {src.group(1)}:
+        return tag, False
+
+    tag = tag[:srcset.start(2)] + format_srcset(candidates) + tag[srcset.end(2):]
+    if not SIZES_ATTR.search(tag):
+        tag = tag[:-1].rstrip("/").rstrip() + f' sizes="{DEFAULT_SIZES}">'
+    return tag, True
+
+
+def apply_responsive(html, manifest):
+    """Rewrite every eligible <img> in one pass. Returns (html, count)"""
+    count = 0
+
+    def replace(match):
+        nonlocal count
+        tag, changed = rewrite_img(match.group(0), manifest)
+        count += changed
+        return tag
+
+    return IMG_TAG.sub(replace, html), count
+
+
+def responsive_stage(manifest, counts):
+    """
+    Pipeline stage form of apply_responsive. Text is held back only while
+    an <img> tag is still open, so tags split across tokens are rewritten
+    whole. Unresolved SLOT tokens are passed on as {{KEY}} text.
+    Rewritten images are counted in counts["images"].
+    """
+    def flush(text):
+        html, count = apply_responsive(text, manifest)
+        counts["images"] += count
+        return TEXT, html
+
+    def stage(tokens):
+        pending = ""
+        for kind, value in tokens:
+            pending += "{{" + value + "}}" if kind == SLOT else value
+            start = pending.rfind("<img")
+            if start != -1 and ">" not in pending[start:]:
+                cut = start
+            else:
+                # Hold back a possible "<im" split across tokens
+                cut = max(len(pending) - 3, 0 if start == -1 else pending.index(">", start) + 1)
+            if cut:
+                yield flush(pending[:cut])
+                pending = pending[cut:]
+        if pending:
+            yield flush(pending)
+    return stage
+
+
+def main():
+    page = Path(sys.argv[1] if len(sys.argv) > 1 else "index.html")
+    manifest_path = Path(sys.argv[2] if len(sys.argv) > 2 else "images/responsive.json")
+
+    if not manifest_path.exists():
+        print(f"   ⚠️  {manifest_path} not found - run optimize_images.py to build variants")
+        return
+
+    manifest = load_manifest(manifest_path)
+    html, count = apply_responsive(page.read_text(), manifest)
+    page.write_text(html)
+    print(f"   ✅ Responsive srcset written for {count} images")
+
+
+if __name__ == "__main__":
+    main()
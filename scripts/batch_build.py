@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Batch Landing Page Builder
+Renders one landing page per product.config in a directory, in parallel.
+
+Sections are compiled once (via the render_template.py cache) and handed
+to every worker. Each worker inlines the critical CSS for its product's
+above-the-fold sections (critical_css.py, cached in .build-cache/ by the
+config values those sections use). The shared assets
+(stylesheets, page scripts, images/awards, images/universal) are indexed
+once and hard-linked into each product directory instead of being copied
+per build. Each page is minified with .gz/.br siblings (minify_html.py).
+There is no budget step here, so the <!--section:NAME--> markers are
+stripped as soon as a page is rendered.
+
+Layouts accepted under CONFIG_DIR:
+    CONFIG_DIR/<sku>.config
+    CONFIG_DIR/<sku>/product.config
+
+Usage:
+    python3 scripts/batch_build.py CONFIG_DIR [--out dist] [--jobs N] [--no-critical] [--no-minify]
+"""
+
+import argparse
+import json
+import os
+import re
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from apply_responsive import apply_responsive, load_manifest
+from critical_css import (
+    CRITICAL_MAX_BYTES, critical_css, first_round_trip_bytes, inline_critical, local_stylesheets,
+)
+from minify_html import minify, write_compressed
+from render_template import (BASE_DIR, CACHE_DIR, join_sections, load_compiled_sections, render,
+                             strip_section_markers)
+from render_variants import parse_config
+
+# Assets every page needs, identical across products
+SHARED_ASSETS = [
+    "stylesheets",
+    "images/awards",
+    "images/universal",
+    "scripts/cart-drawer.js",
+    "scripts/media-gallery.js",
+    "scripts/modal-opener.js",
+]
+
+REPORT_FILE = "batch-report.json"
+# An images/... path on its own or inside a JSON/list value
+IMAGE_PATH = re.compile(r"""(?<![\w/.-])images/[^\s"'<>,;)]+""")
+
+# Set once per worker process by _init_worker
+_chunks = None
+_manifest = None
+_shared_files = None
+_critical = None
+_minify = True
+
+
+def find_configs(config_dir):
+    """Return [(product name, config path)] sorted by name"""
+    config_dir = Path(config_dir)
+    configs = {path.stem: path for path in config_dir.glob("*.config")}
+    for path in config_dir.glob("*/product.config"):
+        configs[path.parent.name] = path
+    return sorted(configs.items())
+
+
+def index_shared_assets(base_dir=BASE_DIR, assets=SHARED_ASSETS):
+    """Walk the shared asset paths once; returns relative file paths"""
+    files = []
+    for asset in assets:
+        path = base_dir / asset
+        if path.is_dir():
+            files.extend(p.relative_to(base_dir) for p in sorted(path.rglob("*")) if p.is_file())
+        elif path.is_file():
+            files.append(Path(asset))
+    return files
+
+
+def link_file(source, target):
+    """Hard-link source to target (copy if linking isn't possible)"""
+    target.parent.mkdir(parents=True, exist_ok=True)
+    if target.exists():
+        target.unlink()
+    try:
+        os.link(source, target)
+        return "linked"
+    except OSError:
+        shutil.copy2(source, target)
+        return "copied"
+
+
+def product_images(values, manifest, base_dir=BASE_DIR):
+    """Product-specific image files referenced by config values (plus their variants).
+
+    Paths are found anywhere in a value, so JSON values such as
+    COLOR_IMAGE_MAP count too.
+    """
+    files = set()
+    for value in values.values():
+        for path in IMAGE_PATH.findall(value):
+            if (base_dir / path).is_file():
+                files.add(path)
+                for candidate in manifest.get(path, []):
+                    files.add(candidate["src"])
+    return sorted(Path(f) for f in files if (base_dir / f).is_file())
+
+
+def _init_worker(chunks, manifest, shared_files, critical=None, minify_pages=True):
+    global _chunks, _manifest, _shared_files, _critical, _minify
+    _chunks = chunks
+    _manifest = manifest
+    _shared_files = shared_files
+    # (stylesheet urls, sections dir) or None
+    _critical = critical
+    _minify = minify_pages
+
+
+def build_product(name, config_path, out_dir):
+    """Render and assemble one product directory. Returns its report entry."""
+    timings = {}
+    start = time.perf_counter()
+
+    values = parse_config(str(config_path))
+    html, unresolved = render(_chunks, values)
+    html = strip_section_markers(html)
+    timings["render_ms"] = (time.perf_counter() - start) * 1000
+
+    step = time.perf_counter()
+    html, responsive = apply_responsive(html, _manifest)
+    timings["responsive_ms"] = (time.perf_counter() - step) * 1000
+
+    critical = False
+    if _critical:
+        step = time.perf_counter()
+        urls, sections_dir = _critical
+        css, _ = critical_css(urls, sections_dir, cache_dir=CACHE_DIR, values=values)
+        inlined = inline_critical(html, css, set(urls))
+        # Over the first round trip the stylesheets stay render-blocking
+        if first_round_trip_bytes(inlined) <= CRITICAL_MAX_BYTES:
+            html, critical = inlined, True
+        timings["critical_ms"] = (time.perf_counter() - step) * 1000
+
+    if _minify:
+        step = time.perf_counter()
+        html = minify(html)
+        timings["minify_ms"] = (time.perf_counter() - step) * 1000
+
+    step = time.perf_counter()
+    product_dir = Path(out_dir) / name
+    product_dir.mkdir(parents=True, exist_ok=True)
+    (product_dir / "index.html").write_text(html)
+    if _minify:
+        write_compressed(product_dir / "index.html")
+
+    linked = copied = 0
+    for rel in list(_shared_files) + product_images(values, _manifest):
+        if link_file(BASE_DIR / rel, product_dir / rel) == "linked":
+            linked += 1
+        else:
+            copied += 1
+    timings["assets_ms"] = (time.perf_counter() - step) * 1000
+    timings["total_ms"] = (time.perf_counter() - start) * 1000
+
+    return {
+        "product": name,
+        "config": str(config_path),
+        "output": str(product_dir / "index.html"),
+        "bytes": len(html.encode("utf-8")),
+        "unresolved": dict(unresolved),
+        "responsive_images": responsive,
+        "critical_css": critical,
+        "assets_linked": linked,
+        "assets_copied": copied,
+        "timings": {k: round(v, 1) for k, v in timings.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch landing page builder")
+    parser.add_argument("config_dir", help="Directory of product configs")
+    parser.add_argument("--out", default="dist", help="Output directory (default: dist)")
+    parser.add_argument("--sections", default=str(BASE_DIR / "sections"), help="Sections directory")
+    parser.add_argument("--jobs", "-j", type=int, default=0, help="Worker processes (default: one per CPU)")
+    parser.add_argument("--no-critical", action="store_true", help="Keep stylesheets render-blocking")
+    parser.add_argument("--no-minify", action="store_true", help="Write pages unminified, without .gz/.br")
+    args = parser.parse_args()
+
+    configs = find_configs(args.config_dir)
+    if not configs:
+        print(f"❌ No *.config or */product.config files in {args.config_dir}")
+        sys.exit(1)
+
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    print("=" * 60)
+    print(f"📦 BATCH BUILD: {len(configs)} products, {jobs} job(s)")
+    print("=" * 60)
+
+    start = time.perf_counter()
+
+    # Shared work, done once for the whole batch
+    compiled, section_stats = load_compiled_sections(args.sections, cache_dir=CACHE_DIR)
+    chunks = join_sections(compiled)
+    manifest_path = BASE_DIR / "images" / "responsive.json"
+    manifest = load_manifest(manifest_path) if manifest_path.exists() else {}
+    shared_files = index_shared_assets()
+    critical = None
+    if not args.no_critical:
+        critical = (local_stylesheets(render(chunks, {})[0]), args.sections)
+    shared_ms = (time.perf_counter() - start) * 1000
+    print(f"   Sections: {section_stats['cached']} cached, {section_stats['compiled']} compiled")
+    print(f"   Shared assets: {len(shared_files)} files")
+    print()
+
+    init_args = (chunks, manifest, shared_files, critical, not args.no_minify)
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=init_args) as pool:
+            futures = [pool.submit(build_product, name, path, args.out) for name, path in configs]
+            results = [f.result() for f in futures]
+    else:
+        _init_worker(*init_args)
+        results = [build_product(name, path, args.out) for name, path in configs]
+
+    wall_ms = (time.perf_counter() - start) * 1000
+
+    failed = 0
+    for result in results:
+        status = "✅" if not result["unresolved"] else "❌"
+        failed += bool(result["unresolved"])
+        print(f"   {status} {result['product']:30} {result['bytes'] / 1024:7.1f} KB  "
+              f"{result['timings']['total_ms']:7.1f} ms")
+        if result["unresolved"]:
+            print(f"      unresolved: {', '.join(sorted(result['unresolved']))}")
+        if critical and not result["critical_css"]:
+            print(f"      critical CSS over {CRITICAL_MAX_BYTES / 1024:.0f} KB gzipped; stylesheets left blocking")
+
+    report = {
+        "products": len(results),
+        "failed": failed,
+        "jobs": jobs,
+        "shared_ms": round(shared_ms, 1),
+        "wall_ms": round(wall_ms, 1),
+        "worker_ms": round(sum(r["timings"]["total_ms"] for r in results), 1),
+        "results": results,
+    }
+    report_path = Path(args.out) / REPORT_FILE
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    report_path.write_text(json.dumps(report, indent=2))
+
+    print()
+    print("=" * 60)
+    print(f"   Shared setup: {shared_ms:.0f} ms | Worker total: {report['worker_ms']:.0f} ms | Wall: {wall_ms:.0f} ms")
+    print(f"   Report: {report_path}")
+    print("=" * 60)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+Image Pipeline Benchmark
+Times optimize_images.py and image-sorter.py on a synthetic corpus so a
+change can be checked for speed and memory before it lands.
+
+The corpus mirrors optimize_images.FOLDERS (6 product, 25 testimonial,
+...) with sources between 1024 and 4096 px: opaque and transparent PNGs
+and JPEGs, generated from a fixed seed so every machine and every run
+sees the same pixels. It is written once to .build-cache/bench-corpus/
+and regenerated only when its spec changes.
+
+Stages, each the best of --repeat runs:
+  decode   open + decode every source (JPEG draft decode included)
+  resize   shrink + colour conversion to the output size
+  encode   WebP encode at QUALITY / WEBP_METHOD
+  sort     DeterministicImageSorter over the corpus (metrics uncached)
+Peak RSS is recorded for the optimize stages (worst single image) and
+for the sort (this process; metric workers are not included).
+
+Every run is appended to .build-cache/bench-history.json and compared
+with the previous run (or --baseline LABEL); stages slower by more than
+--threshold are flagged.
+
+Usage:
+    python3 scripts/bench_images.py [--label NAME] [--repeat 3] [--baseline LABEL] [--fail]
+    python3 scripts/bench_images.py --compare-only [--baseline LABEL]
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from PIL import Image, ImageDraw
+
+BASE_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+import optimize_images  # noqa: E402
+
+CACHE_DIR = BASE_DIR / ".build-cache"
+CORPUS_DIR = CACHE_DIR / "bench-corpus"
+HISTORY_FILE = CACHE_DIR / "bench-history.json"
+# Bump when synthesize() changes so old corpora are regenerated
+CORPUS_VERSION = 1
+CORPUS_MANIFEST = "corpus.json"
+# Flat copy of the corpus, named for IMAGE-MAPPING.json slots, for the sort stage
+SORT_INPUT = "generated"
+
+SEED = 20240601
+MIN_SIZE = 1024
+MAX_SIZE = 4096
+ASPECTS = (1.0, 0.75, 4 / 3, 1.5)
+KINDS = ("png-rgba", "png", "jpeg")
+
+STAGES = ("decode", "resize", "encode", "sort")
+THRESHOLD = 0.10
+# Differences below this are noise whatever the ratio
+NOISE_MS = 5.0
+
+
+def corpus_spec(seed=SEED, min_size=MIN_SIZE, max_size=MAX_SIZE):
+    """One entry per source image, in FOLDERS order"""
+    rng = random.Random(seed)
+    spec = []
+    for folder, config in optimize_images.FOLDERS.items():
+        for i in range(1, config["count"] + 1):
+            width = rng.randint(min_size, max_size)
+            height = min(max(round(width * rng.choice(ASPECTS)), min_size), max_size)
+            kind = rng.choice(KINDS)
+            ext = "jpg" if kind == "jpeg" else "png"
+            spec.append({
+                "folder": folder,
+                "name": f"{config['prefix']}-{i:02d}-bench.{ext}",
+                "size": [width, height],
+                "kind": kind,
+                "seed": rng.randrange(1 << 30),
+            })
+    return spec
+
+
+def synthesize(entry):
+    """
+    Photo-like test image: smooth gradients and shapes for structure,
+    blended with seeded noise for texture the encoder has to spend bits on.
+    """
+    rng = random.Random(entry["seed"])
+    width, height = entry["size"]
+    base = Image.merge("RGB", (
+        Image.linear_gradient("L").rotate(rng.randrange(360)),
+        Image.radial_gradient("L"),
+        Image.linear_gradient("L").transpose(Image.Transpose.ROTATE_90),
+    ))
+    img = base.resize((width, height), Image.Resampling.BICUBIC)
+
+    draw = ImageDraw.Draw(img)
+    for _ in range(40):
+        x, y = rng.randrange(width), rng.randrange(height)
+        w, h = rng.randrange(width // 16, width // 3), rng.randrange(height // 16, height // 3)
+        color = tuple(rng.randrange(256) for _ in range(3))
+        shape = draw.ellipse if rng.random() < 0.5 else draw.rectangle
+        shape((x, y, x + w, y + h), fill=color)
+
+    noise = Image.frombytes("L", (width, height), rng.randbytes(width * height)).convert("RGB")
+    img = Image.blend(img, noise, 0.12)
+
+    if entry["kind"] == "png-rgba":
+        img.putalpha(Image.radial_gradient("L").resize((width, height)).point(lambda v: 255 - v // 2))
+    return img
+
+
+def ensure_corpus(corpus_dir=CORPUS_DIR, spec=None):
+    """Write the corpus unless an identical one is already there. Returns [(entry, path)]."""
+    corpus_dir = Path(corpus_dir)
+    spec = spec if spec is not None else corpus_spec()
+    manifest = {"version": CORPUS_VERSION, "spec": spec}
+    manifest_path = corpus_dir / CORPUS_MANIFEST
+    paths = [(entry, corpus_dir / entry["folder"] / entry["name"]) for entry in spec]
+
+    try:
+        current = json.loads(manifest_path.read_text()) == manifest
+    except (OSError, ValueError):
+        current = False
+    if current and all(path.exists() for _, path in paths):
+        return paths
+
+    if corpus_dir.exists():
+        # Only ever wipe a directory this script generated
+        if not manifest_path.exists() and any(corpus_dir.iterdir()):
+            print(f"❌ {corpus_dir} is not a benchmark corpus; refusing to overwrite it")
+            sys.exit(1)
+        shutil.rmtree(corpus_dir)
+    print(f"🎨 Generating corpus: {len(spec)} images in {corpus_dir}")
+    sort_dir = corpus_dir / SORT_INPUT
+    sort_dir.mkdir(parents=True)
+    for entry, path in paths:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        img = synthesize(entry)
+        if entry["kind"] == "jpeg":
+            img.save(path, "JPEG", quality=92)
+        else:
+            # Low zlib effort keeps generation quick; decode cost is unaffected
+            img.save(path, "PNG", compress_level=1)
+        try:
+            os.link(path, sort_dir / path.name)
+        except OSError:
+            shutil.copy2(path, sort_dir / path.name)
+    manifest_path.write_text(json.dumps(manifest, indent=1))
+    return paths
+
+
+def load_sorter_module():
+    """scripts/image-sorter.py (not importable by name)"""
+    spec = importlib.util.spec_from_file_location("image_sorter", Path(__file__).parent / "image-sorter.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def bench_optimize(paths, scratch):
+    """({stage: seconds}, peak RSS MB) for decode/resize/encode over the corpus"""
+    seconds = {"decode": 0.0, "resize": 0.0, "encode": 0.0}
+    peak = 0.0
+    output = Path(scratch) / "bench.webp"
+    for _, path in paths:
+        optimize_images.reset_peak_rss()
+        img = optimize_images.prepare_image(path, seconds)
+        start = time.perf_counter()
+        optimize_images.save_image(img, output)
+        seconds["encode"] += time.perf_counter() - start
+        peak = max(peak, optimize_images.peak_rss_mb())
+    return seconds, peak
+
+
+def bench_sort(sorter_module, sort_dir, scratch):
+    """(seconds, peak RSS MB) for one cold sort into scratch/"""
+    optimize_images.reset_peak_rss()
+    with contextlib.redirect_stdout(io.StringIO()):
+        sorter = sorter_module.DeterministicImageSorter(cache_dir=None)
+        sorter.base_dir = Path(scratch)
+        start = time.perf_counter()
+        sorter.sort_images(sort_dir)
+        elapsed = time.perf_counter() - start
+    return elapsed, optimize_images.peak_rss_mb()
+
+
+def run_benchmark(corpus_dir=CORPUS_DIR, repeat=3, spec=None):
+    """Best-of-``repeat`` ms per stage and peak RSS per stage group"""
+    paths = ensure_corpus(corpus_dir, spec)
+    sorter_module = load_sorter_module()
+    best = {stage: None for stage in STAGES}
+    peaks = {"optimize": 0.0, "sort": 0.0}
+
+    for run in range(repeat):
+        with tempfile.TemporaryDirectory() as scratch:
+            seconds, peak = bench_optimize(paths, scratch)
+            seconds["sort"], sort_peak = bench_sort(sorter_module, Path(corpus_dir) / SORT_INPUT, scratch)
+        for stage, value in seconds.items():
+            best[stage] = value if best[stage] is None else min(best[stage], value)
+        peaks["optimize"] = max(peaks["optimize"], peak)
+        peaks["sort"] = max(peaks["sort"], sort_peak)
+        print(f"   run {run + 1}/{repeat}: " + "  ".join(f"{s} {seconds[s] * 1000:.0f} ms" for s in STAGES))
+
+    return {
+        "images": len(paths),
+        "repeat": repeat,
+        "stages_ms": {stage: round(value * 1000, 1) for stage, value in best.items()},
+        "peak_rss_mb": {key: round(value, 1) for key, value in peaks.items()},
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_history(history_path=HISTORY_FILE):
+    try:
+        with open(history_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
+
+
+def save_history(history, history_path=HISTORY_FILE):
+    history_path = Path(history_path)
+    history_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = history_path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(history, indent=2))
+    os.replace(tmp_path, history_path)
+
+
+def find_baseline(history, label=None):
+    """Latest run before the newest one, or the latest run with ``label``"""
+    earlier = history[:-1]
+    if label:
+        earlier = [record for record in earlier if record.get("label") == label]
+    return earlier[-1] if earlier else None
+
+
+def compare(base, head, threshold=THRESHOLD):
+    """
+    [(metric, base, head, change, regressed)] for every stage time and
+    peak RSS figure present in both runs
+    """
+    rows = []
+    metrics = [(f"{s} ms", base["stages_ms"].get(s), head["stages_ms"].get(s), NOISE_MS) for s in STAGES]
+    metrics += [(f"{k} peak MB", base["peak_rss_mb"].get(k), head["peak_rss_mb"].get(k), 1.0)
+                for k in ("optimize", "sort")]
+    for name, before, after, noise in metrics:
+        if before is None or after is None:
+            continue
+        change = (after - before) / before if before else 0.0
+        regressed = change > threshold and after - before > noise
+        rows.append((name, before, after, change, regressed))
+    return rows
+
+
+def print_comparison(base, head, rows):
+    print(f"   Baseline: {base.get('label') or base.get('git')} ({base['timestamp']})")
+    print(f"   Current:  {head.get('label') or head.get('git')} ({head['timestamp']})")
+    if base.get("corpus") != head.get("corpus"):
+        print("   ⚠️  Corpus differs between runs; numbers are not comparable")
+    print()
+    print(f"   {'Metric':18} {'base':>10} {'current':>10} {'change':>8}")
+    for name, before, after, change, regressed in rows:
+        flag = "  ❌ regression" if regressed else ""
+        print(f"   {name:18} {before:10.1f} {after:10.1f} {change * 100:+7.1f}%{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Image pipeline benchmark")
+    parser.add_argument("--label", help="Name for this run in the history (default: git revision)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per stage; the best is kept (default: 3)")
+    parser.add_argument("--corpus", default=str(CORPUS_DIR), help="Corpus directory")
+    parser.add_argument("--history", default=str(HISTORY_FILE), help="History file")
+    parser.add_argument("--min-size", type=int, default=MIN_SIZE, help=f"Smallest source edge (default: {MIN_SIZE})")
+    parser.add_argument("--max-size", type=int, default=MAX_SIZE, help=f"Largest source edge (default: {MAX_SIZE})")
+    parser.add_argument("--baseline", help="Compare against the latest run with this label")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help=f"Slowdown ratio flagged as a regression (default: {THRESHOLD})")
+    parser.add_argument("--compare-only", action="store_true", help="Compare the last two runs without running")
+    parser.add_argument("--fail", action="store_true", help="Exit 1 when a regression is flagged")
+    args = parser.parse_args()
+
+    history = load_history(args.history)
+
+    print("=" * 60)
+    print("⏱️  IMAGE PIPELINE BENCHMARK")
+    print("=" * 60)
+
+    if not args.compare_only:
+        spec = corpus_spec(min_size=args.min_size, max_size=args.max_size)
+        result = run_benchmark(args.corpus, max(1, args.repeat), spec)
+        record = {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "label": args.label,
+            "git": git_revision(),
+            "python": platform.python_version(),
+            "pillow": Image.__version__,
+            "cpus": os.cpu_count(),
+            "corpus": {"version": CORPUS_VERSION, "seed": SEED, "sizes": [args.min_size, args.max_size]},
+            **result,
+        }
+        history.append(record)
+        save_history(history, args.history)
+        print()
+        print(f"   {record['images']} images, best of {record['repeat']}:")
+        for stage in STAGES:
+            print(f"   {stage:8} {record['stages_ms'][stage]:10.1f} ms")
+        print(f"   peak RSS: optimize {record['peak_rss_mb']['optimize']:.1f} MB, "
+              f"sort {record['peak_rss_mb']['sort']:.1f} MB")
+        print(f"   History: {args.history} ({len(history)} runs)")
+        print()
+
+    if not history:
+        print("   No runs recorded yet")
+        sys.exit(1)
+    base = find_baseline(history, args.baseline)
+    if base is None:
+        print("   Nothing to compare against yet")
+        return
+    rows = compare(base, history[-1], args.threshold)
+    print_comparison(base, history[-1], rows)
+    if any(row[4] for row in rows):
+        print()
+        print(f"   ❌ Regressions above {args.threshold * 100:.0f}%")
+        if args.fail:
+            sys.exit(1)
+    else:
+        print()
+        print("   ✅ No regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+Critical CSS
+Inlines the stylesheet rules the first sections of the page need and
+makes the full stylesheets load without blocking render.
+
+The sections up to the fold (page_budget.FOLD_SECTION, or --count N),
+minus the ones rendered hidden (OFFSCREEN_SECTIONS, or --skip), are
+rendered with the product config, so markup injected from it (colour
+swatches, size options) counts. Only what is painted on load is
+matched: hidden subtrees (closed <details>, modals, [hidden],
+display:none) are left out, classes scripts add later are not assumed,
+and rules that need an interaction state (:hover, :focus, [open],
+aria-expanded) or a hover-capable/print @media are dropped. Each local
+stylesheet the page links for all media is pruned against that DOM with
+prune_css.py (url() references rebased to the page), and the page gets:
+
+    <style id="critical-css">...</style>
+    <link rel="stylesheet" href="..." media="print" onload="this.media='all'">
+    <noscript><link rel="stylesheet" href="..."></noscript>
+
+Links with their own media query are left alone. The page is only
+rewritten if everything up to the end of the critical block fits in the
+first round trip: CRITICAL_MAX_BYTES (--max-bytes) gzipped, as sent.
+Otherwise the stylesheets stay render-blocking and a warning is printed.
+
+The extracted CSS is cached in .build-cache/critical-<key>.css, keyed by
+the critical sections' templates, the config values they use and the
+stylesheets' contents.
+
+Usage:
+    python3 scripts/critical_css.py [index.html] [--config product.config]
+        [--fold SECTION | --count N] [--skip SECTION] [--sections DIR] [--max-bytes N]
+"""
+
+import argparse
+import gzip
+import hashlib
+import os
+import posixpath
+import re
+import sys
+from pathlib import Path
+
+from minify_html import GZIP_LEVEL
+from page_budget import FOLD_SECTION
+from prune_css import (
+    HREF_ATTR, STYLESHEET_LINK, VOID_TAGS, AtRule, DomIndex, SelectorMatcher, local_path, parse_css,
+    prune_stylesheet, serialize, strip_comments,
+)
+from render_template import (
+    BASE_DIR, CACHE_DIR, SECTIONS, join_chunks, load_compiled_sections, render, resolve,
+)
+from render_variants import parse_config
+
+CRITICAL_ID = "critical-css"
+# Bump when extraction rules change so cached results are redone
+CRITICAL_VERSION = 3
+ASYNC_ATTRS = ' media="print" onload="this.media=\'all\'"'
+MEDIA_ATTR = re.compile(r'\smedia=["\']([^"\']*)["\']', re.IGNORECASE)
+CSS_URL = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)""", re.IGNORECASE)
+# Blocking or page-level statements that don't belong in an inline block
+CSS_STATEMENT = re.compile(r"@(?:import|charset)\b[^;]*;", re.IGNORECASE)
+# Interaction states nothing is in on first paint (checked outside :not())
+STATE_PSEUDO = re.compile(
+    r":(?:hover|focus|focus-visible|focus-within|active|visited|checked|target|invalid|-webkit-autofill)\b"
+    r"|\[(?:open|aria-expanded=[\"']?true|aria-selected=[\"']?true)\b",
+    re.IGNORECASE,
+)
+NOT_PSEUDO = re.compile(r":not\((?:[^()]|\([^()]*\))*\)", re.IGNORECASE)
+# @media blocks that can't apply to the first paint of a screen
+DEFERRED_MEDIA = re.compile(r"\(\s*hover\s*:\s*hover\s*\)|^\s*print\b", re.IGNORECASE)
+DISPLAY_NONE = re.compile(r"display\s*:\s*none", re.IGNORECASE)
+# Roughly what the first round trip carries (10 TCP segments), on the wire
+CRITICAL_MAX_BYTES = 14 * 1024
+# Above-the-fold sections that render hidden (off-canvas drawers, modals)
+OFFSCREEN_SECTIONS = ("04-cart-drawer.html",)
+# Elements whose whole subtree is hidden until opened
+OFFSCREEN_TAGS = {"template", "noscript", "product-modal"}
+
+
+class VisibleDomIndex(DomIndex):
+    """
+    DomIndex of what is painted on load: subtrees that are hidden
+    (``hidden``, inline display:none, OFFSCREEN_TAGS, a closed <dialog>,
+    the body of a closed <details>) are left out
+    """
+
+    def __init__(self, html=""):
+        self._skipping = []
+        self._closed_details = set()
+        super().__init__(html)
+
+    def _hides(self, tag, attrs):
+        parent = self._stack[-1] if self._stack else -1
+        return (
+            tag in OFFSCREEN_TAGS
+            or "hidden" in attrs
+            or bool(DISPLAY_NONE.search(attrs.get("style") or ""))
+            or (tag == "dialog" and "open" not in attrs)
+            or (parent in self._closed_details and tag != "summary")
+        )
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if self._skipping or self._hides(tag, attrs):
+            if tag not in VOID_TAGS:
+                self._skipping.append(tag)
+            return
+        if tag == "details" and "open" not in attrs:
+            self._closed_details.add(len(self.tags))
+        super().handle_starttag(tag, attrs.items())
+
+    def handle_startendtag(self, tag, attrs):
+        count, skipping = len(self.tags), len(self._skipping)
+        self.handle_starttag(tag, attrs)
+        if len(self._skipping) > skipping:
+            self._skipping.pop()
+        elif len(self.tags) > count and tag not in VOID_TAGS:
+            self._stack.pop()
+
+    def handle_endtag(self, tag):
+        if not self._skipping:
+            super().handle_endtag(tag)
+            return
+        for depth in range(len(self._skipping) - 1, -1, -1):
+            if self._skipping[depth] == tag:
+                del self._skipping[depth:]
+                return
+
+
+class CriticalMatcher(SelectorMatcher):
+    """Pruning matcher that also rejects selectors only an interaction state can match"""
+
+    def matches(self, selector):
+        return not STATE_PSEUDO.search(NOT_PSEUDO.sub("", selector)) and super().matches(selector)
+
+
+def drop_deferred_media(nodes):
+    """Nodes without the @media blocks in DEFERRED_MEDIA (hover-capable devices, print)"""
+    kept = []
+    for node in nodes:
+        if isinstance(node, AtRule) and node.children is not None:
+            if node.name == "media" and DEFERRED_MEDIA.search(node.prelude):
+                continue
+            node = node._replace(children=drop_deferred_media(node.children))
+        kept.append(node)
+    return kept
+
+
+def critical_sections(compiled, fold=FOLD_SECTION, count=None, skip=OFFSCREEN_SECTIONS):
+    """
+    The leading [(name, chunks)] through the fold section (or the first
+    ``count``), minus the ``skip`` sections that aren't painted on load
+    """
+    if count is None:
+        names = [name for name, _ in compiled]
+        count = names.index(fold) + 1 if fold in names else len(compiled)
+    return [(name, chunks) for name, chunks in compiled[:count] if name not in skip]
+
+
+def rebase_urls(css, stylesheet_url):
+    """Rewrite relative url() references so they resolve from the page, not the stylesheet"""
+    base = posixpath.dirname(stylesheet_url)
+
+    def rebase(match):
+        ref = match.group(2).strip()
+        if not base or ref.startswith(("/", "#", "data:", "http:", "https:")) or "//" in ref:
+            return match.group(0)
+        return f'url("{posixpath.normpath(posixpath.join(base, ref))}")'
+
+    return CSS_URL.sub(rebase, css)
+
+
+def applies_to_all_media(tag):
+    """True for a link with no media attribute or media="all" """
+    media = MEDIA_ATTR.search(tag)
+    return not media or media.group(1).strip().lower() in ("", "all")
+
+
+def critical_key(sections, stylesheets, values=None):
+    """
+    Cache key: section names and templates, the config values they use,
+    plus each stylesheet's url and contents
+    """
+    digest = hashlib.sha256(f"v{CRITICAL_VERSION}\0".encode("utf-8"))
+    for name, chunks in sections:
+        digest.update(name.encode("utf-8") + b"\0")
+        digest.update("\0".join(chunks).encode("utf-8") + b"\1")
+        for key in sorted(set(chunks[1::2])):
+            digest.update(f"{key}={resolve(values or {}, key) or ''}\0".encode("utf-8"))
+    for url, data in stylesheets:
+        digest.update(url.encode("utf-8") + b"\0" + hashlib.sha256(data).digest())
+    return digest.hexdigest()[:16]
+
+
+def extract_critical(html, stylesheets):
+    """Rules from [(url, css text)] that match something in ``html``"""
+    matcher = CriticalMatcher(VisibleDomIndex(html))
+    inline_styles = "\n".join(re.findall(r"<style\b[^>]*>(.*?)</style>", html, re.IGNORECASE | re.DOTALL))
+    parts = []
+    for url, css in stylesheets:
+        css = serialize(drop_deferred_media(parse_css(strip_comments(css)[0])))
+        pruned, _ = prune_stylesheet(css, matcher, inline_styles, keep_licenses=False)
+        pruned = CSS_STATEMENT.sub("", pruned).strip()
+        if pruned:
+            parts.append(rebase_urls(pruned, url))
+    return "\n".join(parts)
+
+
+def critical_css(urls, sections_dir=BASE_DIR / "sections", fold=FOLD_SECTION, count=None,
+                 base_dir=BASE_DIR, cache_dir=CACHE_DIR, section_names=SECTIONS, skip=OFFSCREEN_SECTIONS,
+                 values=None):
+    """
+    (css, cached) for the critical sections, rendered with the config
+    ``values``, against the local stylesheets in ``urls``. Served from
+    .build-cache/critical-<key>.css when the templates, the values they use
+    and the stylesheets are unchanged.
+    """
+    compiled, _ = load_compiled_sections(sections_dir, section_names, cache_dir=cache_dir)
+    sections = critical_sections(compiled, fold, count, skip)
+    stylesheets = []
+    for url in urls:
+        path = local_path(url, base_dir)
+        if path and path.is_file():
+            stylesheets.append((url, path.read_bytes()))
+
+    key = critical_key(sections, stylesheets, values)
+    cache_path = Path(cache_dir) / f"critical-{key}.css" if cache_dir else None
+    if cache_path and cache_path.exists():
+        return cache_path.read_text(), True
+
+    html, _ = render(join_chunks(chunks for _, chunks in sections), values or {})
+    css = extract_critical(html, [(url, data.decode("utf-8", errors="replace")) for url, data in stylesheets])
+    if cache_path:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        # Batch workers may extract the same key at once
+        tmp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(css)
+        os.replace(tmp_path, cache_path)
+    return css, False
+
+
+def inline_critical(html, css, urls):
+    """
+    Put ``css`` in a <style> before the first of ``urls``' links and make
+    those links load asynchronously (with a <noscript> fallback). Pages
+    that already have the critical block are returned unchanged.
+    """
+    if f'id="{CRITICAL_ID}"' in html:
+        return html
+    inserted = False
+
+    def replace_tag(match):
+        nonlocal inserted
+        tag = match.group(0)
+        href = HREF_ATTR.search(tag)
+        if not href or href.group(2) not in urls or not applies_to_all_media(tag):
+            return tag
+        end = len(tag) - (2 if tag.endswith("/>") else 1)
+        async_tag = MEDIA_ATTR.sub("", tag[:end]).rstrip() + ASYNC_ATTRS + " " + tag[end:]
+        out = f"{async_tag}<noscript>{tag}</noscript>"
+        if not inserted:
+            inserted = True
+            out = f'<style id="{CRITICAL_ID}">{css}</style>\n    {out}'
+        return out
+
+    return STYLESHEET_LINK.sub(replace_tag, html)
+
+
+def first_round_trip_bytes(html):
+    """Gzipped size of the page through the end of its critical <style> block"""
+    start = html.find(f'id="{CRITICAL_ID}"')
+    end = html.find("</style>", start) + len("</style>") if start != -1 else len(html)
+    return len(gzip.compress(html[:end].encode("utf-8"), GZIP_LEVEL))
+
+
+def local_stylesheets(html, base_dir=BASE_DIR):
+    """Linked stylesheet URLs that exist on disk and apply to all media, in page order"""
+    urls = []
+    for tag in STYLESHEET_LINK.findall(html):
+        if not applies_to_all_media(tag):
+            continue
+        href = HREF_ATTR.search(tag)
+        path = local_path(href.group(2), base_dir) if href else None
+        if path and path.is_file() and href.group(2) not in urls:
+            urls.append(href.group(2))
+    return urls
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inline critical CSS and defer the full stylesheets")
+    parser.add_argument("page", nargs="?", default="index.html", help="Built page (default: index.html)")
+    parser.add_argument("--config", default="product.config", help="Config file (default: product.config)")
+    parser.add_argument("--sections", default=str(BASE_DIR / "sections"), help="Sections directory")
+    parser.add_argument("--fold", default=FOLD_SECTION, help=f"Last critical section (default: {FOLD_SECTION})")
+    parser.add_argument("--count", type=int, help="Use the first N sections instead of --fold")
+    parser.add_argument("--skip", action="append",
+                        help=f"Section that isn't painted on load (repeatable; default: {', '.join(OFFSCREEN_SECTIONS)})")
+    parser.add_argument("--max-bytes", type=int, default=CRITICAL_MAX_BYTES,
+                        help=f"Gzipped bytes the page may take through the critical CSS "
+                             f"(default: {CRITICAL_MAX_BYTES}; 0 for no limit)")
+    parser.add_argument("--no-cache", action="store_true", help="Extract again even if cached")
+    args = parser.parse_args()
+
+    page_path = Path(args.page)
+    if not page_path.exists():
+        print(f"❌ Page not found: {page_path}")
+        sys.exit(1)
+    html = page_path.read_text()
+    if f'id="{CRITICAL_ID}"' in html:
+        print(f"   Critical CSS already inlined in {page_path}")
+        return
+
+    base_dir = page_path.parent
+    urls = local_stylesheets(html, base_dir)
+    if not urls:
+        print("   No local stylesheets linked; nothing to do")
+        return
+
+    css, cached = critical_css(urls, args.sections, args.fold, args.count, base_dir,
+                               cache_dir=None if args.no_cache else CACHE_DIR,
+                               skip=tuple(args.skip) if args.skip else OFFSCREEN_SECTIONS,
+                               values=parse_config(args.config))
+    size = len(css.encode("utf-8"))
+    rewritten = inline_critical(html, css, set(urls))
+    first_bytes = first_round_trip_bytes(rewritten)
+    if args.max_bytes and first_bytes > args.max_bytes:
+        print(f"   ⚠️  Page through the critical CSS is {first_bytes / 1024:.1f} KB gzipped, over the "
+              f"{args.max_bytes / 1024:.1f} KB cap; stylesheets left render-blocking "
+              f"(trim the fold with --count/--skip)")
+        return
+    tmp_path = page_path.with_name(page_path.name + ".tmp")
+    tmp_path.write_text(rewritten)
+    os.replace(tmp_path, page_path)
+
+    total = sum(local_path(url, base_dir).stat().st_size for url in urls)
+    print(f"   Critical CSS: {size / 1024:.1f} KB inlined "
+          f"({'cached' if cached else 'extracted'}), {len(urls)} stylesheets "
+          f"({total / 1024:.1f} KB) deferred; first round trip {first_bytes / 1024:.1f} KB gzipped")
+
+
+if __name__ == "__main__":
+    main()
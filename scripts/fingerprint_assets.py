@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Asset Fingerprinting
+Publish stage: gives every local asset the built page references a
+content-hashed name, points the page at those names and writes the
+Netlify _headers that let browsers cache them forever.
+
+- Assets named in src/href/srcset/poster/data-src(set) attributes and in
+  url() (inline styles and stylesheets, which may reference each other
+  through url() and @import) are copied, or hard-linked when the content
+  is unchanged, to <name>.<hash>.<ext> next to the original. Relative
+  url()s keep resolving, and the originals stay published for anything
+  that names them directly (scripts, og:image).
+- Stylesheets are hashed after their own references are rewritten, so a
+  changed image gives its stylesheet a new name too.
+- Text assets (CSS, JS, SVG, JSON) and the page get .gz (and .br, with
+  brotli) siblings, compressed on a thread pool. They are named by
+  content, so a file is only compressed again when one of the encodings
+  it should have is missing (e.g. .br once brotli is installed).
+- _headers marks the hashed files "immutable" for a year and makes the
+  page revalidate. Older hashed copies of the same asset are removed.
+
+The site is published from git (netlify.toml publishes the repo root),
+so the hashed copies and _headers are committed with the page; only
+their .gz/.br siblings are ignored. An unchanged image's copy is the
+same blob as its original, so it adds nothing to the repository.
+
+Usage:
+    python3 scripts/fingerprint_assets.py [index.html] [--headers PATH] [--jobs N] [--json]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import posixpath
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from batch_build import link_file
+from minify_html import COMPRESSED_SUFFIXES, brotli, write_compressed
+from prune_css import local_path
+
+HASH_LENGTH = 10
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "public, max-age=0, must-revalidate"
+ASSET_EXTENSIONS = {".css", ".js", ".mjs", ".json", ".svg", ".webp", ".avif", ".png", ".jpg", ".jpeg",
+                    ".gif", ".ico", ".woff2", ".woff", ".ttf", ".otf", ".mp4", ".webm"}
+COMPRESSIBLE = {".css", ".js", ".mjs", ".json", ".svg", ".html"}
+# Smaller files gain nothing worth a second request variant
+MIN_COMPRESS_BYTES = 1024
+
+URL_ATTR = re.compile(r'(\s(?:src|href|poster|data-src)=)(["\'])([^"\']*)\2', re.IGNORECASE)
+SRCSET_ATTR = re.compile(r'(\s(?:srcset|data-srcset)=)(["\'])([^"\']*)\2', re.IGNORECASE)
+CSS_URL = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)""", re.IGNORECASE)
+CSS_IMPORT = re.compile(r"""(@import\s+)(['"])([^'"]+)\2""", re.IGNORECASE)
+HASHED_NAME = re.compile(rf"\.([0-9a-f]{{{HASH_LENGTH}}})$")
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+
+def hashed_name(path, digest):
+    return path.with_name(f"{path.stem}.{digest}{path.suffix}")
+
+
+def is_hashed(path):
+    """Already a <name>.<hash>.<ext> whose hash matches its content"""
+    m = HASHED_NAME.search(path.stem)
+    return bool(m) and m.group(1) == content_hash(path.read_bytes())
+
+
+def split_url(url):
+    """("images/a.webp", "?v=1#x") for a reference with a query/fragment"""
+    cut = min((i for i in (url.find("?"), url.find("#")) if i >= 0), default=len(url))
+    return url[:cut], url[cut:]
+
+
+class Fingerprinter:
+    """Hashes referenced assets under base_dir, each once, dependencies first"""
+
+    def __init__(self, base_dir):
+        self.base_dir = Path(base_dir).resolve()
+        self.assets = {}    # original Path -> hashed Path (or itself if already hashed)
+        self.stale = []
+
+    def asset_url(self, url, from_url=""):
+        """Hashed replacement for a relative reference, or None to leave it alone"""
+        path_part, rest = split_url(url.strip())
+        if not path_part or path_part.startswith("/") or "//" in path_part or ":" in path_part:
+            return None
+        site_url = posixpath.normpath(posixpath.join(posixpath.dirname(from_url), path_part))
+        path = local_path(site_url, self.base_dir)
+        if path is None or path.suffix.lower() not in ASSET_EXTENSIONS or not path.is_file():
+            return None
+        hashed = self.fingerprint(path)
+        return posixpath.join(posixpath.dirname(path_part), hashed.name) + rest
+
+    def rewrite_css(self, css, css_url):
+        def replace_url(match):
+            new = self.asset_url(match.group(2), css_url)
+            return match.group(0) if new is None else f"url({match.group(1)}{new}{match.group(1)})"
+
+        def replace_import(match):
+            new = self.asset_url(match.group(3), css_url)
+            return match.group(0) if new is None else f"{match.group(1)}{match.group(2)}{new}{match.group(2)}"
+
+        return CSS_IMPORT.sub(replace_import, CSS_URL.sub(replace_url, css))
+
+    def fingerprint(self, path):
+        """Hashed copy of one asset (stylesheet references rewritten first)"""
+        path = path.resolve()
+        if path in self.assets:
+            return self.assets[path]
+        # Guards @import cycles; replaced below
+        self.assets[path] = path
+        if is_hashed(path):
+            return path
+
+        data = path.read_bytes()
+        if path.suffix.lower() == ".css":
+            url = path.relative_to(self.base_dir).as_posix()
+            rewritten = self.rewrite_css(data.decode("utf-8", errors="replace"), url).encode("utf-8")
+            changed = rewritten != data
+            data = rewritten
+        else:
+            changed = False
+
+        target = hashed_name(path, content_hash(data))
+        if not target.exists():
+            if changed:
+                tmp_path = target.with_name(target.name + ".tmp")
+                tmp_path.write_bytes(data)
+                os.replace(tmp_path, target)
+            else:
+                link_file(path, target)
+        self.stale.extend(self._older_copies(path, target))
+        self.assets[path] = target
+        return target
+
+    @staticmethod
+    def _older_copies(path, current):
+        pattern = re.compile(rf"{re.escape(path.stem)}\.[0-9a-f]{{{HASH_LENGTH}}}{re.escape(path.suffix)}(\.gz|\.br)?$")
+        return [
+            other for other in path.parent.iterdir()
+            if pattern.fullmatch(other.name) and not other.name.startswith(current.name)
+        ]
+
+    def rewrite_html(self, html):
+        def replace_attr(match):
+            new = self.asset_url(match.group(3))
+            return match.group(0) if new is None else f"{match.group(1)}{match.group(2)}{new}{match.group(2)}"
+
+        def replace_srcset(match):
+            candidates = []
+            for candidate in match.group(3).split(","):
+                parts = candidate.split()
+                if parts:
+                    parts[0] = self.asset_url(parts[0]) or parts[0]
+                candidates.append(" ".join(parts))
+            return f"{match.group(1)}{match.group(2)}{', '.join(candidates)}{match.group(2)}"
+
+        def replace_url(match):
+            new = self.asset_url(match.group(2))
+            return match.group(0) if new is None else f"url({match.group(1)}{new}{match.group(1)})"
+
+        html = URL_ATTR.sub(replace_attr, html)
+        html = SRCSET_ATTR.sub(replace_srcset, html)
+        return CSS_URL.sub(replace_url, html)
+
+
+def compress_all(paths, jobs=0):
+    """Write .gz/.br siblings for each path on a thread pool. Returns {path: {suffix: bytes}}."""
+    jobs = jobs if jobs > 0 else (os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        return dict(zip(paths, pool.map(write_compressed, paths)))
+
+
+def headers_file(page_urls, asset_urls):
+    """Netlify _headers text: pages revalidate, hashed assets are immutable"""
+    lines = ["# Generated by scripts/fingerprint_assets.py - do not edit", ""]
+    for url in page_urls:
+        lines += [url, f"  Cache-Control: {REVALIDATE}"]
+    for url in sorted(asset_urls):
+        lines += [url, f"  Cache-Control: {IMMUTABLE}"]
+    return "\n".join(lines) + "\n"
+
+
+def fingerprint_page(page_path, headers_path=None, jobs=0):
+    """Fingerprint everything page_path references; rewrites the page. Returns the report dict."""
+    start = time.perf_counter()
+    page_path = Path(page_path)
+    base_dir = page_path.parent.resolve()
+    fingerprinter = Fingerprinter(base_dir)
+
+    html = page_path.read_text()
+    rewritten = fingerprinter.rewrite_html(html)
+    if rewritten != html:
+        tmp_path = page_path.with_name(page_path.name + ".tmp")
+        tmp_path.write_text(rewritten)
+        os.replace(tmp_path, page_path)
+
+    removed = 0
+    for stale in set(fingerprinter.stale):
+        if stale.exists():
+            stale.unlink()
+            removed += 1
+    hash_ms = (time.perf_counter() - start) * 1000
+
+    hashed = sorted(set(fingerprinter.assets.values()))
+    compress = [
+        path for path in hashed
+        if path.suffix.lower() in COMPRESSIBLE and path.stat().st_size >= MIN_COMPRESS_BYTES
+        and not all(path.with_name(path.name + suffix).exists() for suffix in COMPRESSED_SUFFIXES)
+    ]
+    compress.append(page_path)
+    step = time.perf_counter()
+    sizes = compress_all(compress, jobs)
+    compress_ms = (time.perf_counter() - step) * 1000
+
+    asset_urls = ["/" + path.relative_to(base_dir).as_posix() for path in hashed]
+    page_urls = ["/" + page_path.name] + (["/"] if page_path.name == "index.html" else [])
+    headers_path = Path(headers_path) if headers_path else base_dir / "_headers"
+    headers_path.write_text(headers_file(page_urls, asset_urls))
+
+    return {
+        "page": str(page_path),
+        "assets": len(hashed),
+        "asset_bytes": sum(path.stat().st_size for path in hashed),
+        "compressed": len(sizes),
+        "compressed_bytes": {suffix: sum(s.get(suffix, 0) for s in sizes.values()) for suffix in (".gz", ".br")},
+        "removed": removed,
+        "headers": str(headers_path),
+        "hash_ms": round(hash_ms, 1),
+        "compress_ms": round(compress_ms, 1),
+        "total_ms": round((time.perf_counter() - start) * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Content-hash page assets and write cache headers")
+    parser.add_argument("page", nargs="?", default="index.html", help="Built page (default: index.html)")
+    parser.add_argument("--headers", help="Where to write the _headers file (default: next to the page)")
+    parser.add_argument("--jobs", "-j", type=int, default=0, help="Compression threads (default: one per CPU)")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    page_path = Path(args.page)
+    if not page_path.exists():
+        print(f"❌ Page not found: {page_path}")
+        sys.exit(1)
+
+    report = fingerprint_page(page_path, args.headers, args.jobs)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"   {report['assets']} assets ({report['asset_bytes'] / 1024:.1f} KB) content-hashed "
+          f"in {report['hash_ms']:.0f} ms, {report['removed']} stale copies removed")
+    encodings = ", ".join(
+        f"{suffix} {size / 1024:.1f} KB" for suffix, size in report["compressed_bytes"].items() if size
+    )
+    print(f"   {report['compressed']} files compressed in {report['compress_ms']:.0f} ms ({encodings or 'none'})")
+    if brotli is None:
+        print("   ⚠️  brotli not installed; only .gz written. Run: pip install brotli")
+    print(f"   ✅ {report['headers']}: immutable caching for hashed assets, {page_path.name} revalidates")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Streaming HTML pipeline
+Post-processing for the built page as a chain of generator stages over
+one token stream, instead of whole-file rewrite passes.
+
+A token is (kind, value): TEXT for literal HTML, SLOT for a {{VAR}} name
+that a later stage resolves. A stage is any callable that takes an
+iterable of tokens and yields tokens, so stages compose freely:
+
+    pipeline = Pipeline()
+    pipeline.add("strip", strip_stray_closing_tags_stage)
+    pipeline.add("split", split_placeholders_stage)
+    pipeline.add("substitute", substitute_stage(values, unresolved))
+    pipeline.write(pipeline.run(source_tokens), "index.html")
+
+Each stage is timed on its own (its time minus the time spent waiting on
+the stage before it) and the page is written once, at the end.
+"""
+
+import os
+import time
+from pathlib import Path
+
+TEXT = "text"
+SLOT = "slot"
+
+
+def text_tokens(texts):
+    """Source stage: one TEXT token per string"""
+    for text in texts:
+        yield TEXT, text
+
+
+def chunk_tokens(chunks):
+    """Source stage: alternating literal/slot chunks (render_template format)"""
+    for i, chunk in enumerate(chunks):
+        yield (SLOT if i % 2 else TEXT), chunk
+
+
+def tokens_to_chunks(tokens):
+    """Collect tokens back into alternating literal/slot chunks"""
+    chunks = [""]
+    for kind, value in tokens:
+        if kind == SLOT:
+            chunks.extend((value, ""))
+        else:
+            chunks[-1] += value
+    return chunks
+
+
+class Pipeline:
+    """Ordered, individually timed generator stages"""
+
+    def __init__(self):
+        self.stages = []
+        self._inclusive = {}
+
+    def add(self, name, stage):
+        self.stages.append((name, stage))
+        return self
+
+    def _timed(self, name, tokens):
+        # Time spent producing each token, including upstream stages
+        it = iter(tokens)
+        elapsed = 0.0
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    token = next(it)
+                except StopIteration:
+                    elapsed += time.perf_counter() - start
+                    return
+                elapsed += time.perf_counter() - start
+                yield token
+        finally:
+            self._inclusive[name] = elapsed
+
+    def run(self, tokens, source="source"):
+        """Chain every stage onto tokens; returns the output token iterator"""
+        self._inclusive = {}
+        stream = self._timed(source, tokens)
+        for name, stage in self.stages:
+            stream = self._timed(name, stage(stream))
+        return stream
+
+    def timings(self, source="source"):
+        """{stage: ms} of each stage's own time for the last run"""
+        result = {}
+        previous = 0.0
+        for name in [source] + [name for name, _ in self.stages]:
+            inclusive = self._inclusive.get(name, previous)
+            result[name] = max(inclusive - previous, 0.0) * 1000
+            previous = inclusive
+        return result
+
+    @staticmethod
+    def write(tokens, out_path):
+        """Drain the stream and write the page once. Returns the html."""
+        parts = []
+        for kind, value in tokens:
+            if kind == SLOT:
+                value = "{{" + value + "}}"
+            parts.append(value)
+        html = "".join(parts)
+        if out_path:
+            out_path = Path(out_path)
+            tmp_path = out_path.with_name(out_path.name + ".tmp")
+            tmp_path.write_text(html)
+            os.replace(tmp_path, out_path)
+        return html
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Icon Font Subsetter
+Cuts Font Awesome down to the glyphs the built page actually uses.
+
+- Only runs when the page links the icon stylesheet; otherwise there is
+  nothing to save and no .subset.css is written.
+- Glyph classes (.fa-*:before{content:"\\fXXX"}) are read from the icon
+  stylesheet; an icon counts as used when an element outside <svg> has
+  its class, or the page's scripts name it. Inline SVG icons
+  (svg-inline--fa) carry their own paths and don't need the font.
+- stylesheets/<name>.subset.css keeps the stylesheet's utility rules and
+  only the used glyph rules. With no used glyphs the @font-face is
+  dropped, so the page never downloads the font at all.
+- With fontTools installed and the webfont on disk, the font is subset
+  to the used code points (WOFF2 when brotli is available, else WOFF)
+  and the @font-face points at that file only.
+
+Optional: pip install fonttools brotli (without it only the stylesheet is subset)
+
+Usage:
+    python3 scripts/icon_subset.py [index.html] [--stylesheet URL] [--rewrite] [--json]
+"""
+
+import argparse
+import json
+import os
+import posixpath
+import re
+import sys
+from pathlib import Path
+
+from prune_css import (
+    HREF_ATTR, STYLESHEET_LINK, WORD, AtRule, DomIndex, Rule, local_path,
+    parse_css, script_text, serialize, split_selector_list, strip_comments,
+)
+
+try:
+    from fontTools import subset as font_subset
+    from fontTools.ttLib import TTFont
+except ImportError:
+    font_subset = None
+
+try:
+    import brotli  # noqa: F401  fontTools needs it to write WOFF2
+except ImportError:
+    brotli = None
+
+ICON_STYLESHEET = "stylesheets/font-awesome.min.css"
+SUBSET_SUFFIX = ".subset.css"
+GLYPH_SELECTOR = re.compile(r"\.(fa-[\w-]+)::?before$")
+GLYPH_CONTENT = re.compile(r"""content\s*:\s*["']\\([0-9a-fA-F]{1,6})["']""")
+FONT_URL = re.compile(r"""url\(\s*['"]?([^'")?#]+)[^'")]*['"]?\s*\)""", re.IGNORECASE)
+FONT_SRC = re.compile(r"\bsrc\s*:[^;]*;?", re.IGNORECASE)
+# Sources fontTools can read, best first; the browser is served the first that exists
+FONT_EXTENSIONS = (".woff2", ".woff", ".ttf", ".otf")
+READ_ORDER = (".ttf", ".otf", ".woff", ".woff2")
+
+
+def glyph_map(nodes):
+    """{glyph class: code point} from top-level .fa-*:before rules"""
+    glyphs = {}
+    for node in nodes:
+        if not isinstance(node, Rule):
+            continue
+        content = GLYPH_CONTENT.search(node.body)
+        selectors = [GLYPH_SELECTOR.match(s.strip()) for s in split_selector_list(node.selectors)]
+        if content and selectors and all(selectors):
+            for m in selectors:
+                glyphs[m.group(1)] = int(content.group(1), 16)
+    return glyphs
+
+
+def _in_svg(dom, element):
+    while element >= 0:
+        if dom.tags[element] == "svg":
+            return True
+        element = dom.parent[element]
+    return False
+
+
+def used_icons(html, glyphs, scripts=""):
+    """Glyph classes the icon font has to draw: on an element outside <svg> or named in scripts"""
+    dom = DomIndex(html)
+    used = {
+        name for name in glyphs
+        if any(not _in_svg(dom, element) for element in dom.by_class.get(name, ()))
+    }
+    used.update(word for word in WORD.findall(scripts) if word in glyphs)
+    return used
+
+
+def subset_nodes(nodes, glyphs, used):
+    """Nodes with unused glyph selectors removed and, if nothing is used, the icon @font-face too"""
+    kept = []
+    for node in nodes:
+        if isinstance(node, Rule):
+            selectors = split_selector_list(node.selectors)
+            names = [GLYPH_SELECTOR.match(s.strip()) for s in selectors]
+            if all(names) and all(m.group(1) in glyphs for m in names):
+                selectors = [s for s, m in zip(selectors, names) if m.group(1) in used]
+                if not selectors:
+                    continue
+                node = Rule(",".join(selectors), node.body)
+        elif isinstance(node, AtRule) and node.name == "font-face" and not used:
+            continue
+        kept.append(node)
+    return kept
+
+
+def font_files(body, stylesheet_url, base_dir):
+    """{extension: Path} for the local files an @font-face src names"""
+    base = posixpath.dirname(stylesheet_url)
+    files = {}
+    for ref in FONT_URL.findall(body):
+        if ref.startswith(("data:", "http:", "https:", "/")) or "//" in ref:
+            continue
+        url = posixpath.normpath(posixpath.join(base, ref))
+        path = local_path(url, base_dir)
+        ext = Path(url).suffix.lower()
+        if path and path.is_file() and ext in FONT_EXTENSIONS:
+            files.setdefault(ext, path)
+    return files
+
+
+def subset_font(source, codepoints, out_path):
+    """Write ``source`` cut down to ``codepoints`` (WOFF2 with brotli, else WOFF)"""
+    options = font_subset.Options()
+    options.flavor = "woff2" if brotli else "woff"
+    options.layout_features = []
+    options.name_IDs = []
+    options.notdef_outline = True
+    font = TTFont(source)
+    subsetter = font_subset.Subsetter(options)
+    subsetter.populate(unicodes=sorted(codepoints))
+    subsetter.subset(font)
+    tmp_path = out_path.with_name(out_path.name + ".tmp")
+    font_subset.save_font(font, str(tmp_path), options)
+    os.replace(tmp_path, out_path)
+    return options.flavor
+
+
+def subset_url(url):
+    return url[: -len(".css")] + SUBSET_SUFFIX if url.endswith(".css") else url + SUBSET_SUFFIX
+
+
+def subset_stylesheet(html, stylesheet_url=ICON_STYLESHEET, base_dir=None, scripts=""):
+    """
+    Write the subset stylesheet (and font, when fontTools is available)
+    for one icon stylesheet. Returns the report dict.
+    """
+    base_dir = Path(base_dir or ".")
+    source = local_path(stylesheet_url, base_dir)
+    css = source.read_text(errors="replace")
+    text, licenses = strip_comments(css)
+    nodes = parse_css(text)
+    glyphs = glyph_map(nodes)
+    used = used_icons(html, glyphs, scripts)
+    kept = subset_nodes(nodes, glyphs, used)
+
+    report = {
+        "stylesheet": stylesheet_url,
+        "subset": subset_url(stylesheet_url),
+        "glyphs": len(set(glyphs.values())),
+        "icons": sorted(used),
+        "bytes": len(css.encode("utf-8")),
+        "font": None,
+        "font_bytes": 0,
+        "subset_font": None,
+        "subset_font_bytes": 0,
+    }
+
+    faces = [node for node in nodes if isinstance(node, AtRule) and node.name == "font-face"]
+    files = {}
+    for face in faces:
+        files.update(font_files(face.body, stylesheet_url, base_dir))
+    served = next((files[ext] for ext in FONT_EXTENSIONS if ext in files), None)
+    if served:
+        report["font"] = str(served.relative_to(base_dir))
+        report["font_bytes"] = served.stat().st_size
+
+    readable = next((files[ext] for ext in READ_ORDER if ext in files), None)
+    if used and readable and font_subset is not None:
+        codepoints = {glyphs[name] for name in used}
+        out_path = readable.with_name(f"{readable.stem}.subset.{'woff2' if brotli else 'woff'}")
+        flavor = subset_font(readable, codepoints, out_path)
+        font_url = posixpath.relpath(
+            out_path.relative_to(base_dir).as_posix(), posixpath.dirname(stylesheet_url) or "."
+        )
+        kept = [
+            node._replace(body=FONT_SRC.sub("", node.body).rstrip(";") + f";src:url('{font_url}') format('{flavor}')")
+            if node in faces else node
+            for node in kept
+        ]
+        report["subset_font"] = out_path.relative_to(base_dir).as_posix()
+        report["subset_font_bytes"] = out_path.stat().st_size
+    elif used:
+        # Font can't be cut down here: the page keeps downloading the full one
+        report["subset_font_bytes"] = report["font_bytes"]
+
+    subset = "\n".join(licenses + [serialize(kept)]) + "\n"
+    out_path = local_path(report["subset"], base_dir)
+    tmp_path = out_path.with_name(out_path.name + ".tmp")
+    tmp_path.write_text(subset)
+    os.replace(tmp_path, out_path)
+    report["subset_bytes"] = len(subset.encode("utf-8"))
+    return report
+
+
+def links_stylesheet(html, url):
+    """Does the page link ``url`` (or its subset copy) as a stylesheet?"""
+    for tag in STYLESHEET_LINK.findall(html):
+        href = HREF_ATTR.search(tag)
+        if href and href.group(2).split("?")[0] in (url, subset_url(url)):
+            return True
+    return False
+
+
+def rewrite_links(html, urls):
+    """Point <link rel=stylesheet> hrefs in ``urls`` at their subset copies"""
+    def replace_tag(match):
+        tag = match.group(0)
+        return HREF_ATTR.sub(
+            lambda m: m.group(1) + (subset_url(m.group(2)) if m.group(2) in urls else m.group(2)) + m.group(3),
+            tag,
+        )
+    return STYLESHEET_LINK.sub(replace_tag, html)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Subset the icon font to the glyphs the page uses")
+    parser.add_argument("page", nargs="?", default="index.html", help="Built page (default: index.html)")
+    parser.add_argument("--stylesheet", default=ICON_STYLESHEET,
+                        help=f"Site-relative icon stylesheet (default: {ICON_STYLESHEET})")
+    parser.add_argument("--rewrite", action="store_true", help="Point the page's links at the subset stylesheet")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    page_path = Path(args.page)
+    if not page_path.exists():
+        print(f"❌ Page not found: {page_path}")
+        sys.exit(1)
+    base_dir = page_path.parent
+    source = local_path(args.stylesheet, base_dir)
+    if source is None or not source.is_file():
+        print(f"   No icon stylesheet at {args.stylesheet}; nothing to do")
+        return
+
+    html = page_path.read_text()
+    if not links_stylesheet(html, args.stylesheet):
+        # Subsetting a stylesheet the page never loads saves nothing
+        if args.json:
+            print(json.dumps({"stylesheet": args.stylesheet, "linked": False}, indent=2))
+        else:
+            print(f"   {args.stylesheet} is not linked by {page_path}; nothing to save")
+        return
+
+    report = subset_stylesheet(html, args.stylesheet, base_dir, script_text(html, base_dir))
+    if args.rewrite:
+        rewritten = rewrite_links(html, {args.stylesheet})
+        if rewritten != html:
+            tmp_path = page_path.with_name(page_path.name + ".tmp")
+            tmp_path.write_text(rewritten)
+            os.replace(tmp_path, page_path)
+        report["rewritten"] = rewritten != html
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    icons = ", ".join(report["icons"]) or "none"
+    print(f"   Icons used: {icons} ({len(report['icons'])} of {report['glyphs']} glyphs)")
+    print(f"   {report['stylesheet']:45} {report['bytes'] / 1024:7.1f} KB -> "
+          f"{report['subset_bytes'] / 1024:6.1f} KB ({report['subset']})")
+    if not report["icons"]:
+        print("   No icon-font glyphs used: @font-face dropped, no font download")
+    elif report["subset_font"]:
+        print(f"   {report['font']:45} {report['font_bytes'] / 1024:7.1f} KB -> "
+              f"{report['subset_font_bytes'] / 1024:6.1f} KB ({report['subset_font']})")
+    elif font_subset is None:
+        print("   ⚠️  fontTools not installed; font left whole. Run: pip install fonttools brotli")
+    else:
+        print("   ⚠️  Webfont not found on disk; font left whole")
+    saved = report["bytes"] - report["subset_bytes"] + report["font_bytes"] - report["subset_font_bytes"]
+    if args.rewrite:
+        print(f"   ✅ Saved {saved / 1024:.1f} KB; links in {page_path} point at {report['subset']}")
+    else:
+        print(f"   Would save {saved / 1024:.1f} KB with --rewrite")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,84 +2,242 @@
 """
 Deterministic Image Sorter for YES-Clean-Jarvis-Template
 Uses IMAGE-MAPPING.json to place images exactly where they belong.
+
+The mapping is compiled once into a slot index (slot_id prefixes ->
+slot, required/optional lists, target folders) and cached in
+.build-cache/ keyed by the mapping file's hash, so sorting and
+validation are single passes however many candidates are dropped in.
+
+--link chooses how files are placed: copy (default), hard (hard link),
+reflink (copy-on-write clone, Linux) or move. Anything but copy falls
+back to a copy when source and target are on different filesystems;
+bytes not duplicated are reported as saved.
+
+Placements are planned first and then run on a bounded thread pool
+(--io-jobs), each written to a temp file and renamed into place, so a
+failed or interrupted copy never leaves a half-written slot file.
+
+When several files match one slot, the best candidate is chosen by
+resolution and sharpness, and near-duplicates (perceptual hash) are
+collapsed; see image_metrics.py. Without Pillow, or with --first, the
+first candidate by name wins.
 """
 
+import errno
+import hashlib
 import json
-import re
+import os
+import pickle
 import shutil
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from collections import defaultdict
+from collections import Counter, defaultdict
+
+import image_metrics
+
+IMAGE_EXTENSIONS = {'.webp', '.png', '.jpg', '.jpeg', '.gif'}
+INDEX_CACHE = "image-mapping.pickle"
+# Bump when _compile_index changes so cached indexes are rebuilt
+INDEX_VERSION = 1
+
+LINK_MODES = ("copy", "hard", "reflink", "move")
+# Concurrent placements; I/O bound, so threads rather than processes
+IO_JOBS = 8
+# ioctl(2) request for a copy-on-write clone (btrfs, XFS, bcachefs)
+FICLONE = 0x40049409
+
+
+def normalize_parts(filename):
+    """Lowercase dash segments of a filename's stem, single digits zero-padded"""
+    return [f"0{p}" if len(p) == 1 and p.isdigit() else p
+            for p in Path(filename).stem.lower().split('-')]
+
+
+def _reflink(source, target):
+    """Clone source's data into target without copying it (raises OSError if unsupported)"""
+    try:
+        import fcntl
+    except ImportError:
+        raise OSError(errno.EOPNOTSUPP, "reflink not supported on this platform")
+    with open(source, "rb") as src, open(target, "wb") as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        except OSError:
+            dst.close()
+            os.unlink(target)
+            raise
+    shutil.copystat(source, target)
+
+
+def _temp_path(target):
+    """Hidden sibling of target, unique per process and thread"""
+    target = Path(target)
+    return target.with_name(f".{target.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+
+
+def place_file(source, target, mode="copy"):
+    """
+    Put source at target using the given mode.
+    The data lands in a temp file that is renamed over target, so target
+    is either the old file or the complete new one, never partial (and a
+    previous hard-linked placement is replaced, not written through).
+    Returns (method actually used, bytes not duplicated on disk).
+    """
+    size = os.path.getsize(source)
+    if mode == "move":
+        try:
+            os.replace(source, target)
+            return "move", size
+        except OSError:
+            # Different filesystem: copy below, then remove the source
+            pass
+
+    tmp_path = _temp_path(target)
+    try:
+        method = None
+        if mode in ("hard", "reflink"):
+            try:
+                if mode == "hard":
+                    os.link(source, tmp_path)
+                else:
+                    _reflink(source, tmp_path)
+                method = mode
+            except OSError:
+                # Different filesystem, or links/clones not supported: copy instead
+                pass
+        if method is None:
+            shutil.copy2(source, tmp_path)
+            method = "copy"
+        os.replace(tmp_path, target)
+    except BaseException:
+        if os.path.lexists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+    if mode == "move":
+        os.unlink(source)
+    return method, (size if method != "copy" else 0)
+
 
 class DeterministicImageSorter:
     """Sorts images into exact slots based on IMAGE-MAPPING.json"""
 
-    def __init__(self, mapping_file="IMAGE-MAPPING.json"):
+    def __init__(self, mapping_file="IMAGE-MAPPING.json", cache_dir=".build-cache", link="copy",
+                 select_best=True, io_jobs=IO_JOBS):
         self.base_dir = Path(__file__).parent.parent
+        self.link = link
+        self.select_best = select_best
+        self.io_jobs = max(1, io_jobs)
+        # (source, target, slot_id or None) placements waiting for _run_io
+        self._io_queue = []
         self.mapping_file = self.base_dir / mapping_file
-        self.mapping = self._load_mapping()
+        self.cache_path = self.base_dir / cache_dir / INDEX_CACHE if cache_dir else None
+        self.mapping, self.index = self._load_mapping()
         self.stats = {
             "processed": 0,
             "placed": 0,
             "skipped": 0,
-            "missing_required": []
+            "missing_required": [],
+            "placement": Counter(),
+            "bytes_saved": 0,
+            "duplicates_collapsed": 0,
+            "alternatives": {},
+            "io": {},
+            "failed": []
         }
         self.placed_slots = set()
 
     def _load_mapping(self):
+        """(mapping, compiled index), reusing the cached index while the mapping's hash matches"""
         if not self.mapping_file.exists():
             print(f"❌ Mapping file not found: {self.mapping_file}")
             sys.exit(1)
-        with open(self.mapping_file) as f:
-            return json.load(f)
-
-    def _extract_slot_id(self, filename):
+        data = self.mapping_file.read_bytes()
+        digest = hashlib.sha256(data).hexdigest()
+
+        if self.cache_path:
+            try:
+                with open(self.cache_path, "rb") as f:
+                    cached = pickle.load(f)
+                if (cached.get("version"), cached.get("sha256")) == (INDEX_VERSION, digest):
+                    return cached["mapping"], cached["index"]
+            except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+                pass
+
+        mapping = json.loads(data)
+        index = self._compile_index(mapping)
+        if self.cache_path:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.cache_path.with_suffix(".tmp")
+            with open(tmp_path, "wb") as f:
+                pickle.dump({"version": INDEX_VERSION, "sha256": digest, "mapping": mapping, "index": index},
+                            f, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.cache_path)
+        return mapping, index
+
+    @staticmethod
+    def _compile_index(mapping):
         """
-        Extract slot_id from filename.
-        Rule: take prefix up to the first numeric segment (inclusive).
-        Examples:
-          product-01-hero.webp -> product-01
-          testimonial-7-jane.webp -> testimonial-07
-          order-bump-01.webp -> order-bump-01
-          comparison-01.webp -> comparison-01
+        Flatten the mapping into:
+          slots     slot_id -> slot info (section, folder, filename, ...)
+          prefixes  normalized filename prefix -> slot_id
+          max_parts longest prefix, in dash segments
+          order     slot_ids in mapping order (for validation)
+        Paths are kept relative so the cache survives moving the repo.
         """
-        name = Path(filename).stem
-        parts = name.split('-')
-        slot_parts = []
-        for p in parts:
-            slot_parts.append(p)
-            if p.isdigit():
-                slot_id = "-".join(slot_parts).lower()
-                # Zero-pad single-digit numeric suffix
-                m = re.match(r"^(.*)-(\d)$", slot_id)
-                if m:
-                    slot_id = f"{m.group(1)}-0{m.group(2)}"
-                return slot_id
-
-        # Fallback to first segment
-        return parts[0].lower()
-
-    def _build_slot_lookup(self):
-        lookup = {}
-        for section_name, section_data in self.mapping["sections"].items():
+        slots = {}
+        prefixes = {}
+        order = []
+        for section_name, section_data in mapping["sections"].items():
             folder = section_data.get("folder", "images/")
             for slot in section_data.get("slots", []):
                 slot_id = slot["slot_id"].lower()
                 slot_folder = slot.get("folder", folder)
-                lookup[slot_id] = {
+                slots[slot_id] = {
                     **slot,
+                    "folder": slot_folder,
                     "section": section_name,
-                    "target_folder": self.base_dir / slot_folder.lstrip("/"),
-                    "target_path": self.base_dir / slot_folder.lstrip("/") / slot["filename"]
+                    "target_folder": slot_folder.lstrip("/"),
+                    "target_path": str(Path(slot_folder.lstrip("/")) / slot["filename"]),
                 }
-        return lookup
+                # testimonial-7 and testimonial-07 both land on testimonial-07
+                prefixes["-".join(normalize_parts(slot_id))] = slot_id
+                order.append(slot_id)
+        return {
+            "slots": slots,
+            "prefixes": prefixes,
+            "max_parts": max((key.count("-") + 1 for key in prefixes), default=0),
+            "order": order,
+        }
 
-    def _create_fallback_mapping(self):
-        fallback = {}
-        for i in range(1, 26):
-            slot_id = f"testimonial-{i:02d}"
-            fallback[f"testimonial-{i}"] = slot_id
-        return fallback
+    def _match_slot(self, filename):
+        """
+        slot_id for a filename: the longest slot_id that prefixes its
+        normalized dash segments, or None.
+        Examples:
+          product-01-hero.webp -> product-01
+          testimonial-7-jane.webp -> testimonial-07
+          size-chart-hero-v2.png -> size-chart-hero
+        """
+        parts = normalize_parts(filename)
+        prefixes = self.index["prefixes"]
+        for n in range(min(len(parts), self.index["max_parts"]), 0, -1):
+            slot_id = prefixes.get("-".join(parts[:n]))
+            if slot_id:
+                return slot_id
+        return None
+
+    def _slot_info(self, slot_id):
+        """Slot info with absolute target paths"""
+        slot = self.index["slots"][slot_id]
+        return {
+            **slot,
+            "target_folder": self.base_dir / slot["target_folder"],
+            "target_path": self.base_dir / slot["target_path"],
+        }
 
     def sort_images(self, source_dir, dry_run=False):
         source_path = Path(source_dir)
@@ -91,33 +249,46 @@ class DeterministicImageSorter:
         print(f"📋 Using mapping: {self.mapping_file}")
         print()
 
-        slot_lookup = self._build_slot_lookup()
-        fallback = self._create_fallback_mapping()
-
-        image_extensions = {'.webp', '.png', '.jpg', '.jpeg', '.gif'}
-        images = [f for f in source_path.iterdir()
-                  if f.is_file() and f.suffix.lower() in image_extensions]
+        # One sorted directory scan (DirEntry.is_file needs no extra stat)
+        with os.scandir(source_path) as entries:
+            images = sorted(
+                Path(entry.path) for entry in entries
+                if entry.is_file() and os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS
+            )
 
         print(f"Found {len(images)} images to sort")
         print()
 
         slot_matches = defaultdict(list)
-        for img in images:
-            slot_id = self._extract_slot_id(img.name)
-            slot_matches[slot_id].append(img)
-
         unsorted = []
-        for slot_id, matches in slot_matches.items():
-            if slot_id in slot_lookup:
-                self._place_image(matches[0], slot_lookup[slot_id], dry_run)
-            elif slot_id in fallback:
-                fallback_id = fallback[slot_id]
-                if fallback_id in slot_lookup:
-                    self._place_image(matches[0], slot_lookup[fallback_id], dry_run)
-                else:
-                    unsorted.extend(matches)
+        for img in images:
+            slot_id = self._match_slot(img.name)
+            if slot_id:
+                slot_matches[slot_id].append(img)
             else:
-                unsorted.extend(matches)
+                unsorted.append(img)
+
+        metrics = self._measure(images)
+
+        # Slots in mapping order; best candidate (or first by name) wins
+        for slot_id in self.index["order"]:
+            if slot_id in slot_matches:
+                best = self._choose(slot_id, slot_matches[slot_id], metrics)
+                self._place_image(best, self._slot_info(slot_id), dry_run)
+
+        if unsorted and metrics:
+            # Only one copy of each near-duplicate group goes to unsorted/
+            measured = [img for img in unsorted if img in metrics]
+            groups = defaultdict(list)
+            for img, group in zip(measured, image_metrics.duplicate_groups(
+                    [metrics[img]["dhash"] for img in measured])):
+                groups[group].append(img)
+            keep = set(img for img in unsorted if img not in metrics)
+            for members in groups.values():
+                best, duplicates, _ = image_metrics.choose_best(members, metrics)
+                keep.add(best)
+                self.stats["duplicates_collapsed"] += len(duplicates)
+            unsorted = [img for img in unsorted if img in keep]
 
         if unsorted:
             unsorted_dir = self.base_dir / "images" / "unsorted"
@@ -128,13 +299,37 @@ class DeterministicImageSorter:
             for img in unsorted:
                 print(f"   - {img.name}")
                 if not dry_run:
-                    shutil.copy2(img, unsorted_dir / img.name)
+                    self._io_queue.append((img, unsorted_dir / img.name, None))
 
             self.stats["skipped"] += len(unsorted)
 
+        self._run_io()
         self.stats["processed"] = len(images)
         return True
 
+    def _measure(self, images):
+        """Cached perceptual hash / resolution / sharpness per image ({} if disabled)"""
+        if not self.select_best or not images:
+            return {}
+        if not image_metrics.available():
+            print("⚠️  Pillow not installed - first candidate by name wins (pip install Pillow)")
+            return {}
+        cache_dir = self.cache_path.parent if self.cache_path else None
+        return image_metrics.load_metrics(images, cache_dir=cache_dir)
+
+    def _choose(self, slot_id, matches, metrics):
+        if len(matches) == 1 or not metrics:
+            return matches[0]
+        best, duplicates, alternatives = image_metrics.choose_best(matches, metrics)
+        self.stats["duplicates_collapsed"] += len(duplicates)
+        if alternatives:
+            self.stats["alternatives"][slot_id] = [img.name for img in alternatives]
+        m = metrics.get(best)
+        detail = f"{m['width']}x{m['height']}, sharpness {m['sharpness']:.0f}" if m else "unreadable"
+        print(f"   {slot_id}: {len(matches)} candidates, {len(duplicates)} near-duplicates → "
+              f"{best.name} ({detail})")
+        return best
+
     def _place_image(self, source_img, slot_info, dry_run):
         target_folder = slot_info["target_folder"]
         target_path = slot_info["target_path"]
@@ -146,10 +341,61 @@ class DeterministicImageSorter:
         print(f"✅ {source_img.name:45} → {slot_info['folder']}{slot_info['filename']}")
 
         if not dry_run:
-            shutil.copy2(source_img, target_path)
-
-        self.placed_slots.add(slot_id)
-        self.stats["placed"] += 1
+            # Counted as placed once the copy has actually landed
+            self._io_queue.append((source_img, target_path, slot_id))
+        else:
+            self.placed_slots.add(slot_id)
+            self.stats["placed"] += 1
+
+    def _run_io(self):
+        """Run queued placements on a bounded thread pool and record throughput"""
+        queue, self._io_queue = self._io_queue, []
+        if not queue:
+            return
+
+        def run(job):
+            source, target, _ = job
+            start = time.perf_counter()
+            size = os.path.getsize(source)
+            method, saved = place_file(source, target, self.link)
+            return method, saved, size, time.perf_counter() - start
+
+        start = time.perf_counter()
+        latencies = []
+        total_bytes = 0
+        with ThreadPoolExecutor(max_workers=min(self.io_jobs, len(queue))) as pool:
+            futures = [(job, pool.submit(run, job)) for job in queue]
+            for (source, target, slot_id), future in futures:
+                try:
+                    method, saved, size, seconds = future.result()
+                except OSError as e:
+                    print(f"❌ {source.name} → {target}: {e}")
+                    self.stats["failed"].append({"source": str(source), "target": str(target), "error": str(e)})
+                    continue
+                self.stats["placement"][method] += 1
+                self.stats["bytes_saved"] += saved
+                latencies.append(seconds)
+                total_bytes += size
+                if slot_id:
+                    self.placed_slots.add(slot_id)
+                    self.stats["placed"] += 1
+        wall = time.perf_counter() - start
+
+        latencies.sort()
+
+        def pick(q):
+            if not latencies:
+                return 0.0
+            return latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+
+        self.stats["io"] = {
+            "files": len(latencies),
+            "bytes": total_bytes,
+            "jobs": min(self.io_jobs, len(queue)),
+            "wall_s": round(wall, 3),
+            "mb_per_s": round(total_bytes / (1024 * 1024) / wall, 1) if wall else 0.0,
+            "latency_ms": {"p50": round(pick(0.5), 1), "p95": round(pick(0.95), 1), "max": round(pick(1.0), 1)},
+        }
 
     def print_summary(self):
         print()
@@ -159,22 +405,34 @@ class DeterministicImageSorter:
         print(f"  Total images processed: {self.stats['processed']}")
         print(f"  Images placed: {self.stats['placed']}")
         print(f"  Images skipped/unmapped: {self.stats['skipped']}")
+        io = self.stats["io"]
+        if io:
+            print(f"  I/O: {io['files']} files, {io['bytes'] / (1024 * 1024):.1f} MB in {io['wall_s']:.2f}s "
+                  f"({io['mb_per_s']} MB/s, {io['jobs']} threads) | latency p50 {io['latency_ms']['p50']} ms, "
+                  f"p95 {io['latency_ms']['p95']} ms, max {io['latency_ms']['max']} ms")
+        if self.stats["failed"]:
+            print(f"  ❌ Failed placements: {len(self.stats['failed'])}")
+        if self.stats["placement"]:
+            methods = ", ".join(f"{n} {m}" for m, n in sorted(self.stats["placement"].items()))
+            print(f"  Placement (--link={self.link}): {methods}")
+            print(f"  Disk saved vs copying: {self.stats['bytes_saved'] / (1024 * 1024):.1f} MB")
+        if self.stats["duplicates_collapsed"] or self.stats["alternatives"]:
+            print(f"  Near-duplicates collapsed: {self.stats['duplicates_collapsed']}")
+            print(f"  Slots with distinct unused alternatives: {len(self.stats['alternatives'])}")
 
         print()
         print("🔍 Checking required slots...")
         missing_required = []
 
-        for section_name, section_data in self.mapping["sections"].items():
-            for slot in section_data.get("slots", []):
-                if slot.get("required", False):
-                    slot_id = slot["slot_id"].lower()
-                    if slot_id not in self.placed_slots:
-                        missing_required.append({
-                            "slot_id": slot["slot_id"],
-                            "section": section_name,
-                            "filename": slot["filename"],
-                            "description": slot.get("description", "")
-                        })
+        for slot_id in self.index["order"]:
+            slot = self.index["slots"][slot_id]
+            if slot.get("required", False) and slot_id not in self.placed_slots:
+                missing_required.append({
+                    "slot_id": slot["slot_id"],
+                    "section": slot["section"],
+                    "filename": slot["filename"],
+                    "description": slot.get("description", "")
+                })
 
         if missing_required:
             print()
@@ -193,19 +451,11 @@ class DeterministicImageSorter:
 
         print()
         print("  📊 Images placed by category:")
-        categories = {
-            "product": [s for s in self.placed_slots if s.startswith("product-")],
-            "testimonials": [s for s in self.placed_slots if s.startswith("testimonial-")],
-            "comparison": [s for s in self.placed_slots if s.startswith("comparison-")],
-            "order-bump": [s for s in self.placed_slots if s.startswith("order-bump-")],
-            "founder": [s for s in self.placed_slots if s.startswith("founder-")],
-            "awards": [s for s in self.placed_slots if s.startswith("awards-")],
-            "universal": [s for s in self.placed_slots if s in ["logo", "size-chart-hero"]]
-        }
-
-        for cat_name, cat_slots in categories.items():
-            if cat_slots:
-                print(f"     {cat_name}: {len(cat_slots)} images")
+        # Mapping sections are the categories (product, testimonials, ...)
+        categories = Counter(self.index["slots"][s]["section"] for s in self.placed_slots)
+        for cat_name in self.mapping["sections"]:
+            if categories[cat_name]:
+                print(f"     {cat_name}: {categories[cat_name]} images")
 
         print()
 
@@ -215,18 +465,24 @@ class DeterministicImageSorter:
 
         errors = []
         warnings = []
-
-        for section_name, section_data in self.mapping["sections"].items():
-            for slot in section_data.get("slots", []):
-                folder = slot.get("folder", section_data.get("folder", "images/"))
-                target = self.base_dir / folder.lstrip("/") / slot["filename"]
-
-                if slot.get("required", False):
-                    if not target.exists():
-                        errors.append(f"❌ Missing required: {slot['slot_id']} → {target}")
-                else:
-                    if not target.exists():
-                        warnings.append(f"⚠️  Missing optional: {slot['slot_id']}")
+        # Each target folder is listed once instead of one stat per slot
+        listings = {}
+
+        for slot_id in self.index["order"]:
+            slot = self._slot_info(slot_id)
+            folder = slot["target_folder"]
+            if folder not in listings:
+                try:
+                    listings[folder] = set(os.listdir(folder))
+                except OSError:
+                    listings[folder] = set()
+            if slot["filename"] in listings[folder]:
+                continue
+
+            if slot.get("required", False):
+                errors.append(f"❌ Missing required: {slot['slot_id']} → {slot['target_path']}")
+            else:
+                warnings.append(f"⚠️  Missing optional: {slot['slot_id']}")
 
         if errors:
             print("ERRORS (Required images missing):")
@@ -278,6 +534,24 @@ def main():
         action="store_true",
         help="Show what would happen without copying files"
     )
+    parser.add_argument(
+        "--link",
+        choices=LINK_MODES,
+        default="copy",
+        help="How to place files: copy, hard link, reflink (copy-on-write) or move "
+             "(falls back to copy across filesystems; default: copy)"
+    )
+    parser.add_argument(
+        "--io-jobs",
+        type=int,
+        default=IO_JOBS,
+        help=f"Concurrent file placements (default: {IO_JOBS})"
+    )
+    parser.add_argument(
+        "--first",
+        action="store_true",
+        help="Take the first candidate by name per slot (skip quality/duplicate analysis)"
+    )
     parser.add_argument(
         "--validate-only",
         action="store_true",
@@ -286,7 +560,7 @@ def main():
 
     args = parser.parse_args()
 
-    sorter = DeterministicImageSorter()
+    sorter = DeterministicImageSorter(link=args.link, select_best=not args.first, io_jobs=args.io_jobs)
 
     if args.validate_only:
         sorter.validate_placement()
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Image metrics for candidate selection
+Perceptual hash (64-bit dHash), resolution and sharpness for generated
+images, computed once per file content and cached in .build-cache/.
+
+Used by image-sorter.py to collapse near-duplicate generations and pick
+the best candidate for each slot. Near-duplicate search packs each hash
+into one int and only compares hashes that share an 8-bit band (two
+hashes within 7 bits of each other always share one of the 8 bands), so
+thousands of candidates never need an all-pairs comparison.
+
+Requires: pip install Pillow (without it, selection falls back to name order)
+
+Usage:
+    python3 scripts/image_metrics.py IMAGE_DIR   # print metrics and duplicate groups
+"""
+
+import hashlib
+import os
+import pickle
+import sys
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+try:
+    from PIL import Image, ImageFilter, ImageStat
+except ImportError:
+    Image = None
+
+CACHE_DIR = Path(__file__).parent.parent / ".build-cache"
+METRICS_CACHE = "image-metrics.pickle"
+# Bump when metric definitions change so cached values are recomputed
+METRICS_VERSION = 1
+
+HASH_SIZE = 8  # 8x8 gradient bits -> 64-bit hash
+HASH_BANDS = 8
+BAND_BITS = HASH_SIZE * HASH_SIZE // HASH_BANDS
+# Hamming distance at or below which two images count as the same picture
+DUPLICATE_DISTANCE = 6
+# Sharpness is measured on a bounded-size copy so huge PNGs stay cheap
+SHARPNESS_SIZE = 512
+
+# Below this many uncached images a process pool isn't worth starting
+POOL_THRESHOLD = 8
+
+
+def available():
+    return Image is not None
+
+
+def content_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def dhash(gray):
+    """64-bit difference hash of a grayscale image"""
+    small = gray.resize((HASH_SIZE + 1, HASH_SIZE), Image.Resampling.LANCZOS)
+    pixels = small.tobytes()  # one byte per pixel in mode L
+    value = 0
+    for row in range(HASH_SIZE):
+        offset = row * (HASH_SIZE + 1)
+        for col in range(HASH_SIZE):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def compute_metrics(path):
+    """{"width", "height", "dhash", "sharpness"} for one image file"""
+    with Image.open(path) as img:
+        width, height = img.size
+        # JPEG can decode straight to a reduced size
+        img.draft("L", (SHARPNESS_SIZE, SHARPNESS_SIZE))
+        gray = img.convert("L")
+    gray.thumbnail((SHARPNESS_SIZE, SHARPNESS_SIZE))
+    # Edge-response variance: higher means crisper detail
+    sharpness = ImageStat.Stat(gray.filter(ImageFilter.FIND_EDGES)).var[0]
+    return {"width": width, "height": height, "dhash": dhash(gray), "sharpness": round(sharpness, 2)}
+
+
+def _load_cache(cache_path):
+    try:
+        with open(cache_path, "rb") as f:
+            data = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        return {"files": {}, "metrics": {}}
+    if data.get("version") != METRICS_VERSION:
+        return {"files": {}, "metrics": {}}
+    return data["payload"]
+
+
+def _save_cache(cache_path, payload):
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_suffix(".tmp")
+    with open(tmp_path, "wb") as f:
+        pickle.dump({"version": METRICS_VERSION, "payload": payload}, f, pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, cache_path)
+
+
+def load_metrics(paths, cache_dir=CACHE_DIR, jobs=0):
+    """
+    {path: metrics} for every readable image. Metrics are cached by content
+    hash, and the hash by (path, size, mtime), so unchanged files cost one
+    stat(). Unreadable images are left out.
+    """
+    cache_path = Path(cache_dir) / METRICS_CACHE if cache_dir else None
+    cache = _load_cache(cache_path) if cache_path else {"files": {}, "metrics": {}}
+    files, metrics = cache["files"], cache["metrics"]
+
+    results = {}
+    todo = []
+    dirty = False
+    for path in paths:
+        st = os.stat(path)
+        key = str(Path(path).resolve())
+        known = files.get(key)
+        if known and known["size"] == st.st_size and known["mtime_ns"] == st.st_mtime_ns:
+            if known["sha256"] in metrics:
+                results[path] = metrics[known["sha256"]]
+                continue
+        todo.append((path, key, st))
+
+    # New or touched files are hashed; only content never seen is decoded
+    pending = defaultdict(list)
+    for path, key, st in todo:
+        digest = content_digest(path)
+        files[key] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": digest}
+        dirty = True
+        if digest in metrics:
+            results[path] = metrics[digest]
+        else:
+            pending[digest].append(path)
+
+    def record(digest, values):
+        metrics[digest] = values
+        for path in pending[digest]:
+            results[path] = values
+
+    jobs = jobs if jobs > 0 else (os.cpu_count() or 1)
+    if jobs > 1 and len(pending) >= POOL_THRESHOLD:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = {digest: pool.submit(compute_metrics, paths[0]) for digest, paths in pending.items()}
+            for digest, future in futures.items():
+                try:
+                    record(digest, future.result())
+                except (OSError, ValueError):
+                    pass
+    else:
+        for digest, paths in pending.items():
+            try:
+                record(digest, compute_metrics(paths[0]))
+            except (OSError, ValueError):
+                pass
+
+    if cache_path and dirty:
+        _save_cache(cache_path, cache)
+    return results
+
+
+def duplicate_groups(hashes, max_distance=DUPLICATE_DISTANCE):
+    """
+    Group indices whose hashes are within max_distance bits of each other
+    (transitively). Returns a group id per index.
+    """
+    assert max_distance < HASH_BANDS, "band index needs more bands than the max distance"
+    parent = list(range(len(hashes)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    # Identical hashes are joined directly; only distinct ones are banded
+    unique = {}
+    for i, value in enumerate(hashes):
+        if value in unique:
+            parent[i] = unique[value]
+        else:
+            unique[value] = i
+
+    mask = (1 << BAND_BITS) - 1
+    buckets = defaultdict(list)
+    for value, i in unique.items():
+        for band in range(HASH_BANDS):
+            buckets[band, (value >> (band * BAND_BITS)) & mask].append(i)
+
+    for members in buckets.values():
+        for a_pos, a in enumerate(members):
+            for b in members[a_pos + 1:]:
+                root_a, root_b = find(a), find(b)
+                if root_a != root_b and (hashes[a] ^ hashes[b]).bit_count() <= max_distance:
+                    parent[root_b] = root_a
+    return [find(i) for i in range(len(hashes))]
+
+
+def quality_key(path, metrics):
+    """Sort key: most pixels, then sharpest, then name (deterministic)"""
+    return (-metrics["width"] * metrics["height"], -metrics["sharpness"], Path(path).name)
+
+
+def choose_best(candidates, metrics):
+    """
+    Pick the best candidate for one slot.
+    Returns (best, duplicates, alternatives): near-duplicates of any
+    other candidate that lost are duplicates, distinct images that lost
+    are alternatives. Candidates without metrics rank last, by name.
+    """
+    measured = [c for c in candidates if c in metrics]
+    unmeasured = sorted((c for c in candidates if c not in metrics), key=lambda c: Path(c).name)
+    ranked = sorted(measured, key=lambda c: quality_key(c, metrics[c])) + unmeasured
+    best = ranked[0]
+
+    groups = duplicate_groups([metrics[c]["dhash"] for c in measured])
+    group_of = dict(zip(measured, groups))
+    group_sizes = defaultdict(int)
+    for group in groups:
+        group_sizes[group] += 1
+
+    duplicates = [c for c in ranked[1:] if c in group_of and group_sizes[group_of[c]] > 1]
+    alternatives = [c for c in ranked[1:] if c not in duplicates]
+    return best, duplicates, alternatives
+
+
+def main():
+    if not available():
+        print("❌ Pillow not installed. Run: pip install Pillow")
+        sys.exit(1)
+    image_dir = Path(sys.argv[1] if len(sys.argv) > 1 else "images-generated")
+    paths = sorted(p for p in image_dir.iterdir()
+                   if p.suffix.lower() in {".webp", ".png", ".jpg", ".jpeg", ".gif"})
+    metrics = load_metrics(paths)
+    measured = [p for p in paths if p in metrics]
+    groups = duplicate_groups([metrics[p]["dhash"] for p in measured])
+
+    by_group = defaultdict(list)
+    for path, group in zip(measured, groups):
+        by_group[group].append(path)
+    for path in measured:
+        m = metrics[path]
+        print(f"   {path.name:45} {m['width']:5}x{m['height']:<5} sharp {m['sharpness']:8.1f}  {m['dhash']:016x}")
+    for members in by_group.values():
+        if len(members) > 1:
+            print(f"   🔁 near-duplicates: {', '.join(p.name for p in members)}")
+
+
+if __name__ == "__main__":
+    main()
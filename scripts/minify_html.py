@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+HTML Minifier
+Collapses whitespace, drops comments and repeated srcset entries in the
+built page, then writes pre-compressed .gz (and .br, with brotli)
+siblings next to it.
+
+It runs as an html_pipeline.py stage (minify_stage), so the page is read
+in blocks and only an unfinished tag or raw-text element is held back.
+Rules, chosen to never change rendering:
+
+- Text: runs of ASCII whitespace become one space (&nbsp; and U+00A0
+  are untouched). Whitespace-only text between two non-rendered tags
+  (head, meta, link, script, style, ...) is dropped.
+- Comments go, except conditional comments (<!--[if ...]>) and the
+  <!--section:NAME--> markers render_template.py writes, which
+  page_budget.py --strip-markers removes after measuring.
+- <script>/<style>/<textarea> content is copied verbatim, only trimmed
+  for JS/CSS. Inline JSON (application/json, ld+json, importmap) is
+  re-serialized compactly when it parses and contains no "</".
+- <pre> and elements whose inline style sets white-space:pre* keep their
+  whitespace; only their tags are normalized.
+- Tags: attributes are separated by one space, repeated attributes keep
+  the first, class lists are collapsed and void elements lose "/>".
+  An srcset whose candidates all name one file becomes that file (and
+  is dropped on <img> when it equals src), along with its sizes.
+
+Optional: pip install brotli (without it only .gz is written)
+
+Usage:
+    python3 scripts/minify_html.py [index.html] [--out PATH] [--no-compress] [--json]
+"""
+
+import argparse
+import gzip
+import json
+import os
+import re
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+from html_pipeline import SLOT, TEXT, Pipeline, text_tokens
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+READ_BLOCK = 1 << 16
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+# Siblings write_compressed produces with the installed encoders
+COMPRESSED_SUFFIXES = (".gz", ".br") if brotli is not None else (".gz",)
+
+WHITESPACE = re.compile(r"[ \t\n\r\f]+")
+TAG_NAME = re.compile(r"</?([a-zA-Z][\w:.-]*)")
+# A whole tag: quoted attribute values may contain ">"
+TAG_END = re.compile(r"""<[^>"']*(?:(?:"[^"]*"|'[^']*')[^>"']*)*>""")
+ATTR = re.compile(r"""([^\s"'>/=]+)(?:\s*=\s*("[^"]*"|'[^']*'|[^\s"'=<>`]+))?""")
+PRE_STYLE = re.compile(r"white-space\s*:\s*(?:pre|break-spaces)", re.IGNORECASE)
+
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta",
+             "param", "source", "track", "wbr"}
+RAW_TAGS = {"script", "style", "textarea"}
+# Whitespace between two of these never renders
+INVISIBLE_TAGS = {"!doctype", "html", "head", "body", "meta", "link", "title", "base", "script", "style"}
+# Conditional comments, and the section markers page_budget.py reads
+KEPT_COMMENTS = ("<!--[if", "<!--<![endif]", "<!--section:")
+JSON_TYPES = {"application/json", "application/ld+json", "importmap", "speculationrules"}
+CODE_TYPES = {"", "text/javascript", "application/javascript", "module", "text/css"}
+
+
+def _tag_end(text, i):
+    """Index just past the ">" closing the tag at text[i], or -1 if it isn't complete yet"""
+    m = TAG_END.match(text, i)
+    return m.end() if m else -1
+
+
+def _unquote(value):
+    if value and value[0] in "\"'" and value[-1] == value[0]:
+        return value[1:-1]
+    return value or ""
+
+
+def srcset_urls(srcset):
+    return [part.split()[0] for part in srcset.split(",") if part.strip()]
+
+
+def minify_json(text):
+    """Compact JSON text, or None if it doesn't parse or would need escaping"""
+    try:
+        compact = json.dumps(json.loads(text), ensure_ascii=False, separators=(",", ":"))
+    except ValueError:
+        return None
+    return None if "</" in compact else compact
+
+
+class Minifier:
+    """Incremental minifier: feed() text as it arrives, close() at the end"""
+
+    def __init__(self, stats=None):
+        self.stats = stats if stats is not None else Counter()
+        self.pending = ""
+        self.text = ""          # current text node (comments removed)
+        self.last_tag = "!doctype"
+        self.raw = None         # (tag, type) while inside <script>/<style>/<textarea>
+        self.preserve = []      # [tag, depth] while inside whitespace-preserving markup
+
+    def feed(self, data):
+        self.pending += data
+        return self._process(final=False)
+
+    def close(self):
+        out = self._process(final=True)
+        out += self._flush_text(None) + self.pending
+        self.pending = ""
+        return out
+
+    # -- text
+
+    def _flush_text(self, next_tag):
+        text, self.text = self.text, ""
+        if not text or self.preserve:
+            return text
+        if not text.strip(" \t\n\r\f") and self.last_tag in INVISIBLE_TAGS and (
+                next_tag is None or next_tag in INVISIBLE_TAGS):
+            return ""
+        return WHITESPACE.sub(" ", text)
+
+    # -- tags
+
+    def _attributes(self, name, body):
+        attrs, seen = [], set()
+        for m in ATTR.finditer(body):
+            key = m.group(1).lower()
+            if key in seen:
+                continue
+            seen.add(key)
+            attrs.append([key, m.group(1), m.group(2)])
+
+        values = {key: _unquote(value) for key, _, value in attrs}
+        if "srcset" in values:
+            urls = set(srcset_urls(values["srcset"]))
+            if len(urls) == 1 and len(srcset_urls(values["srcset"])) > 1:
+                url = urls.pop()
+                self.stats["srcsets"] += 1
+                if name == "img" and values.get("src") == url:
+                    attrs = [a for a in attrs if a[0] not in ("srcset", "sizes")]
+                else:
+                    attrs = [a for a in attrs if a[0] != "sizes"]
+                    for a in attrs:
+                        if a[0] == "srcset":
+                            a[2] = f'"{url}"'
+        for a in attrs:
+            if a[0] == "class" and a[2] and a[2][0] in "\"'":
+                quote = a[2][0]
+                a[2] = quote + WHITESPACE.sub(" ", values["class"]).strip() + quote
+        return attrs, values
+
+    def _tag(self, tag):
+        """Normalized tag text; updates raw/preserve state"""
+        m = TAG_NAME.match(tag)
+        name = m.group(1).lower()
+        if tag[1] == "/":
+            if self.preserve and name == self.preserve[0]:
+                self.preserve[1] -= 1
+                if not self.preserve[1]:
+                    self.preserve = []
+            return f"</{m.group(1)}>"
+
+        self_closing = tag.endswith("/>")
+        body = tag[m.end():len(tag) - (2 if self_closing else 1)]
+        attrs, values = self._attributes(name, body)
+        out = "<" + m.group(1) + "".join(
+            f" {raw}" if value is None else f" {raw}={value}" for _, raw, value in attrs
+        )
+        if self_closing and name not in VOID_TAGS:
+            out += "/"
+        out += ">"
+
+        if name in RAW_TAGS and not self_closing:
+            self.raw = (name, values.get("type", "").strip().lower())
+        elif self.preserve and name == self.preserve[0] and name not in VOID_TAGS:
+            self.preserve[1] += 1
+        elif not self.preserve and not self_closing and name not in VOID_TAGS and (
+                name == "pre" or PRE_STYLE.search(values.get("style", ""))):
+            self.preserve = [name, 1]
+        return out
+
+    def _raw_content(self, content):
+        name, kind = self.raw
+        if name == "script" and kind in JSON_TYPES:
+            compact = minify_json(content)
+            if compact is not None:
+                self.stats["json"] += 1
+                return compact
+        if name == "textarea" or kind not in CODE_TYPES:
+            return content
+        return content.strip(" \t\n\r\f")
+
+    # -- main loop
+
+    def _process(self, final):
+        out = []
+        text = self.pending
+        i = 0
+        while i < len(text):
+            if self.raw:
+                end = re.compile(rf"</{self.raw[0]}\s*>", re.IGNORECASE).search(text, i)
+                if not end:
+                    break
+                out.append(self._raw_content(text[i:end.start()]))
+                self.raw = None
+                i = end.start()
+                continue
+
+            lt = text.find("<", i)
+            if lt == -1:
+                if final:
+                    self.text += text[i:]
+                    i = len(text)
+                break
+            self.text += text[i:lt]
+            i = lt
+
+            if text.startswith("<!--", i):
+                end = text.find("-->", i + 4)
+                if end == -1:
+                    break
+                comment = text[i:end + 3]
+                if comment.startswith(KEPT_COMMENTS) or self.preserve:
+                    self.text += comment
+                else:
+                    self.stats["comments"] += 1
+                i = end + 3
+                continue
+
+            if not final and len(text) - i < 3:
+                # Not enough yet to tell "</x" from a literal "<"
+                break
+            name = TAG_NAME.match(text, i)
+            if not name and not text.startswith("<!", i):
+                # A literal "<" in text
+                self.text += "<"
+                i += 1
+                continue
+            end = _tag_end(text, i)
+            if end == -1:
+                if not final:
+                    break
+                self.text += text[i:]
+                i = len(text)
+                break
+
+            tag = text[i:end]
+            if name:
+                tag_name = name.group(1).lower()
+                out.append(self._flush_text(tag_name))
+                out.append(self._tag(tag))
+            else:
+                # <!DOCTYPE ...> and other declarations
+                tag_name = "!doctype"
+                out.append(self._flush_text(tag_name))
+                out.append(WHITESPACE.sub(" ", tag))
+            self.last_tag = tag_name
+            i = end
+
+        self.pending = text[i:]
+        return "".join(out)
+
+
+def minify(html, stats=None):
+    """Minified copy of a whole page"""
+    minifier = Minifier(stats)
+    return minifier.feed(html) + minifier.close()
+
+
+def minify_stage(stats):
+    """
+    Pipeline stage form of minify(). Unresolved SLOT tokens are passed on
+    as {{KEY}} text. Counts go to stats ("comments", "srcsets", "json").
+    """
+    def stage(tokens):
+        minifier = Minifier(stats)
+        for kind, value in tokens:
+            out = minifier.feed("{{" + value + "}}" if kind == SLOT else value)
+            if out:
+                yield TEXT, out
+        out = minifier.close()
+        if out:
+            yield TEXT, out
+    return stage
+
+
+def write_compressed(path):
+    """Write <path>.gz (and <path>.br with brotli). Returns {suffix: bytes}."""
+    path = Path(path)
+    data = path.read_bytes()
+    encoded = {".gz": gzip.compress(data, GZIP_LEVEL, mtime=0)}
+    if brotli is not None:
+        encoded[".br"] = brotli.compress(data, quality=BROTLI_QUALITY)
+    sizes = {}
+    for suffix, payload in encoded.items():
+        out_path = path.with_name(path.name + suffix)
+        tmp_path = out_path.with_name(out_path.name + ".tmp")
+        tmp_path.write_bytes(payload)
+        os.replace(tmp_path, out_path)
+        sizes[suffix] = len(payload)
+    return sizes
+
+
+def minify_file(page_path, out_path=None, compress=True):
+    """Minify page_path into out_path (default: in place). Returns the report dict."""
+    start = time.perf_counter()
+    page_path = Path(page_path)
+    out_path = Path(out_path or page_path)
+    before = page_path.stat().st_size
+    stats = Counter()
+    with open(page_path) as f:
+        pipeline = Pipeline().add("minify", minify_stage(stats))
+        html = pipeline.write(pipeline.run(text_tokens(iter(lambda: f.read(READ_BLOCK), ""))), out_path)
+    report = {
+        "page": str(page_path),
+        "output": str(out_path),
+        "bytes": before,
+        "minified_bytes": len(html.encode("utf-8")),
+        "comments": stats["comments"],
+        "srcsets": stats["srcsets"],
+        "json": stats["json"],
+        "compressed": write_compressed(out_path) if compress else {},
+    }
+    report["total_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Minify the built page and pre-compress it")
+    parser.add_argument("page", nargs="?", default="index.html", help="Built page (default: index.html)")
+    parser.add_argument("--out", help="Write here instead of minifying in place")
+    parser.add_argument("--no-compress", action="store_true", help="Don't write .gz/.br siblings")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    page_path = Path(args.page)
+    if not page_path.exists():
+        print(f"❌ Page not found: {page_path}")
+        sys.exit(1)
+
+    report = minify_file(page_path, args.out, compress=not args.no_compress)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    before = report["bytes"]
+    share = 100 * (before - report["minified_bytes"]) / before if before else 0
+    print(f"   {report['output']}: {before / 1024:.1f} KB -> {report['minified_bytes'] / 1024:.1f} KB "
+          f"(-{share:.0f}%) in {report['total_ms']:.0f} ms")
+    print(f"   {report['comments']} comments dropped, {report['srcsets']} repeated srcsets collapsed, "
+          f"{report['json']} JSON blocks compacted")
+    for suffix, size in report["compressed"].items():
+        print(f"   {report['output']}{suffix}: {size / 1024:.1f} KB")
+    if not args.no_compress and brotli is None:
+        print("   ⚠️  brotli not installed; only .gz written. Run: pip install brotli")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+Page Weight Budget Analyzer
+Measures what the built page actually costs and fails when it grows
+past the budgets in page-budget.json.
+
+Reads the page that ships (index.html after pruning, critical CSS and
+minification), split back into sections at the <!--section:NAME-->
+markers render_template.py writes. With --strip-markers the markers
+are removed once the page is measured (and its .gz/.br siblings
+rewritten), so nothing precedes the doctype in the page that ships.
+
+- HTML bytes per section, inline <style>/<script> included (so the
+  inlined critical CSS counts against 01-head.html)
+- Above-the-fold image bytes: eager (non-lazy) <img> files in the
+  sections up to the fold, summed from the files on disk
+- Request counts (images, stylesheets, scripts)
+- Inline <style> rules whose classes/ids appear nowhere in the page, and
+  inline <script> blocks whose selectors match no element
+
+TARGETS are the budgets the page is meant to meet. page-budget.json
+holds ratchets on the way there: each limit is the page's size when it
+was last tightened plus RATCHET_HEADROOM, so the page may not grow, and
+--ratchet lowers the limits whenever the page has shrunk (it never
+raises one). Keys missing from the file (or starting with "_", used for
+notes) fall back to TARGETS.
+
+Usage:
+    python3 scripts/page_budget.py [index.html] [--budgets page-budget.json] [--fold SECTION]
+        [--json] [--no-fail] [--ratchet] [--strip-markers]
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from pathlib import Path
+
+from minify_html import write_compressed
+from prune_css import local_path
+from render_template import BASE_DIR, SECTION_MARKER_RE, strip_section_markers
+
+BUDGET_FILE = "page-budget.json"
+# Where the page should end up: ~150 KB of HTML, no section over 40 KB,
+# a hero that loads in one or two images, and no dead inline code
+TARGETS = {
+    "html_bytes": 150000,
+    "section_bytes": 40000,
+    "above_fold_image_bytes": 250000,
+    "requests": 40,
+    "unused_inline_bytes": 2048,
+}
+RATCHET_HEADROOM = 0.01
+
+# Last section rendered in the first viewport (hero / main product)
+FOLD_SECTION = "05-main-product.html"
+
+IMG_TAG = re.compile(r"<img\b[^>]*>", re.IGNORECASE)
+SRC_ATTR = re.compile(r'\ssrc="([^"]*)"', re.IGNORECASE)
+LAZY_ATTR = re.compile(r'\sloading="lazy"', re.IGNORECASE)
+STYLESHEET = re.compile(r'<link\b[^>]*rel="stylesheet"[^>]*>', re.IGNORECASE)
+HREF_ATTR = re.compile(r'\shref="([^"]*)"', re.IGNORECASE)
+SCRIPT_SRC = re.compile(r'<script\b[^>]*\ssrc="([^"]*)"', re.IGNORECASE)
+INLINE_STYLE = re.compile(r"<style\b[^>]*>(.*?)</style>", re.IGNORECASE | re.DOTALL)
+INLINE_SCRIPT = re.compile(r"<script\b(?![^>]*\ssrc=)[^>]*>(.*?)</script>", re.IGNORECASE | re.DOTALL)
+CSS_COMMENT = re.compile(r"/\*.*?\*/", re.DOTALL)
+# Innermost rules only, so rules nested in @media are seen individually
+CSS_RULE = re.compile(r"([^{}]+)\{([^{}]*)\}")
+CSS_NAMES = re.compile(r"[.#](-?[A-Za-z_][\w-]*)")
+JS_SELECTOR = re.compile(
+    r"""(getElementById|getElementsByClassName|querySelector(?:All)?)\(\s*(['"])(.*?)\2"""
+)
+WORD = re.compile(r"[\w-]+")
+
+
+def page_sections(html, page_name="index.html"):
+    """
+    [(section, html)] of a built page, split at its section markers (each
+    marker counts toward its section). Anything before the first marker,
+    or the whole page if it has none, is attributed to ``page_name``.
+    """
+    starts = [(m.start(), m.group(1)) for m in SECTION_MARKER_RE.finditer(html)]
+    sections = []
+    if not starts or starts[0][0] > 0:
+        sections.append((page_name, html[:starts[0][0] if starts else len(html)]))
+    for i, (start, name) in enumerate(starts):
+        end = starts[i + 1][0] if i + 1 < len(starts) else len(html)
+        sections.append((name, html[start:end]))
+    return sections
+
+
+def file_bytes(url, base_dir, sizes):
+    """Size of a referenced file (0 if missing), stat'ed once per URL"""
+    if url not in sizes:
+        path = local_path(url, base_dir)
+        try:
+            sizes[url] = path.stat().st_size if path else 0
+        except OSError:
+            sizes[url] = 0
+    return sizes[url]
+
+
+def unused_inline_css(html, page_words):
+    """(unused bytes, [selector]) for inline <style> rules matching nothing"""
+    unused_bytes = 0
+    selectors = []
+    for block in INLINE_STYLE.findall(html):
+        for m in CSS_RULE.finditer(CSS_COMMENT.sub("", block)):
+            selector = m.group(1).strip()
+            if selector.startswith("@"):
+                continue
+            # A rule is dead only if every selector in its list names a
+            # class or id that never appears in the page
+            parts = [part for part in selector.split(",") if part.strip()]
+            if parts and all(
+                any(name not in page_words for name in CSS_NAMES.findall(part)) for part in parts
+            ):
+                unused_bytes += len(m.group(0).encode("utf-8"))
+                selectors.append(selector)
+    return unused_bytes, selectors
+
+
+def unused_inline_js(html, dom_words):
+    """[(bytes, [selector])] for inline scripts whose lookups all miss the DOM"""
+    unused = []
+    for block in INLINE_SCRIPT.findall(html):
+        lookups = JS_SELECTOR.findall(block)
+        if not lookups:
+            continue
+        names = []
+        for method, _, selector in lookups:
+            if method in ("getElementById", "getElementsByClassName"):
+                names.append(selector)
+            else:
+                names.extend(CSS_NAMES.findall(selector))
+        if names and all(name not in dom_words for name in names):
+            unused.append((len(block.encode("utf-8")), sorted(set(names))))
+    return unused
+
+
+def analyze(page_path="index.html", base_dir=None, fold_section=FOLD_SECTION):
+    """Measure the built page. Returns the report dict (no budget checks)."""
+    page_path = Path(page_path)
+    base_dir = Path(base_dir) if base_dir else page_path.parent
+    page = page_path.read_text()
+    rendered = page_sections(page, page_path.name)
+    names = [name for name, _ in rendered]
+    fold_index = names.index(fold_section) if fold_section in names else 0
+
+    sizes = {}
+    sections = []
+    above_fold_images = {}
+    requests = set()
+    for i, (name, html) in enumerate(rendered):
+        images = 0
+        for tag in IMG_TAG.findall(html):
+            src = SRC_ATTR.search(tag)
+            if not src or local_path(src.group(1), base_dir) is None:
+                continue
+            requests.add(src.group(1))
+            images += 1
+            # Each file is fetched once however many tags show it
+            if i <= fold_index and not LAZY_ATTR.search(tag) and src.group(1) not in above_fold_images:
+                above_fold_images[src.group(1)] = {
+                    "src": src.group(1),
+                    "section": name,
+                    "bytes": file_bytes(src.group(1), base_dir, sizes),
+                }
+        for tag in STYLESHEET.findall(html):
+            href = HREF_ATTR.search(tag)
+            if href:
+                requests.add(href.group(1))
+        requests.update(SCRIPT_SRC.findall(html))
+
+        sections.append({
+            "section": name,
+            "bytes": len(html.encode("utf-8")),
+            "inline_css_bytes": sum(len(b.encode("utf-8")) for b in INLINE_STYLE.findall(html)),
+            "inline_js_bytes": sum(len(b.encode("utf-8")) for b in INLINE_SCRIPT.findall(html)),
+            "images": images,
+        })
+
+    # Words outside <style> (classes toggled from JS still count as used)
+    page_words = set(WORD.findall(INLINE_STYLE.sub("", page)))
+    dom_words = set(WORD.findall(INLINE_SCRIPT.sub("", INLINE_STYLE.sub("", page))))
+    css_bytes, css_selectors = unused_inline_css(page, page_words)
+    js_unused = unused_inline_js(page, dom_words)
+
+    return {
+        "html_bytes": len(page.encode("utf-8")),
+        "inline_css_bytes": sum(s["inline_css_bytes"] for s in sections),
+        "inline_js_bytes": sum(s["inline_js_bytes"] for s in sections),
+        "sections": sections,
+        "fold_section": names[fold_index] if names else None,
+        "above_fold_images": list(above_fold_images.values()),
+        "above_fold_image_bytes": sum(img["bytes"] for img in above_fold_images.values()),
+        "requests": len(requests),
+        "unused_css_bytes": css_bytes,
+        "unused_css_selectors": css_selectors,
+        "unused_js": [{"bytes": b, "selectors": s} for b, s in js_unused],
+        "unused_inline_bytes": css_bytes + sum(b for b, _ in js_unused),
+    }
+
+
+def load_budgets(budget_path):
+    """Limits from the budget file over TARGETS ("_" keys are notes)"""
+    budgets = dict(TARGETS)
+    if budget_path and Path(budget_path).exists():
+        with open(budget_path) as f:
+            budgets.update((k, v) for k, v in json.load(f).items() if not k.startswith("_"))
+    return budgets
+
+
+def measured(report):
+    """The report's value for each budget key (largest section for section_bytes)"""
+    values = {key: report[key] for key in TARGETS if key in report}
+    values["section_bytes"] = max((s["bytes"] for s in report["sections"]), default=0)
+    return values
+
+
+def ratchet_budgets(budget_path, report):
+    """
+    Lower each limit in the budget file that the page now beats by more
+    than RATCHET_HEADROOM (never below its target). Returns {key: (old, new)}.
+    """
+    budget_path = Path(budget_path)
+    data = json.loads(budget_path.read_text()) if budget_path.exists() else {}
+    lowered = {}
+    for key, value in measured(report).items():
+        limit = data.get(key, TARGETS[key])
+        new = max(int(value * (1 + RATCHET_HEADROOM)), TARGETS[key])
+        if new < limit:
+            data[key] = new
+            lowered[key] = (limit, new)
+    if lowered:
+        tmp_path = budget_path.with_name(budget_path.name + ".tmp")
+        tmp_path.write_text(json.dumps(data, indent=2) + "\n")
+        os.replace(tmp_path, budget_path)
+    return lowered
+
+
+def check_budgets(report, budgets):
+    """[(budget, actual, limit, section)] for every budget that is exceeded"""
+    over = []
+    for key in ("html_bytes", "above_fold_image_bytes", "requests", "unused_inline_bytes"):
+        if key in budgets and report[key] > budgets[key]:
+            over.append((key, report[key], budgets[key], None))
+    if "section_bytes" in budgets:
+        for section in report["sections"]:
+            if section["bytes"] > budgets["section_bytes"]:
+                over.append(("section_bytes", section["bytes"], budgets["section_bytes"], section["section"]))
+    return over
+
+
+def print_report(report, budgets, over):
+    total = report["html_bytes"] or 1
+    print(f"   HTML: {report['html_bytes'] / 1024:.1f} KB (budget {budgets['html_bytes'] / 1024:.0f} KB, "
+          f"target {TARGETS['html_bytes'] / 1024:.0f} KB), "
+          f"including {report['inline_css_bytes'] / 1024:.1f} KB inline CSS "
+          f"and {report['inline_js_bytes'] / 1024:.1f} KB inline JS")
+    print()
+    print(f"   {'Section':32} {'KB':>8} {'share':>6} {'css KB':>7} {'js KB':>6} {'imgs':>5}")
+    for s in sorted(report["sections"], key=lambda s: -s["bytes"]):
+        print(f"   {s['section']:32} {s['bytes'] / 1024:8.1f} {100 * s['bytes'] / total:5.1f}% "
+              f"{s['inline_css_bytes'] / 1024:7.1f} {s['inline_js_bytes'] / 1024:6.1f} {s['images']:5d}")
+    print()
+    print(f"   Above the fold (through {report['fold_section']}): "
+          f"{len(report['above_fold_images'])} eager images, {report['above_fold_image_bytes'] / 1024:.1f} KB")
+    for img in sorted(report["above_fold_images"], key=lambda i: -i["bytes"]):
+        missing = "  (missing)" if not img["bytes"] else ""
+        print(f"      {img['bytes'] / 1024:8.1f} KB  {img['src']}{missing}")
+    print(f"   Requests: {report['requests']}")
+    print(f"   Unused inline CSS: {report['unused_css_bytes'] / 1024:.1f} KB "
+          f"in {len(report['unused_css_selectors'])} rules")
+    for item in report["unused_js"]:
+        print(f"   Unused inline script: {item['bytes'] / 1024:.1f} KB (targets {', '.join(item['selectors'][:5])})")
+
+    print()
+    if over:
+        for key, actual, limit, section in over:
+            where = f" ({section})" if section else ""
+            print(f"   ❌ {key}{where}: {actual:,} > {limit:,}")
+    else:
+        print("   ✅ Within all budgets")
+    behind = [key for key, value in measured(report).items() if value > TARGETS[key]]
+    if behind:
+        print(f"   Still above target: {', '.join(behind)}")
+
+
+def strip_markers(page_path):
+    """
+    Remove the section markers from the page in place, refreshing any
+    .gz/.br siblings the minifier wrote. Returns the bytes removed.
+    """
+    page_path = Path(page_path)
+    html = page_path.read_text()
+    stripped = strip_section_markers(html)
+    if stripped == html:
+        return 0
+    tmp_path = page_path.with_name(page_path.name + ".tmp")
+    tmp_path.write_text(stripped)
+    os.replace(tmp_path, page_path)
+    if page_path.with_name(page_path.name + ".gz").exists():
+        write_compressed(page_path)
+    return len(html.encode("utf-8")) - len(stripped.encode("utf-8"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Page weight budget analyzer")
+    parser.add_argument("page", nargs="?", default="index.html", help="Built page (default: index.html)")
+    parser.add_argument("--budgets", default=str(BASE_DIR / BUDGET_FILE), help=f"Budget file (default: {BUDGET_FILE})")
+    parser.add_argument("--fold", default=FOLD_SECTION, help=f"Last above-the-fold section (default: {FOLD_SECTION})")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    parser.add_argument("--no-fail", action="store_true", help="Report only; exit 0 even if over budget")
+    parser.add_argument("--ratchet", action="store_true",
+                        help="Lower the budget file's limits to the page's size when it has shrunk")
+    parser.add_argument("--strip-markers", action="store_true",
+                        help="Remove the <!--section:NAME--> markers from the page once measured")
+    args = parser.parse_args()
+
+    if not Path(args.page).exists():
+        print(f"❌ Page not found: {args.page}")
+        sys.exit(1)
+
+    report = analyze(args.page, fold_section=args.fold)
+    budgets = load_budgets(args.budgets)
+    over = check_budgets(report, budgets)
+
+    if args.json:
+        report["budgets"] = budgets
+        report["over_budget"] = [
+            {"budget": key, "actual": actual, "limit": limit, "section": section}
+            for key, actual, limit, section in over
+        ]
+        print(json.dumps(report, indent=2))
+    else:
+        print("=" * 60)
+        print("📏 PAGE BUDGET")
+        print("=" * 60)
+        print_report(report, budgets, over)
+
+    if args.strip_markers:
+        removed = strip_markers(args.page)
+        if not args.json:
+            print(f"   Section markers stripped: {removed:,} bytes")
+
+    if over and not args.no_fail:
+        sys.exit(1)
+    if args.ratchet and not over:
+        for key, (old, new) in ratchet_budgets(args.budgets, report).items():
+            print(f"   🔩 {key}: {old:,} -> {new:,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Shared product.config loader
+One tolerant parser for every tool that reads product.config
+(render_variants.py, render_template.py, update_config_from_draft.py and,
+via --shell, build.sh), so they all agree on its contents.
+
+Handles:
+    KEY="double quoted with \\"escaped\\" quotes"
+    KEY='single quoted, taken literally'
+    KEY=unquoted  # trailing comment
+    export KEY="..."
+    KEY="a value that runs
+    over several lines"          -> lines joined with <br>
+    KEY="She said "wow" twice"   -> unescaped inner quotes kept
+
+SCHEMA declares the keys the tools rely on, with their type and whether
+the build needs them. load_config checks every load against it: a
+required key that is empty or still a {{PLACEHOLDER}}, or a typed value
+that does not parse, is listed in config.problems (strict=True raises
+instead). Keys not in SCHEMA are optional text.
+
+Parsed values are cached per file (in memory and in .build-cache/) keyed
+by mtime and size, so repeat loads cost a stat().
+
+Usage:
+    python3 scripts/product_config.py [product.config] [--shell | --json | --get KEY | --check]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import re
+import shlex
+import sys
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.parent
+CACHE_DIR = BASE_DIR / ".build-cache"
+# Bump when parsing rules change so cached results are dropped
+PARSER_VERSION = 1
+
+# Multi-line values are stored on one line in the page
+LINE_JOIN = "<br>"
+
+ASSIGNMENT = re.compile(r"^\s*(?:export\s+)?([A-Za-z_][A-Za-z0-9_]*)=")
+PLACEHOLDER_VALUE = re.compile(r"^\{\{[A-Z0-9_]+\}\}$")
+
+# Backslash escapes bash honours inside double quotes
+DOUBLE_QUOTE_ESCAPES = {'"': '"', "\\": "\\", "$": "$", "`": "`"}
+
+_memo = {}
+
+
+def count(text):
+    """Whole number, thousands separators allowed ("2,847")"""
+    return int(text.replace(",", "").strip())
+
+
+def price(text):
+    """Exact decimal amount without the currency sign ("59", "19.99")"""
+    try:
+        return Decimal(text.strip())
+    except InvalidOperation:
+        raise ValueError(text) from None
+
+
+def json_object(text):
+    value = json.loads(text)
+    if not isinstance(value, dict):
+        raise ValueError(text)
+    return value
+
+
+# KEY -> (type, required). The type converts the raw string; a required
+# key may not be empty or a {{PLACEHOLDER}}.
+SCHEMA = {
+    "PRODUCT_NAME": (str, True),
+    "BRAND_NAME": (str, True),
+    "AUDIENCE": (str, True),
+    "HEADLINE_HOOK": (str, True),
+    "NETLIFY_SITE_ID": (str, True),
+    "GUARANTEE_NAME": (str, True),
+    "GUARANTEE_CONDITION": (str, True),
+    "SINGLE_PRICE": (price, True),
+    "BUNDLE_PRICE": (price, True),
+    "REVIEW_COUNT": (count, True),
+    "BUNDLE_OLD_PRICE": (price, False),
+    "BUNDLE_SAVINGS": (price, False),
+    "ORDER_BUMP_PRICE": (price, False),
+    "PRICE": (price, False),
+    "GUARANTEE_DAYS": (count, False),
+    "COLOR_IMAGE_MAP": (json_object, False),
+}
+REQUIRED = [key for key, (_, required) in SCHEMA.items() if required]
+
+
+class ProductConfig:
+    """Parsed product.config: ordered KEY -> value strings, SCHEMA-typed access and problems"""
+
+    __slots__ = ("path", "mtime_ns", "size", "values", "problems")
+
+    def __init__(self, path, mtime_ns, size, values):
+        self.path = path
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.values = values
+        self.problems = validate(values)
+
+    def __getitem__(self, key):
+        return self.values[key]
+
+    def __contains__(self, key):
+        return key in self.values
+
+    def __iter__(self):
+        return iter(self.values)
+
+    def __len__(self):
+        return len(self.values)
+
+    def get(self, key, default=None):
+        return self.values.get(key, default)
+
+    def items(self):
+        return self.values.items()
+
+    def typed(self, key, default=None):
+        """Value converted by its SCHEMA type; default if missing, a placeholder or invalid"""
+        if self.missing([key]):
+            return default
+        convert = SCHEMA.get(key, (str, False))[0]
+        try:
+            return convert(self.values[key])
+        except ValueError:
+            return default
+
+    def get_int(self, key, default=0):
+        """Integer value (prices, counts); default if missing or not a number"""
+        try:
+            return int(self.values.get(key, "").strip())
+        except ValueError:
+            return default
+
+    def get_list(self, key, sep=","):
+        """Comma-separated value as a list of stripped, non-empty items"""
+        return [item.strip() for item in self.values.get(key, "").split(sep) if item.strip()]
+
+    def missing(self, keys):
+        """Keys that are absent, empty, or still a {{PLACEHOLDER}}"""
+        return [
+            key for key in keys
+            if not self.values.get(key) or PLACEHOLDER_VALUE.match(self.values[key])
+        ]
+
+
+def validate(values):
+    """Messages for SCHEMA violations: missing required keys and values of the wrong type"""
+    problems = []
+    for key, (convert, required) in SCHEMA.items():
+        value = values.get(key, "")
+        if not value or PLACEHOLDER_VALUE.match(value):
+            if required:
+                problems.append(f"{key}: required")
+            continue
+        try:
+            convert(value)
+        except ValueError:
+            problems.append(f"{key}: expected {convert.__name__}, got {value!r}")
+    return problems
+
+
+def _read_quoted(text, pos, quote):
+    """
+    Read a quoted value starting just after the opening quote.
+    Returns (value, end) with end just past the closing quote, or
+    (value, None) if the text ends first. quote=None reads to the end
+    with double-quote escaping.
+    """
+    out = []
+    while pos < len(text):
+        ch = text[pos]
+        if ch == quote:
+            return "".join(out), pos + 1
+        if ch == "\\" and quote != "'" and pos + 1 < len(text):
+            nxt = text[pos + 1]
+            if nxt in DOUBLE_QUOTE_ESCAPES:
+                out.append(DOUBLE_QUOTE_ESCAPES[nxt])
+                pos += 2
+                continue
+        out.append(ch)
+        pos += 1
+    return "".join(out), None
+
+
+def scan_assignments(lines):
+    """
+    Yield (key, value, first_line, last_line) for every assignment.
+    Quoted values that span lines are joined with <br>; lines that are not
+    assignments (comments, blanks, stray text) are skipped.
+    """
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        m = ASSIGNMENT.match(line)
+        if not m or line.lstrip().startswith("#"):
+            i += 1
+            continue
+
+        key = m.group(1)
+        rest = line[m.end():]
+        first = i
+
+        if rest[:1] in ('"', "'"):
+            quote = rest[0]
+            parts = []
+            value, end = _read_quoted(rest, 1, quote)
+            trailing = rest[end:].strip() if end is not None else ""
+            if trailing and not trailing.startswith("#"):
+                # Unescaped quotes inside the value: take up to the last quote
+                value, _ = _read_quoted(rest[1:rest.rindex(quote)], 0, None)
+            parts.append(value)
+            while end is None and i + 1 < len(lines):
+                i += 1
+                value, end = _read_quoted(lines[i], 0, quote)
+                parts.append(value)
+            value = LINE_JOIN.join(part.strip() for part in parts) if len(parts) > 1 else parts[0]
+        else:
+            # Unquoted: stop at an inline comment
+            value = re.split(r"\s+#", rest, maxsplit=1)[0].strip()
+
+        yield key, value, first, i
+        i += 1
+
+
+def parse_text(text):
+    """KEY -> value for a config's text (later assignments win, like bash)"""
+    return {key: value for key, value, _, _ in scan_assignments(text.splitlines())}
+
+
+def _cache_path(path, cache_dir):
+    digest = hashlib.sha256(str(path).encode()).hexdigest()[:16]
+    return Path(cache_dir) / f"config-{digest}.pickle"
+
+
+def load_config(config_path="product.config", cache_dir=CACHE_DIR, strict=False):
+    """
+    Load a config, reusing the parsed result while mtime and size match.
+    Returns an empty ProductConfig if the file does not exist. SCHEMA
+    problems are in config.problems; strict=True raises ValueError on any.
+    """
+    path = Path(config_path).resolve()
+    try:
+        st = path.stat()
+    except OSError:
+        config = ProductConfig(str(path), 0, 0, {})
+    else:
+        config = _load(path, st, cache_dir)
+    if strict and config.problems:
+        raise ValueError(f"{config.path}: " + "; ".join(config.problems))
+    return config
+
+
+def _load(path, st, cache_dir):
+    memo = _memo.get(path)
+    if memo and memo.mtime_ns == st.st_mtime_ns and memo.size == st.st_size:
+        return memo
+
+    cache_path = _cache_path(path, cache_dir) if cache_dir else None
+    values = None
+    if cache_path:
+        try:
+            with open(cache_path, "rb") as f:
+                data = pickle.load(f)
+            if (data.get("version"), data.get("mtime_ns"), data.get("size")) == (
+                PARSER_VERSION, st.st_mtime_ns, st.st_size
+            ):
+                values = data["values"]
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, KeyError):
+            values = None
+
+    if values is None:
+        values = parse_text(path.read_text())
+        if cache_path:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = cache_path.with_suffix(".tmp")
+            with open(tmp_path, "wb") as f:
+                pickle.dump(
+                    {"version": PARSER_VERSION, "mtime_ns": st.st_mtime_ns,
+                     "size": st.st_size, "values": values},
+                    f, pickle.HIGHEST_PROTOCOL,
+                )
+            os.replace(tmp_path, cache_path)
+
+    config = ProductConfig(str(path), st.st_mtime_ns, st.st_size, values)
+    _memo[path] = config
+    return config
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared product.config loader")
+    parser.add_argument("config", nargs="?", default="product.config", help="Config file (default: product.config)")
+    output = parser.add_mutually_exclusive_group()
+    output.add_argument("--shell", action="store_true", help="Print safely quoted KEY=value lines for bash eval")
+    output.add_argument("--json", action="store_true", help="Print all values as JSON")
+    output.add_argument("--get", metavar="KEY", help="Print one value")
+    output.add_argument("--check", action="store_true", help="Validate against SCHEMA; exit 1 on any problem")
+    args = parser.parse_args()
+
+    if not Path(args.config).exists():
+        print(f"❌ Config not found: {args.config}", file=sys.stderr)
+        sys.exit(1)
+
+    config = load_config(args.config)
+
+    if args.check:
+        if config.problems:
+            print(f"❌ {args.config} does not match the schema:")
+            for problem in config.problems:
+                print(f"   {problem}")
+            print("   (Fields still set to {{PLACEHOLDER}} are treated as missing.)")
+            sys.exit(1)
+        print(f"✅ {args.config} matches the schema")
+    elif args.get:
+        if args.get not in config:
+            sys.exit(1)
+        print(config[args.get])
+    elif args.shell:
+        for key, value in config.items():
+            print(f"{key}={shlex.quote(value)}")
+    else:
+        print(json.dumps(config.values, indent=2))
+
+
+if __name__ == "__main__":
+    main()
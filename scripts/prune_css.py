@@ -0,0 +1,639 @@
+#!/usr/bin/env python3
+"""
+Unused CSS Pruner
+Drops the stylesheet rules that match nothing in the built page and
+writes stylesheets/<name>.pruned.css next to each local stylesheet the
+page links.
+
+- Stylesheets are parsed with a small stdlib parser (comments, strings,
+  nested @media/@supports); @font-face and @keyframes are kept only when
+  a surviving rule (or the page) names their font family / animation.
+- The page is parsed once into an element index by class, id and tag.
+  Each selector is checked from its rightmost compound, so only the
+  elements that could match are ever visited.
+- Matching errs on the side of keeping: pseudo-classes and attribute
+  selectors are ignored (JS toggles them), ">" is treated like " " and
+  "+" like "~", and any class/id named in the page's scripts counts as
+  present.
+
+With --rewrite the page's links point at the pruned copies, and links to
+stylesheets with no rules left are removed.
+
+Usage:
+    python3 scripts/prune_css.py [index.html] [--rewrite] [--json]
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from collections import namedtuple
+from html.parser import HTMLParser
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.parent
+PRUNED_SUFFIX = ".pruned.css"
+
+# rule: "a, .b" { body }; at: @name prelude { children (parsed) or body (raw) } or ;
+Rule = namedtuple("Rule", "selectors body")
+AtRule = namedtuple("AtRule", "name prelude body children")
+
+# At-rules whose blocks hold rules rather than declarations
+GROUPING_AT_RULES = {"media", "supports", "document", "-moz-document", "layer", "container", "scope"}
+
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta",
+             "param", "source", "track", "wbr"}
+
+STYLESHEET_LINK = re.compile(r'<link\b[^>]*\brel=["\']?stylesheet["\']?[^>]*>', re.IGNORECASE)
+HREF_ATTR = re.compile(r'(\shref=["\'])([^"\']*)(["\'])', re.IGNORECASE)
+SCRIPT_SRC = re.compile(r'<script\b[^>]*\ssrc=["\']([^"\']*)["\']', re.IGNORECASE)
+WORD = re.compile(r"[\w-]+")
+AT_RULE = re.compile(r"@([\w-]+)(.*)", re.DOTALL)
+COMMENT_OR_STRING = re.compile(r"[\"']|/\*")
+FONT_FAMILY_DECL = re.compile(r"font-family\s*:([^;}]*)", re.IGNORECASE)
+
+
+# ---------------------------------------------------------------- CSS parsing
+
+def _skip_string(text, i):
+    """Index just past the string starting at text[i]"""
+    quote = text[i]
+    i += 1
+    while i < len(text):
+        if text[i] == "\\":
+            i += 2
+            continue
+        if text[i] == quote:
+            return i + 1
+        i += 1
+    return i
+
+
+_SCAN_PATTERNS = {}
+
+
+def _scan_to(text, i, stops):
+    """
+    Index of the first char in ``stops`` at nesting depth 0 from i
+    (strings, comments and ()/[] skipped), or len(text)
+    """
+    pattern = _SCAN_PATTERNS.get(stops)
+    if pattern is None:
+        pattern = _SCAN_PATTERNS[stops] = re.compile(r"[\"'/()\[\]" + re.escape(stops) + "]")
+    depth = 0
+    while True:
+        m = pattern.search(text, i)
+        if not m:
+            return len(text)
+        i = m.start()
+        c = text[i]
+        if c in "\"'":
+            i = _skip_string(text, i)
+            continue
+        if c == "/":
+            if text.startswith("/*", i):
+                end = text.find("*/", i + 2)
+                i = len(text) if end < 0 else end + 2
+                continue
+        elif c in "([":
+            depth += 1
+        elif c in ")]":
+            depth = max(depth - 1, 0)
+        elif depth == 0:
+            return i
+        i += 1
+
+
+def _block_end(text, i):
+    """Index of the "}" closing the block whose "{" is at text[i - 1]"""
+    depth = 1
+    while i < len(text):
+        i = _scan_to(text, i, "{}")
+        if i >= len(text):
+            return i
+        depth += 1 if text[i] == "{" else -1
+        if depth == 0:
+            return i
+        i += 1
+    return i
+
+
+def strip_comments(text):
+    """Remove comments (outside strings); /*! license */ comments are returned separately"""
+    out, kept = [], []
+    i = start = 0
+    while True:
+        m = COMMENT_OR_STRING.search(text, i)
+        if not m:
+            break
+        i = m.start()
+        if text[i] in "\"'":
+            i = _skip_string(text, i)
+            continue
+        end = text.find("*/", i + 2)
+        end = len(text) if end < 0 else end + 2
+        out.append(text[start:i])
+        if text.startswith("/*!", i):
+            kept.append(text[i:end])
+        i = start = end
+    out.append(text[start:])
+    return "".join(out), kept
+
+
+def _at_rule(prelude):
+    """("media", "screen and (...)") for "@media screen and (...)" """
+    m = AT_RULE.match(prelude)
+    return (m.group(1).lower(), m.group(2).strip()) if m else (prelude[1:].lower(), "")
+
+
+def parse_css(text):
+    """[Rule | AtRule] for a stylesheet (comments already stripped)"""
+    nodes = []
+    i = 0
+    while i < len(text):
+        stop = _scan_to(text, i, "{;}")
+        prelude = text[i:stop].strip()
+        if stop >= len(text):
+            break
+        if text[stop] != "{":
+            # Statement at-rule (@import, @charset) or stray ; / }
+            if prelude.startswith("@"):
+                name, rest = _at_rule(prelude)
+                nodes.append(AtRule(name, rest, None, None))
+            i = stop + 1
+            continue
+
+        end = _block_end(text, stop + 1)
+        body = text[stop + 1:end]
+        if prelude.startswith("@"):
+            name, rest = _at_rule(prelude)
+            if name in GROUPING_AT_RULES:
+                nodes.append(AtRule(name, rest, None, parse_css(body)))
+            else:
+                nodes.append(AtRule(name, rest, body.strip(), None))
+        elif prelude:
+            nodes.append(Rule(prelude, body.strip()))
+        i = end + 1
+    return nodes
+
+
+def split_selector_list(selectors):
+    """Top-level comma split (commas inside :is()/attribute values stay)"""
+    parts = []
+    i = 0
+    while i <= len(selectors):
+        stop = _scan_to(selectors, i, ",")
+        part = selectors[i:stop].strip()
+        if part:
+            parts.append(part)
+        i = stop + 1
+    return parts
+
+
+# ------------------------------------------------------------ selector parsing
+
+IDENT_CHAR = re.compile(r"[\w-]|[^\x00-\x7f]")
+Compound = namedtuple("Compound", "tag ids classes")
+
+
+def _read_ident(text, i):
+    """(identifier with CSS escapes resolved, next index)"""
+    out = []
+    while i < len(text):
+        c = text[i]
+        if c == "\\" and i + 1 < len(text):
+            m = re.match(r"[0-9a-fA-F]{1,6} ?", text[i + 1:])
+            if m:
+                out.append(chr(int(m.group(0).strip(), 16)))
+                i += 1 + len(m.group(0))
+            else:
+                out.append(text[i + 1])
+                i += 2
+        elif IDENT_CHAR.match(c):
+            out.append(c)
+            i += 1
+        else:
+            break
+    return "".join(out), i
+
+
+def parse_selector(selector):
+    """
+    [(combinator, Compound)] left to right, combinator being " " (any
+    ancestor) or "~" (any earlier sibling) for all but the first; None if
+    the selector uses syntax this matcher doesn't model (kept as used).
+    """
+    chain = []
+    pending = None  # combinator seen since the last compound
+    compound = None  # [combinator, tag, ids, classes] being read
+
+    def flush():
+        nonlocal compound
+        if compound:
+            combinator, tag, ids, classes = compound
+            chain.append((combinator, Compound(tag, tuple(ids), tuple(classes))))
+        compound = None
+
+    i = 0
+    while i < len(selector):
+        c = selector[i]
+        if c.isspace() or c in ">+~":
+            flush()
+            if c in "+~":
+                pending = "~"
+            elif pending is None:
+                pending = " "
+            i += 1
+            continue
+        if compound is None:
+            compound = [pending if chain else None, None, [], []]
+            pending = None
+        if c == ".":
+            name, i = _read_ident(selector, i + 1)
+            compound[3].append(name)
+        elif c == "#":
+            name, i = _read_ident(selector, i + 1)
+            compound[2].append(name)
+        elif c == "[":
+            # Attribute selectors are not checked: JS flips attributes at runtime
+            i = _scan_to(selector, i + 1, "]") + 1
+        elif c == ":":
+            i += 2 if selector.startswith("::", i) else 1
+            _, i = _read_ident(selector, i)
+            if i < len(selector) and selector[i] == "(":
+                i = _scan_to(selector, i + 1, ")") + 1
+        elif c == "*":
+            i += 1
+        else:
+            name, next_i = _read_ident(selector, i)
+            if next_i == i:
+                # Namespaces, nesting (&) and the like
+                return None
+            compound[1], i = name.lower(), next_i
+    flush()
+    return chain
+
+
+# ------------------------------------------------------------------ DOM index
+
+class DomIndex(HTMLParser):
+    """Elements of a page with parent/previous-sibling links, indexed by class, id and tag"""
+
+    def __init__(self, html=""):
+        super().__init__(convert_charrefs=True)
+        self.tags = []
+        self.ids = []
+        self.classes = []
+        self.parent = []
+        self.prev = []
+        self.by_class = {}
+        self.by_id = {}
+        self.by_tag = {}
+        self._stack = []
+        self._last_child = {}
+        if html:
+            self.feed(html)
+            self.close()
+
+    def handle_starttag(self, tag, attrs):
+        index = len(self.tags)
+        parent = self._stack[-1] if self._stack else -1
+        attrs = dict(attrs)
+        element_id = attrs.get("id") or ""
+        classes = frozenset((attrs.get("class") or "").split())
+        self.tags.append(tag)
+        self.ids.append(element_id)
+        self.classes.append(classes)
+        self.parent.append(parent)
+        self.prev.append(self._last_child.get(parent, -1))
+        self._last_child[parent] = index
+
+        self.by_tag.setdefault(tag, []).append(index)
+        if element_id:
+            self.by_id.setdefault(element_id, []).append(index)
+        for name in classes:
+            self.by_class.setdefault(name, []).append(index)
+        if tag not in VOID_TAGS:
+            self._stack.append(index)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self._stack.pop()
+
+    def handle_endtag(self, tag):
+        # Close up to the matching open element; stray end tags are ignored
+        for depth in range(len(self._stack) - 1, -1, -1):
+            if self.tags[self._stack[depth]] == tag:
+                del self._stack[depth:]
+                return
+
+
+class SelectorMatcher:
+    """Answers "does this selector match anything in the page?" with memoized lookups"""
+
+    def __init__(self, dom, dynamic=()):
+        self.dom = dom
+        # Classes/ids scripts may add at runtime: treated as present everywhere
+        self.dynamic = set(dynamic)
+        self._memo = {}
+        self._sets = {}
+
+    def _has(self, element, compound):
+        dom = self.dom
+        if compound.tag and dom.tags[element] != compound.tag:
+            return False
+        for name in compound.ids:
+            if dom.ids[element] != name and name not in self.dynamic:
+                return False
+        classes = dom.classes[element]
+        return all(name in classes or name in self.dynamic for name in compound.classes)
+
+    def _elements(self, compound):
+        """Set of elements matching a compound, looked up from the narrowest index"""
+        if compound not in self._sets:
+            dom = self.dom
+            lists = [dom.by_id.get(name, ()) for name in compound.ids if name not in self.dynamic]
+            lists += [dom.by_class.get(name, ()) for name in compound.classes if name not in self.dynamic]
+            if compound.tag:
+                lists.append(dom.by_tag.get(compound.tag, ()))
+            candidates = min(lists, key=len) if lists else range(len(dom.tags))
+            self._sets[compound] = frozenset(e for e in candidates if self._has(e, compound))
+        return self._sets[compound]
+
+    def _matches_left(self, chain, sets, k, element):
+        """Does chain[:k] match to the left of ``element`` (which matched chain[k])?"""
+        if k == 0:
+            return True
+        links = self.dom.parent if chain[k][0] == " " else self.dom.prev
+        wanted = sets[k - 1]
+        other = links[element]
+        while other >= 0:
+            if other in wanted and self._matches_left(chain, sets, k - 1, other):
+                return True
+            other = links[other]
+        return False
+
+    def matches(self, selector):
+        if selector in self._memo:
+            return self._memo[selector]
+        chain = parse_selector(selector)
+        if not chain:
+            result = True
+        else:
+            sets = [self._elements(compound) for _, compound in chain]
+            # Most unused selectors name a class that is nowhere in the page
+            result = all(sets) and any(
+                self._matches_left(chain, sets, len(chain) - 1, element) for element in sets[-1]
+            )
+        self._memo[selector] = result
+        return result
+
+
+# ------------------------------------------------------------------- pruning
+
+def font_families(body):
+    """Lower-cased family names declared in an @font-face block"""
+    return {
+        name.strip("'\" ").lower()
+        for value in FONT_FAMILY_DECL.findall(body)
+        for name in value.split(",")
+        if name.strip("'\" ")
+    }
+
+
+def prune_nodes(nodes, matcher, removed):
+    """Kept nodes, with unmatched selectors dropped from each list"""
+    kept = []
+    for node in nodes:
+        if isinstance(node, Rule):
+            selectors = [s for s in split_selector_list(node.selectors) if matcher.matches(s)]
+            if selectors:
+                kept.append(Rule(",".join(selectors), node.body))
+            else:
+                removed.append(node.selectors)
+        elif node.children is not None:
+            children = prune_nodes(node.children, matcher, removed)
+            if children:
+                kept.append(node._replace(children=children))
+        else:
+            kept.append(node)
+    return kept
+
+
+def serialize(nodes):
+    out = []
+    for node in nodes:
+        if isinstance(node, Rule):
+            out.append(f"{node.selectors}{{{node.body}}}")
+            continue
+        head = f"@{node.name} {node.prelude}".rstrip()
+        if node.children is not None:
+            out.append(f"{head}{{{serialize(node.children)}}}")
+        elif node.body is not None:
+            out.append(f"{head}{{{node.body}}}")
+        else:
+            out.append(f"{head};")
+    return "".join(out)
+
+
+def _drop_unreferenced(nodes, referenced, removed):
+    """
+    Remove @keyframes / @font-face whose name appears nowhere in
+    ``referenced`` (kept declarations and page text, lower-cased). A plain
+    substring test, so names used through var() still count.
+    """
+    kept = []
+    for node in nodes:
+        if isinstance(node, AtRule):
+            if node.name.endswith("keyframes") and node.prelude.strip("'\" ").lower() not in referenced:
+                removed.append(f"@{node.name} {node.prelude}")
+                continue
+            if node.name == "font-face":
+                families = font_families(node.body)
+                if families and not any(family in referenced for family in families):
+                    removed.append(f"@font-face {', '.join(sorted(families))}")
+                    continue
+            if node.children is not None:
+                children = _drop_unreferenced(node.children, referenced, removed)
+                if not children:
+                    continue
+                node = node._replace(children=children)
+        kept.append(node)
+    return kept
+
+
+def _declarations(nodes):
+    for node in nodes:
+        if isinstance(node, Rule):
+            yield node.body
+        elif node.children is not None:
+            yield from _declarations(node.children)
+
+
+def prune_stylesheet(css, matcher, page_text="", keep_licenses=True):
+    """
+    (pruned css, [removed selector/at-rule]) for one stylesheet.
+    ``page_text`` (inline styles/scripts) counts as referencing fonts and
+    animations.
+    """
+    text, licenses = strip_comments(css)
+    removed = []
+    kept = prune_nodes(parse_css(text), matcher, removed)
+    referenced = ("\n".join(_declarations(kept)) + "\n" + page_text).lower()
+    kept = _drop_unreferenced(kept, referenced, removed)
+    return "\n".join((licenses if keep_licenses else []) + [serialize(kept)]) + "\n", removed
+
+
+# ---------------------------------------------------------------------- page
+
+def local_path(url, base_dir):
+    """Path on disk for a relative asset URL, or None for remote/data URLs and unresolved {{SLOTS}}"""
+    if not url or url.startswith(("http:", "https:", "//", "data:", "{{")):
+        return None
+    return Path(base_dir) / url.split("?")[0].split("#")[0]
+
+
+def script_text(html, base_dir):
+    """Inline scripts plus every local script file the page loads"""
+    parts = re.findall(r"<script\b[^>]*>(.*?)</script>", html, re.IGNORECASE | re.DOTALL)
+    for src in SCRIPT_SRC.findall(html):
+        path = local_path(src, base_dir)
+        if path and path.is_file():
+            parts.append(path.read_text(errors="replace"))
+    return "\n".join(parts)
+
+
+def linked_stylesheets(html):
+    """hrefs of <link rel=stylesheet> in page order (pruned copies mapped back to sources)"""
+    hrefs = []
+    for tag in STYLESHEET_LINK.findall(html):
+        href = HREF_ATTR.search(tag)
+        if href:
+            url = href.group(2)
+            if url.endswith(PRUNED_SUFFIX):
+                url = url[: -len(PRUNED_SUFFIX)] + ".css"
+            if url not in hrefs:
+                hrefs.append(url)
+    return hrefs
+
+
+def pruned_url(url):
+    return url[: -len(".css")] + PRUNED_SUFFIX if url.endswith(".css") else url + PRUNED_SUFFIX
+
+
+def prune_page(page_path, base_dir=None, extra_stylesheets=()):
+    """
+    Prune every local stylesheet the page links (plus ``extra_stylesheets``,
+    site-relative). Writes the .pruned.css files; returns the report dict.
+    """
+    start = time.perf_counter()
+    page_path = Path(page_path)
+    base_dir = Path(base_dir) if base_dir else page_path.parent
+    html = page_path.read_text()
+
+    dom = DomIndex(html)
+    scripts = script_text(html, base_dir)
+    matcher = SelectorMatcher(dom, WORD.findall(scripts))
+    inline_styles = "\n".join(re.findall(r"<style\b[^>]*>(.*?)</style>", html, re.IGNORECASE | re.DOTALL))
+    page_text = inline_styles + "\n" + "\n".join(re.findall(r'\sstyle="([^"]*)"', html)) + "\n" + scripts
+    index_ms = (time.perf_counter() - start) * 1000
+
+    files = []
+    for url in list(dict.fromkeys(linked_stylesheets(html) + list(extra_stylesheets))):
+        path = local_path(url, base_dir)
+        if path is None or not path.is_file():
+            continue
+        css = path.read_text(errors="replace")
+        pruned, removed = prune_stylesheet(css, matcher, page_text)
+        out_path = local_path(pruned_url(url), base_dir)
+        tmp_path = out_path.with_name(out_path.name + ".tmp")
+        tmp_path.write_text(pruned)
+        os.replace(tmp_path, out_path)
+        before, after = len(css.encode("utf-8")), len(pruned.encode("utf-8"))
+        files.append({
+            "stylesheet": url,
+            "pruned": pruned_url(url),
+            "bytes": before,
+            "pruned_bytes": after,
+            "removed_bytes": before - after,
+            "removed_rules": len(removed),
+            # Nothing but licence comments left: the link can go
+            "empty": not strip_comments(pruned)[0].strip(),
+        })
+
+    return {
+        "page": str(page_path),
+        "elements": len(dom.tags),
+        "files": files,
+        "bytes": sum(f["bytes"] for f in files),
+        "pruned_bytes": sum(f["pruned_bytes"] for f in files),
+        "index_ms": round(index_ms, 1),
+        "total_ms": round((time.perf_counter() - start) * 1000, 1),
+    }
+
+
+def rewrite_links(html, urls, empty=()):
+    """
+    Point <link rel=stylesheet> hrefs in ``urls`` at their pruned copies;
+    links to stylesheets in ``empty`` (nothing left after pruning) are removed.
+    """
+    def replace_tag(match):
+        tag = match.group(0)
+        href = HREF_ATTR.search(tag)
+        if href and href.group(2) in empty:
+            return ""
+        return HREF_ATTR.sub(
+            lambda m: m.group(1) + (pruned_url(m.group(2)) if m.group(2) in urls else m.group(2)) + m.group(3),
+            tag,
+        )
+    return STYLESHEET_LINK.sub(replace_tag, html)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prune unused CSS against the built page")
+    parser.add_argument("page", nargs="?", default="index.html", help="Built page (default: index.html)")
+    parser.add_argument("--stylesheet", action="append", default=[],
+                        help="Also prune this site-relative stylesheet (repeatable)")
+    parser.add_argument("--rewrite", action="store_true", help="Point the page's links at the pruned copies")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    page_path = Path(args.page)
+    if not page_path.exists():
+        print(f"❌ Page not found: {page_path}")
+        sys.exit(1)
+
+    report = prune_page(page_path, extra_stylesheets=args.stylesheet)
+    if args.rewrite:
+        html = page_path.read_text()
+        rewritten = rewrite_links(html, {f["stylesheet"] for f in report["files"]},
+                                  {f["stylesheet"] for f in report["files"] if f["empty"]})
+        if rewritten != html:
+            tmp_path = page_path.with_name(page_path.name + ".tmp")
+            tmp_path.write_text(rewritten)
+            os.replace(tmp_path, page_path)
+        report["rewritten"] = rewritten != html
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"   {report['elements']} elements indexed in {report['index_ms']:.0f} ms")
+    for f in report["files"]:
+        share = 100 * f["removed_bytes"] / f["bytes"] if f["bytes"] else 0
+        print(f"   {f['stylesheet']:45} {f['bytes'] / 1024:7.1f} KB -> {f['pruned_bytes'] / 1024:6.1f} KB "
+              f"(-{share:.0f}%, {f['removed_rules']} rules)")
+    saved = report["bytes"] - report["pruned_bytes"]
+    print(f"   ✅ Removed {saved / 1024:.1f} KB of {report['bytes'] / 1024:.1f} KB in {report['total_ms']:.0f} ms")
+    if args.rewrite and report["rewritten"]:
+        print(f"   Links in {page_path} now point at the {PRUNED_SUFFIX} copies")
+        for f in report["files"]:
+            if f["empty"]:
+                print(f"   Removed the link to {f['stylesheet']} (no rules used)")
+
+
+if __name__ == "__main__":
+    main()
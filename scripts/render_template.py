@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+"""
+Single-Pass Template Renderer
+Builds index.html from sections/*.html + product.config in one pass.
+
+Replaces the per-variable `sed -i` loop in build.sh: the sections are
+concatenated once, split into literal text and {{VAR}} slots, and every
+slot is resolved from the parsed config in a single linear pass. Build
+time no longer grows with the number of variables.
+
+Compiled sections (literal chunks + slots) are cached in
+.build-cache/sections.pickle keyed by each file's mtime, size and hash,
+so a rebuild after a product.config edit only splices in values.
+
+Each build also records which placeholders every section consumes and
+the values it was rendered with. The next build diffs the config against
+that snapshot and re-renders only the sections whose inputs changed.
+
+Each section is opened by a <!--section:NAME--> marker that the
+minifier keeps, so checks on the finished page can attribute bytes to
+sections. page_budget.py --strip-markers removes them once the page is
+measured; they never ship.
+
+The fixups (stray closing tags, {{ VAR }} spacing, substitution and the
+optional responsive srcset rewrite) are html_pipeline.py stages over one
+token stream; each is timed and the page is written once.
+
+Usage:
+    python3 scripts/render_template.py [--config product.config] [--out index.html]
+        [--responsive images/responsive.json] [--strict] [--no-cache] [--timings]
+"""
+
+import argparse
+import hashlib
+import os
+import pickle
+import re
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+from html_pipeline import SLOT, TEXT, Pipeline, chunk_tokens, text_tokens, tokens_to_chunks
+from render_variants import parse_config
+
+BASE_DIR = Path(__file__).parent.parent
+CACHE_DIR = BASE_DIR / ".build-cache"
+COMPILED_CACHE = "sections.pickle"
+# Bump when tokenizing or stray-tag rules change so old caches are dropped
+COMPILER_VERSION = 2
+
+# Page order (Brunson Protocol)
+# Structure: Hero → Bridge → Features → Founder → 3 Secrets → Social Proof → FAQ → Closer → CTA
+SECTIONS = [
+    "01-head.html",
+    "02-body-start.html",
+    "03-header.html",
+    "04-cart-drawer.html",
+    "05-main-product.html",
+    "06-comparison.html",
+    "07-bridge-headline.html",
+    "08-features-3-fibs.html",
+    "08b-interstitial-1.html",
+    "08b-testimonial-strip.html",
+    "09-founder-story.html",
+    "09b-interstitial-2.html",
+    "10-secret-1.html",
+    "11-secret-2.html",
+    "12-secret-3.html",
+    "13-awards-carousel.html",
+    "14-faq.html",
+    "15-custom-reviews.html",
+    "15a-slideshow.html",
+    "15b-custom-html.html",
+    "16-slideshow-2.html",
+    "18-testimonials.html",
+    "19-multirow-2.html",
+    "20-cta-banner.html",
+    "21-pre-footer.html",
+    "22-footer.html",
+    "23-scripts.html",
+]
+
+# Placeholders the template spells differently from product.config
+# (template uses SECRET_HEADLINE_1 vs SECRET_1_HEADLINE). The aliased key
+# wins over a same-named config entry, as it always has in build.sh.
+ALIASES = {
+    "SECRET_HEADLINE_1": "SECRET_1_HEADLINE",
+    "SECRET_HEADLINE_2": "SECRET_2_HEADLINE",
+    "SECRET_HEADLINE_3": "SECRET_3_HEADLINE",
+    "SECRET_HEADING_1": "SECRET_1_HEADLINE",
+    "SECRET_HEADING_2": "SECRET_2_HEADLINE",
+    "SECRET_HEADING_3": "SECRET_3_HEADLINE",
+}
+
+# Opens each section in the page, so tools reading the built index.html
+# (page_budget.py) can attribute its bytes back to sections
+SECTION_MARKER = "<!--section:{}-->"
+SECTION_MARKER_RE = re.compile(r"<!--section:([^>]*?)-->")
+
+# {{VAR}} with optional inner spaces (AI-introduced {{ VAR }} is normalized)
+PLACEHOLDER = re.compile(r"\{\{ *([A-Z0-9_]+) *\}\}")
+
+# Some linters add </html> to 01-head.html and </body> to 02-body-start.html.
+# These break the concatenated document (22/23 close it properly). Both
+# pairs sit inside a single file, so they are stripped per section.
+STRAY_CLOSING_TAGS = [
+    (re.compile(r"</head>\s*</html>"), "</head>"),
+    (re.compile(r"</a>\s*</body>"), "</a>"),
+]
+
+
+def strip_section_markers(html):
+    """
+    The page without its <!--section:NAME--> markers. The first one
+    precedes the doctype, so the whitespace it leaves is dropped too.
+    """
+    return SECTION_MARKER_RE.sub("", html).lstrip()
+
+
+def strip_stray_closing_tags(text):
+    for pattern, replacement in STRAY_CLOSING_TAGS:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+def tokenize(text):
+    """
+    Split a template into alternating chunks.
+    Even indices are literal text, odd indices are placeholder names.
+    """
+    return PLACEHOLDER.split(text)
+
+
+# --- Pipeline stages (see html_pipeline.py) ---
+
+def strip_stray_closing_tags_stage(tokens):
+    """Strip stray tags from each TEXT token (one token per section file)"""
+    for kind, value in tokens:
+        yield kind, (strip_stray_closing_tags(value) if kind == TEXT else value)
+
+
+def split_placeholders_stage(tokens):
+    """Split TEXT tokens into TEXT and SLOT tokens, normalizing {{ VAR }}"""
+    for kind, value in tokens:
+        if kind != TEXT:
+            yield kind, value
+            continue
+        for i, chunk in enumerate(tokenize(value)):
+            if i % 2:
+                yield SLOT, chunk
+            elif chunk:
+                yield TEXT, chunk
+
+
+def substitute_stage(values, unresolved):
+    """
+    Stage resolving SLOT tokens from config values. Missing keys are
+    counted in unresolved and left as SLOT tokens (written as {{KEY}}).
+    """
+    def stage(tokens):
+        resolved_cache = {}
+        for kind, value in tokens:
+            if kind != SLOT:
+                yield kind, value
+                continue
+            if value not in resolved_cache:
+                resolved_cache[value] = resolve(values, value)
+            resolved = resolved_cache[value]
+            if resolved is None:
+                unresolved[value] += 1
+                yield SLOT, value
+            else:
+                yield TEXT, resolved
+    return stage
+
+
+def resolve(values, key):
+    """Config value for a placeholder, or None if missing/empty"""
+    value = values.get(ALIASES[key]) if key in ALIASES else None
+    if not value:
+        value = values.get(key)
+    return value or None
+
+
+def compile_section(text):
+    """Literal/slot chunks for one section"""
+    tokens = split_placeholders_stage(strip_stray_closing_tags_stage(text_tokens([text])))
+    return tokens_to_chunks(tokens)
+
+
+def join_chunks(compiled):
+    """Concatenate per-section chunk lists, merging the literals at each seam"""
+    chunks = [""]
+    for section_chunks in compiled:
+        chunks[-1] += section_chunks[0]
+        chunks.extend(section_chunks[1:])
+    return chunks
+
+
+def join_sections(compiled):
+    """join_chunks over [(name, chunks)], each section opened by its marker"""
+    return join_chunks([SECTION_MARKER.format(name) + chunks[0]] + chunks[1:] for name, chunks in compiled)
+
+
+def _load_cache(cache_path):
+    """Payload of a versioned pickle cache ({} if missing or stale)"""
+    try:
+        with open(cache_path, "rb") as f:
+            data = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        return {}
+    if data.get("version") != COMPILER_VERSION:
+        return {}
+    return data.get("payload", {})
+
+
+def _save_cache(cache_path, payload):
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_suffix(".tmp")
+    with open(tmp_path, "wb") as f:
+        pickle.dump({"version": COMPILER_VERSION, "payload": payload}, f, pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, cache_path)
+
+
+def load_compiled_sections(sections_dir, sections=SECTIONS, cache_dir=CACHE_DIR):
+    """
+    Compiled chunks for each section in page order, via the on-disk cache.
+    A section whose mtime and size are unchanged is not even read; one that
+    was touched but hashes the same skips tokenizing. Pass cache_dir=None
+    to compile everything fresh. Returns ([(name, chunks)], stats).
+    """
+    cache_path = Path(cache_dir) / COMPILED_CACHE if cache_dir else None
+    cached = _load_cache(cache_path) if cache_path else {}
+    compiled = []
+    stats = {"cached": 0, "compiled": 0}
+    dirty = False
+
+    for name in sections:
+        path = Path(sections_dir) / name
+        try:
+            st = path.stat()
+        except OSError:
+            print(f"   ⚠️  Section not found (skipped): {path}")
+            continue
+
+        key = str(path.resolve())
+        entry = cached.get(key)
+        if not (entry and entry["mtime_ns"] == st.st_mtime_ns and entry["size"] == st.st_size):
+            data = path.read_bytes()
+            digest = hashlib.sha256(data).hexdigest()
+            dirty = True
+            if entry and entry["sha256"] == digest:
+                entry = {**entry, "mtime_ns": st.st_mtime_ns, "size": st.st_size}
+                stats["cached"] += 1
+            else:
+                entry = {
+                    "mtime_ns": st.st_mtime_ns,
+                    "size": st.st_size,
+                    "sha256": digest,
+                    "chunks": compile_section(data.decode("utf-8")),
+                }
+                stats["compiled"] += 1
+            # Entries for other section dirs are kept (batch builds share the cache)
+            cached[key] = entry
+        else:
+            stats["cached"] += 1
+
+        compiled.append((name, entry["chunks"]))
+
+    if cache_path and dirty:
+        _save_cache(cache_path, cached)
+    return compiled, stats
+
+
+def render(chunks, values):
+    """
+    Resolve every slot in one pass.
+    Returns (html, unresolved) where unresolved counts each missing key;
+    unresolved slots are left as {{KEY}} so validators still catch them.
+    """
+    unresolved = Counter()
+    tokens = substitute_stage(values, unresolved)(chunk_tokens(chunks))
+    return Pipeline.write(tokens, None), unresolved
+
+
+def _snapshot_path(cache_dir, out_path):
+    digest = hashlib.sha256(str(Path(out_path).resolve()).encode()).hexdigest()[:16]
+    return Path(cache_dir) / f"render-{digest}.pickle"
+
+
+def render_page_incremental(config_path, out_path, sections_dir=BASE_DIR / "sections",
+                            cache_dir=CACHE_DIR, stages=(), write=False):
+    """
+    Render the page, re-rendering only sections whose inputs changed.
+    A section is reused from the last build's snapshot when its compiled
+    chunks are identical and none of the placeholders it consumes resolve
+    to a different value. The assembled sections then stream through the
+    extra (name, stage) pairs, and are written to out_path if write is set.
+    Returns (html, unresolved, slot_count, stats).
+    """
+    values = parse_config(str(config_path))
+    compiled, stats = load_compiled_sections(sections_dir, cache_dir=cache_dir)
+
+    snapshot_path = _snapshot_path(cache_dir, out_path)
+    previous = _load_cache(snapshot_path)
+    previous_sections = previous.get("sections", {})
+    previous_values = previous.get("values", {})
+
+    # Resolve every key any section consumes once, then diff against the snapshot
+    keys = set()
+    for _, chunks in compiled:
+        keys.update(chunks[1::2])
+    resolved = {key: resolve(values, key) for key in keys}
+    changed = {
+        key for key, value in resolved.items()
+        if key not in previous_values or previous_values[key] != value
+    }
+
+    sections = {}
+    parts = []
+    unresolved = Counter()
+    slots = 0
+    stats.update(rerendered=0, reused=0, changed_keys=len(changed))
+
+    for name, chunks in compiled:
+        prev = previous_sections.get(name)
+        section_keys = set(chunks[1::2])
+        if prev and prev["chunks"] == chunks and not (section_keys & changed):
+            html, section_unresolved = prev["html"], prev["unresolved"]
+            stats["reused"] += 1
+        else:
+            html, section_unresolved = render(chunks, values)
+            stats["rerendered"] += 1
+        sections[name] = {"chunks": chunks, "html": html, "unresolved": section_unresolved}
+        parts.append(SECTION_MARKER.format(name) + html)
+        unresolved.update(section_unresolved)
+        slots += len(chunks) // 2
+
+    _save_cache(snapshot_path, {"values": resolved, "sections": sections})
+
+    pipeline = Pipeline()
+    for name, stage in stages:
+        pipeline.add(name, stage)
+    html = pipeline.write(pipeline.run(text_tokens(parts), source="sections"), out_path if write else None)
+    stats["timings"] = pipeline.timings(source="sections")
+    return html, unresolved, slots, stats
+
+
+def render_page(config_path, sections_dir=BASE_DIR / "sections", cache_dir=CACHE_DIR,
+                stages=(), out_path=None):
+    """
+    Render the full page: compiled sections -> substitute -> extra stages,
+    written to out_path if given. Returns (html, unresolved, slot_count, stats)
+    """
+    values = parse_config(str(config_path))
+    compiled, stats = load_compiled_sections(sections_dir, cache_dir=cache_dir)
+    chunks = join_sections(compiled)
+
+    unresolved = Counter()
+    pipeline = Pipeline().add("substitute", substitute_stage(values, unresolved))
+    for name, stage in stages:
+        pipeline.add(name, stage)
+    html = pipeline.write(pipeline.run(chunk_tokens(chunks), source="sections"), out_path)
+    stats["timings"] = pipeline.timings(source="sections")
+    return html, unresolved, len(chunks) // 2, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Single-pass landing page renderer")
+    parser.add_argument("--config", default="product.config", help="Config file (default: product.config)")
+    parser.add_argument("--sections", default=str(BASE_DIR / "sections"), help="Sections directory")
+    parser.add_argument("--out", default="index.html", help="Output file (default: index.html)")
+    parser.add_argument("--responsive", metavar="MANIFEST", help="Rewrite srcsets from a responsive.json manifest")
+    parser.add_argument("--strict", action="store_true", help="Exit 1 if any placeholder is unresolved")
+    parser.add_argument("--no-cache", action="store_true", help="Recompile every section (ignore .build-cache/)")
+    parser.add_argument("--timings", action="store_true", help="Print the time spent in each pipeline stage")
+    args = parser.parse_args()
+
+    if not Path(args.config).exists():
+        print(f"❌ Config not found: {args.config}")
+        sys.exit(1)
+
+    stages = []
+    responsive = Counter()
+    if args.responsive:
+        if Path(args.responsive).exists():
+            from apply_responsive import load_manifest, responsive_stage
+            stages.append(("responsive", responsive_stage(load_manifest(args.responsive), responsive)))
+        else:
+            print(f"   ⚠️  {args.responsive} not found - srcsets left as authored")
+
+    start = time.perf_counter()
+    if args.no_cache:
+        html, unresolved, slots, stats = render_page(args.config, args.sections, cache_dir=None,
+                                                     stages=stages, out_path=args.out)
+    else:
+        html, unresolved, slots, stats = render_page_incremental(args.config, args.out, args.sections,
+                                                                 stages=stages, write=True)
+    elapsed = (time.perf_counter() - start) * 1000
+
+    print(f"   ✅ Rendered {args.out}: {slots} placeholders in {elapsed:.0f} ms "
+          f"({stats['cached']} sections cached, {stats['compiled']} compiled)")
+    if "rerendered" in stats:
+        print(f"      {stats['changed_keys']} config values changed → "
+              f"{stats['rerendered']} sections re-rendered, {stats['reused']} reused")
+    if args.responsive and stages:
+        print(f"   ✅ Responsive srcset written for {responsive['images']} images")
+    if args.timings:
+        for name, ms in stats["timings"].items():
+            print(f"      {name:12} {ms:7.2f} ms")
+
+    if unresolved:
+        print(f"   ⚠️  {len(unresolved)} keys unresolved ({sum(unresolved.values())} occurrences):")
+        for key, count in unresolved.most_common():
+            print(f"      {count:4d}  {{{{{key}}}}}")
+        if args.strict:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
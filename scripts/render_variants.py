@@ -1,21 +1,8 @@
-import os
+from product_config import load_config
 
 def parse_config(config_path):
-    config = {}
-    if not os.path.exists(config_path):
-        return config
-    
-    with open(config_path, 'r') as f:
-        for line in f:
-            line = line.strip()
-            if not line or line.startswith('#'):
-                continue
-            if '=' in line:
-                key, value = line.split('=', 1)
-                # Strip quotes if present
-                value = value.strip('"').strip("'")
-                config[key.strip()] = value
-    return config
+    """KEY -> value dict for a config file (empty if it doesn't exist)"""
+    return dict(load_config(config_path).values)
 
 def generate_size_options(sizes_str, sold_out_str):
     if not sizes_str:
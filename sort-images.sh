@@ -6,11 +6,8 @@
 set -e
 
 SOURCE_DIR="${1:-images-generated}"
-DRY_RUN=""
-
-if [ "$2" = "--dry-run" ]; then
-    DRY_RUN="--dry-run"
-fi
+# Remaining arguments (--dry-run, --link=hard|reflink|copy|move) go to the sorter
+shift || true
 
 echo "═══════════════════════════════════════════════════════════"
 echo "  IMAGE SORTER - YES-Clean-Jarvis-Template"
@@ -19,7 +16,7 @@ echo "   Source: ${SOURCE_DIR}"
 echo "   Target: Template image folders"
 echo ""
 
-python3 scripts/image-sorter.py "${SOURCE_DIR}" ${DRY_RUN}
+python3 scripts/image-sorter.py "${SOURCE_DIR}" "$@"
 
 echo ""
 echo "✅ Image sorting complete!"
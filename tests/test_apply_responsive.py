@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Tests for scripts/apply_responsive.py
+Run with: python3 -m pytest tests/test_apply_responsive.py -v
+"""
+
+import os
+import sys
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+from apply_responsive import apply_responsive, responsive_stage
+from html_pipeline import SLOT, Pipeline, text_tokens
+
+MANIFEST = {
+    "images/product/product-01.webp": [
+        {"src": "images/product/product-01-246w.webp", "width": 246},
+        {"src": "images/product/product-01.webp", "width": 1024},
+    ]
+}
+
+
+def test_placeholder_srcset_is_replaced():
+    """A srcset that only repeats src gets the real ladder; sizes is kept."""
+    html = ('<img src="images/product/product-01.webp" '
+            'srcset="images/product/product-01.webp 246w, images/product/product-01.webp 1946w" '
+            'sizes="50vw">')
+    out, count = apply_responsive(html, MANIFEST)
+    assert count == 1
+    assert 'srcset="images/product/product-01-246w.webp 246w, images/product/product-01.webp 1024w"' in out
+    assert 'sizes="50vw"' in out
+
+
+def test_authored_srcset_is_left_alone():
+    """Hand-written srcsets and images without variants are untouched."""
+    html = ('<img src="images/product/product-01.webp" srcset="a.webp 1x, b.webp 2x">'
+            '<img src="images/other.webp" srcset="images/other.webp 246w">')
+    out, count = apply_responsive(html, MANIFEST)
+    assert count == 0 and out == html
+
+
+def test_missing_sizes_gets_default():
+    html = '<img src="images/product/product-01.webp" srcset="images/product/product-01.webp 600w" />'
+    out, _ = apply_responsive(html, MANIFEST)
+    assert out.endswith(' sizes="100vw">')
+
+
+def test_stage_matches_whole_document_rewrite():
+    """Tags split across tokens are rewritten the same as in one pass."""
+    html = ('<p>intro</p><img src="images/product/product-01.webp" '
+            'srcset="images/product/product-01.webp 246w" alt="a">'
+            '<img src="other.webp" srcset="other.webp 1w">') * 3
+    expected, count = apply_responsive(html, MANIFEST)
+    counts = Counter()
+    tokens = text_tokens(html[i:i + 5] for i in range(0, len(html), 5))
+    assert Pipeline.write(responsive_stage(MANIFEST, counts)(tokens), None) == expected
+    assert counts["images"] == count == 3
+
+
+def test_stage_keeps_unresolved_slots_visible():
+    counts = Counter()
+    tokens = [("text", "<h1>"), (SLOT, "MISSING"), ("text", "</h1>")]
+    assert Pipeline.write(responsive_stage(MANIFEST, counts)(tokens), None) == "<h1>{{MISSING}}</h1>"
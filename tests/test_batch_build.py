@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Tests for scripts/batch_build.py
+Run with: python3 -m pytest tests/test_batch_build.py -v
+"""
+
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+import batch_build
+from batch_build import find_configs, link_file, product_images
+
+COLOR_MAP = '{"washed-indigo": "images/product/a.webp", "faded-black": "images/product/b.webp"}'
+
+
+def test_find_configs_accepts_both_layouts():
+    """<sku>.config and <sku>/product.config; a product.config directory wins a name clash."""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        (root / "jeans.config").write_text("")
+        (root / "jacket").mkdir()
+        (root / "jacket" / "product.config").write_text("")
+        (root / "shirt.config").write_text("")
+        (root / "shirt").mkdir()
+        (root / "shirt" / "product.config").write_text("")
+        (root / "notes").mkdir()
+        (root / "notes" / "other.config").write_text("")
+
+        configs = find_configs(root)
+        assert [name for name, _ in configs] == ["jacket", "jeans", "shirt"]
+        assert dict(configs)["jacket"] == root / "jacket" / "product.config"
+        assert dict(configs)["shirt"] == root / "shirt" / "product.config"
+
+
+def test_link_file_falls_back_to_copy(monkeypatch):
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        source = root / "a.css"
+        source.write_text("a{}")
+        target = root / "out" / "stylesheets" / "a.css"
+        assert link_file(source, target) == "linked"
+        assert target.samefile(source)
+
+        def no_links(source, target):
+            raise OSError("cross-device link")
+
+        monkeypatch.setattr(batch_build.os, "link", no_links)
+        assert link_file(source, target) == "copied"
+        assert target.read_text() == "a{}" and not target.samefile(source)
+
+
+def test_product_images_include_variants_and_json_values():
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        (root / "images" / "product").mkdir(parents=True)
+        for name in ("hero.webp", "hero-246w.webp", "a.webp", "b.webp"):
+            (root / "images" / "product" / name).write_bytes(b"x")
+        manifest = {"images/product/hero.webp": [
+            {"src": "images/product/hero-246w.webp", "width": 246},
+            {"src": "images/product/hero-493w.webp", "width": 493},  # not on disk
+        ]}
+        values = {
+            "HERO_IMAGE": "images/product/hero.webp",
+            "COLOR_IMAGE_MAP": COLOR_MAP,
+            "MISSING_IMAGE": "images/product/missing.webp",
+            "CTA_URL": "https://example.com/images/product/a.webp",
+        }
+        assert product_images(values, manifest, root) == [
+            Path("images/product/a.webp"), Path("images/product/b.webp"),
+            Path("images/product/hero-246w.webp"), Path("images/product/hero.webp"),
+        ]
+
+
+def test_batch_builds_every_product(monkeypatch):
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        sections = root / "sections"
+        sections.mkdir()
+        (sections / "01-head.html").write_text("<html><head><title>{{PRODUCT_NAME}}</title></head>")
+        (sections / "05-main-product.html").write_text(
+            '<body><img src="{{PRODUCT_IMAGE_1}}" alt="{{PRODUCT_NAME}}"></body></html>'
+        )
+        configs = root / "configs"
+        (configs / "jacket").mkdir(parents=True)
+        (configs / "jeans.config").write_text(
+            'PRODUCT_NAME="Jeans"\nPRODUCT_IMAGE_1="images/product/product-01.webp"\n'
+        )
+        (configs / "jacket" / "product.config").write_text(
+            'PRODUCT_NAME="Jacket"\nPRODUCT_IMAGE_1="images/product/product-02.webp"\n'
+        )
+        out = root / "dist"
+
+        monkeypatch.setattr(batch_build, "CACHE_DIR", root / "cache")
+        monkeypatch.setattr(sys, "argv", ["batch_build.py", str(configs), "--out", str(out),
+                                          "--sections", str(sections), "--jobs", "1", "--no-critical"])
+        with pytest.raises(SystemExit) as exit_info:
+            batch_build.main()
+        assert exit_info.value.code == 0
+
+        jeans = (out / "jeans" / "index.html").read_text()
+        assert "<title>Jeans</title>" in jeans and 'src="images/product/product-01.webp"' in jeans
+        assert jeans.startswith("<html>") and "<!--section:" not in jeans
+        assert "<title>Jacket</title>" in (out / "jacket" / "index.html").read_text()
+        assert (out / "jeans" / "index.html.gz").exists()
+        assert (out / "jeans" / "images" / "product" / "product-01.webp").exists()
+        assert not (out / "jeans" / "images" / "product" / "product-02.webp").exists()
+        assert (out / "jacket" / "stylesheets").is_dir()
+
+        report = json.loads((out / "batch-report.json").read_text())
+        assert report["products"] == 2 and report["failed"] == 0
+        assert [r["product"] for r in report["results"]] == ["jacket", "jeans"]
+        assert all(r["unresolved"] == {} for r in report["results"])
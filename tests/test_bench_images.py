@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Tests for scripts/bench_images.py
+Run with: python3 -m pytest tests/test_bench_images.py -v
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+import bench_images
+from bench_images import compare, corpus_spec, ensure_corpus, find_baseline, run_benchmark
+
+
+def test_corpus_is_deterministic_and_mirrors_folders():
+    spec = corpus_spec(min_size=48, max_size=96)
+    assert spec == corpus_spec(min_size=48, max_size=96)
+    assert len(spec) == sum(c["count"] for c in bench_images.optimize_images.FOLDERS.values())
+    assert all(48 <= side <= 96 for entry in spec for side in entry["size"])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        first = ensure_corpus(Path(tmp) / "a", spec[:3])
+        second = ensure_corpus(Path(tmp) / "b", spec[:3])
+        for (_, a), (_, b) in zip(first, second):
+            assert a.read_bytes() == b.read_bytes()
+        # An up-to-date corpus is reused, not rewritten
+        mtime = first[0][1].stat().st_mtime_ns
+        ensure_corpus(Path(tmp) / "a", spec[:3])
+        assert first[0][1].stat().st_mtime_ns == mtime
+
+
+def test_run_records_every_stage():
+    with tempfile.TemporaryDirectory() as tmp:
+        spec = corpus_spec(min_size=48, max_size=64)[:4]
+        result = run_benchmark(Path(tmp) / "corpus", repeat=1, spec=spec)
+        assert result["images"] == 4
+        assert set(result["stages_ms"]) == set(bench_images.STAGES)
+        assert result["peak_rss_mb"]["optimize"] > 0
+
+
+def test_compare_flags_only_real_regressions():
+    base = {"stages_ms": {"decode": 100.0, "resize": 2.0, "encode": 500.0, "sort": 50.0},
+            "peak_rss_mb": {"optimize": 100.0, "sort": 40.0}}
+    head = {"stages_ms": {"decode": 130.0, "resize": 4.0, "encode": 505.0, "sort": 50.0},
+            "peak_rss_mb": {"optimize": 150.0, "sort": 40.0}}
+    flagged = [name for name, _, _, _, regressed in compare(base, head) if regressed]
+    # resize doubled but by less than the noise floor
+    assert flagged == ["decode ms", "optimize peak MB"]
+
+    history = [dict(base, label="main"), dict(base, label=None), head]
+    assert find_baseline(history)["label"] is None
+    assert find_baseline(history, "main")["label"] == "main"
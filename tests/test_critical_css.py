@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Tests for scripts/critical_css.py
+Run with: python3 -m pytest tests/test_critical_css.py -v
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+from critical_css import (
+    CRITICAL_MAX_BYTES, VisibleDomIndex, critical_css, first_round_trip_bytes, inline_critical,
+    local_stylesheets, rebase_urls,
+)
+from render_template import BASE_DIR, render_page
+from render_variants import parse_config
+
+LINK = '<link href="stylesheets/base.css" rel="stylesheet" media="all" />'
+HEAD = f"<html><head>{LINK}</head><body>"
+HERO = '<section class="hero"><h1 class="hero__title">{{TITLE}}</h1></section>'
+BELOW = '<section class="reviews"><p class="review">Great</p></section></body></html>'
+NAMES = ["01-head.html", "05-main-product.html", "10-reviews.html"]
+CSS = (
+    "@font-face{font-family:Brand;src:url(../fonts/brand.woff2)}"
+    ".hero__title{font-family:Brand}"
+    ".review{color:red}"
+    "@media (min-width:750px){.hero{padding:4rem}.reviews{padding:2rem}}"
+)
+
+
+def make_site(tmp):
+    root = Path(tmp)
+    sections = root / "sections"
+    sections.mkdir()
+    for name, text in zip(NAMES, (HEAD, HERO, BELOW)):
+        (sections / name).write_text(text)
+    (root / "stylesheets").mkdir()
+    (root / "stylesheets" / "base.css").write_text(CSS)
+    return root, sections
+
+
+def test_extracts_above_the_fold_rules_and_caches():
+    with tempfile.TemporaryDirectory() as tmp:
+        root, sections = make_site(tmp)
+        cache = root / "cache"
+
+        def extract():
+            return critical_css(["stylesheets/base.css"], sections, base_dir=root, cache_dir=cache,
+                                section_names=NAMES)
+
+        css, cached = extract()
+        assert not cached
+        assert ".hero__title{font-family:Brand}" in css
+        assert "@media (min-width:750px){.hero{padding:4rem}}" in css
+        assert 'url("fonts/brand.woff2")' in css
+        assert ".review" not in css
+
+        again, cached = extract()
+        assert cached and again == css
+
+        # Any stylesheet change is a new cache key
+        (root / "stylesheets" / "base.css").write_text(CSS + ".hero{margin:0}")
+        css, cached = extract()
+        assert not cached and ".hero{margin:0}" in css
+
+
+def test_hidden_sections_and_state_rules_left_out():
+    """The closed cart drawer and :hover/:focus rules aren't needed for first paint."""
+    names = ["01-head.html", "04-cart-drawer.html", "05-main-product.html"]
+    with tempfile.TemporaryDirectory() as tmp:
+        root, sections = make_site(tmp)
+        (sections / names[1]).write_text('<aside class="cart-drawer"><p class="cart-drawer__empty">Empty</p></aside>')
+        (sections / names[2]).write_text(HERO)
+        (root / "stylesheets" / "base.css").write_text(
+            ".hero{color:red}.hero:hover{color:blue}.hero__title:focus-visible,.hero__title{margin:0}"
+            ".cart-drawer{position:fixed}"
+        )
+        css, _ = critical_css(["stylesheets/base.css"], sections, base_dir=root, cache_dir=None,
+                              section_names=names)
+        assert ".hero{color:red}" in css
+        assert ".hero__title{margin:0}" in css
+        assert ":hover" not in css and ":focus" not in css
+        assert ".cart-drawer" not in css
+
+        css, _ = critical_css(["stylesheets/base.css"], sections, base_dir=root, cache_dir=None,
+                              section_names=names, skip=())
+        assert ".cart-drawer{position:fixed}" in css
+
+
+def test_hidden_subtrees_are_not_indexed():
+    dom = VisibleDomIndex(
+        '<details><summary class="toggle">Menu</summary><nav class="drawer"><a class="link">x</a></nav></details>'
+        '<details open><summary>FAQ</summary><p class="answer">y</p></details>'
+        '<div hidden><p class="error">e</p></div><p class="note" style="display: none">n</p>'
+        '<template><p class="row"></p></template><img class="after"/><p class="lead">z</p>'
+    )
+    assert {"toggle", "answer", "after", "lead"} <= set(dom.by_class)
+    assert not {"drawer", "link", "error", "note", "row"} & set(dom.by_class)
+    assert dom.parent[dom.by_class["lead"][0]] == -1  # skipped subtrees closed properly
+
+
+def test_config_markup_is_matched():
+    """Markup a slot injects from the config (swatches, size options) counts as above the fold."""
+    with tempfile.TemporaryDirectory() as tmp:
+        root, sections = make_site(tmp)
+        (sections / NAMES[1]).write_text(HERO + "{{COLOR_UI_HTML}}")
+        (root / "stylesheets" / "base.css").write_text(".hero{color:red}.color-btn{width:2rem}")
+
+        def extract(values):
+            return critical_css(["stylesheets/base.css"], sections, base_dir=root, cache_dir=root / "cache",
+                                section_names=NAMES, values=values)[0]
+
+        assert ".color-btn" not in extract({})
+        assert ".color-btn{width:2rem}" in extract({"COLOR_UI_HTML": '<button class="color-btn"></button>'})
+
+
+def test_real_page_fits_the_first_round_trip():
+    """The shipped sections and config, extracted as build.sh does, get inlined."""
+    html = render_page(BASE_DIR / "product.config", cache_dir=None)[0]
+    urls = local_stylesheets(html)
+    css, _ = critical_css(urls, cache_dir=None, values=parse_config(BASE_DIR / "product.config"))
+    assert first_round_trip_bytes(inline_critical(html, css, set(urls))) <= CRITICAL_MAX_BYTES
+    assert ".product__title" in css and ".header__heading-link" in css
+    for hidden in (".cart-drawer", ".menu-drawer", ".search-modal", ".product-media-modal", "aria-expanded"):
+        assert hidden not in css
+
+
+def test_inline_defers_links_once():
+    html = HEAD + HERO + BELOW
+    urls = {"stylesheets/base.css"}
+    out = inline_critical(html, ".hero{padding:4rem}", urls)
+    assert out.count('<style id="critical-css">.hero{padding:4rem}</style>') == 1
+    assert ('<link href="stylesheets/base.css" rel="stylesheet" media="print" '
+            'onload="this.media=\'all\'" />') in out
+    assert f"<noscript>{LINK}</noscript>" in out
+    assert inline_critical(out, "x", urls) == out
+
+
+def test_rebase_and_local_stylesheets():
+    assert rebase_urls("a{b:url('../img/x.png')}", "stylesheets/base.css") == 'a{b:url("img/x.png")}'
+    assert rebase_urls("a{b:url(data:image/png;base64,AA)}", "stylesheets/a.css") == "a{b:url(data:image/png;base64,AA)}"
+    with tempfile.TemporaryDirectory() as tmp:
+        root, _ = make_site(tmp)
+        html = HEAD + '<link rel="stylesheet" href="https://cdn.example.com/x.css">'
+        assert local_stylesheets(html, root) == ["stylesheets/base.css"]
+        (root / "stylesheets" / "print.css").write_text("a{color:#000}")
+        html += '<link rel="stylesheet" href="stylesheets/print.css" media="print">'
+        assert local_stylesheets(html, root) == ["stylesheets/base.css"]
+
+
+def test_inline_keeps_media_specific_links():
+    """Deferring swaps media to 'all' on load, so a print-only link must stay as it is."""
+    link = '<link rel="stylesheet" href="stylesheets/print.css" media="print">'
+    out = inline_critical(HEAD + link + HERO, "x", {"stylesheets/base.css", "stylesheets/print.css"})
+    assert link in out and "<noscript>" + link not in out
+    assert 'href="stylesheets/base.css" rel="stylesheet" media="print" onload' in out
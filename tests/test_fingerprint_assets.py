@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Tests for scripts/fingerprint_assets.py
+Run with: python3 -m pytest tests/test_fingerprint_assets.py -v
+"""
+
+import os
+import re
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+import fingerprint_assets
+from fingerprint_assets import IMMUTABLE, REVALIDATE, content_hash, fingerprint_page
+
+PAGE = (
+    '<html><head><link rel="stylesheet" href="stylesheets/site.css?v=2">'
+    '<style>.hero{background:url("images/hero.webp")}</style></head><body>'
+    '<img src="images/a.webp" srcset="images/a.webp 300w, images/a.webp 600w" alt="">'
+    '<a href="#top">Top</a><a href="/cart">Cart</a><img src="images/missing.webp" alt="">'
+    '<script src="scripts/app.js"></script></body></html>'
+)
+
+
+def build_site(root):
+    for folder in ("stylesheets", "images", "scripts"):
+        (root / folder).mkdir()
+    (root / "stylesheets" / "site.css").write_text(
+        '@import "fonts.css";\n.logo{background:url(../images/a.webp)}\n' + ".pad{padding:0}\n" * 100
+    )
+    (root / "stylesheets" / "fonts.css").write_text(".f{font-family:x}")
+    (root / "images" / "a.webp").write_bytes(b"A" * 64)
+    (root / "images" / "hero.webp").write_bytes(b"H" * 64)
+    (root / "scripts" / "app.js").write_text("console.log(1)")
+    (root / "index.html").write_text(PAGE)
+
+
+def hashed(path):
+    return path.with_name(f"{path.stem}.{content_hash(path.read_bytes())}{path.suffix}")
+
+
+def test_assets_hashed_and_references_rewritten():
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        build_site(root)
+        report = fingerprint_page(root / "index.html")
+        html = (root / "index.html").read_text()
+
+        image = hashed(root / "images" / "a.webp").name
+        js = hashed(root / "scripts" / "app.js").name
+        assert f'src="images/{image}" srcset="images/{image} 300w, images/{image} 600w"' in html
+        assert f'src="scripts/{js}"' in html
+        assert f'url("images/{hashed(root / "images" / "hero.webp").name}")' in html
+        assert 'href="#top"' in html and 'href="/cart"' in html and 'src="images/missing.webp"' in html
+
+        # The stylesheet is hashed after its own references are rewritten
+        css_name = re.search(r'href="stylesheets/(site\.[0-9a-f]+\.css)\?v=2"', html).group(1)
+        css = (root / "stylesheets" / css_name).read_text()
+        assert css_name == f"site.{content_hash(css.encode('utf-8'))}.css"
+        assert f'@import "{hashed(root / "stylesheets" / "fonts.css").name}"' in css
+        assert f"url(../images/{image})" in css
+        assert (root / "stylesheets" / "site.css").read_text().startswith('@import "fonts.css"')
+
+        assert report["assets"] == 5
+        assert (root / "stylesheets" / (css_name + ".gz")).exists()
+        assert (root / "index.html.gz").exists()
+        assert not (root / "scripts" / (js + ".gz")).exists()  # below MIN_COMPRESS_BYTES
+
+        headers = (root / "_headers").read_text()
+        assert f"/index.html\n  Cache-Control: {REVALIDATE}" in headers
+        assert f"/stylesheets/{css_name}\n  Cache-Control: {IMMUTABLE}" in headers
+        assert f"/images/{image}\n  Cache-Control: {IMMUTABLE}" in headers
+
+        # A second run over the rewritten page changes nothing
+        fingerprint_page(root / "index.html")
+        assert (root / "index.html").read_text() == html
+
+
+def test_changed_asset_replaces_old_copy():
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        build_site(root)
+        fingerprint_page(root / "index.html")
+        old = hashed(root / "images" / "a.webp")
+        assert old.exists()
+
+        (root / "images" / "a.webp").write_bytes(b"B" * 64)
+        (root / "index.html").write_text(PAGE)
+        report = fingerprint_page(root / "index.html")
+        new = hashed(root / "images" / "a.webp")
+        assert new.exists() and not old.exists()
+        assert report["removed"] >= 1
+        assert new.name in (root / "index.html").read_text()
+
+
+def test_missing_encoding_is_added(monkeypatch):
+    """Assets with a .gz but no .br get compressed again once brotli is available."""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        build_site(root)
+        fingerprint_page(root / "index.html")
+        css = next((root / "stylesheets").glob("site.*.css"))
+        assert css.with_name(css.name + ".gz").exists()
+
+        def fake_compressed(path):
+            for suffix in (".gz", ".br"):
+                path.with_name(path.name + suffix).write_bytes(b"x")
+            return {".gz": 1, ".br": 1}
+
+        monkeypatch.setattr(fingerprint_assets, "COMPRESSED_SUFFIXES", (".gz", ".br"))
+        monkeypatch.setattr(fingerprint_assets, "write_compressed", fake_compressed)
+        report = fingerprint_page(root / "index.html")
+        assert css.with_name(css.name + ".br").exists()
+        assert report["compressed"] == 2  # the stylesheet and the page
+
+        # Every encoding present: only the page is compressed again
+        assert fingerprint_page(root / "index.html")["compressed"] == 1
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Tests for scripts/html_pipeline.py
+Run with: python3 -m pytest tests/test_html_pipeline.py -v
+"""
+
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+from html_pipeline import SLOT, TEXT, Pipeline, chunk_tokens, text_tokens, tokens_to_chunks
+
+
+def test_chunks_round_trip():
+    chunks = ["<h1>", "NAME", "", "PRICE", "</h1>"]
+    assert tokens_to_chunks(chunk_tokens(chunks)) == chunks
+
+
+def upper_stage(tokens):
+    for kind, value in tokens:
+        yield kind, value.upper() if kind == TEXT else value
+
+
+def slow_stage(tokens):
+    for token in tokens:
+        time.sleep(0.01)
+        yield token
+
+
+def test_stages_compose_and_are_timed_separately():
+    pipeline = Pipeline().add("slow", slow_stage).add("upper", upper_stage)
+    tokens = pipeline.run(text_tokens(["a", "b"]))
+    assert list(tokens) == [(TEXT, "A"), (TEXT, "B")]
+
+    timings = pipeline.timings()
+    assert list(timings) == ["source", "slow", "upper"]
+    # The sleep is charged to the slow stage, not to the stage after it
+    assert timings["slow"] >= 15
+    assert timings["upper"] < 15
+
+
+def test_write_once_renders_unresolved_slots():
+    with tempfile.TemporaryDirectory() as tmp:
+        out = Path(tmp) / "index.html"
+        html = Pipeline.write(iter([(TEXT, "<p>"), (SLOT, "KEY"), (TEXT, "</p>")]), out)
+        assert html == out.read_text() == "<p>{{KEY}}</p>"
+        assert list(Path(tmp).iterdir()) == [out]
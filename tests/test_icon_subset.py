@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Tests for scripts/icon_subset.py
+Run with: python3 -m pytest tests/test_icon_subset.py -v
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+from icon_subset import links_stylesheet, rewrite_links, subset_stylesheet
+
+ICONS = (
+    "/*! Font Awesome | License */"
+    "@font-face{font-family:'FontAwesome';src:url('../fonts/fa.woff2?v=4.7.0') format('woff2')}"
+    ".fa{display:inline-block;font:normal normal normal 14px/1 FontAwesome}"
+    ".fa-spin{animation:fa-spin 2s infinite linear}"
+    "@keyframes fa-spin{0%{transform:rotate(0)}100%{transform:rotate(359deg)}}"
+    ".fa-star:before{content:\"\\f005\"}"
+    ".fa-heart:before{content:\"\\f004\"}"
+    ".fa-close:before,.fa-remove:before,.fa-times:before{content:\"\\f00d\"}"
+    ".fa-chevron-up:before{content:\"\\f077\"}"
+)
+
+
+def build_site(root, page):
+    (root / "stylesheets").mkdir()
+    (root / "fonts").mkdir()
+    (root / "stylesheets" / "font-awesome.min.css").write_text(ICONS)
+    (root / "fonts" / "fa.woff2").write_bytes(b"\0" * 4096)
+    return page
+
+
+def test_subset_keeps_used_glyphs_only():
+    """Font-drawn and script-named icons stay; inline SVG icons don't need the font."""
+    page = (
+        '<html><body><i class="fa fa-star"></i><span class="fa fa-remove"></span>'
+        '<svg class="svg-inline--fa fa-chevron-up" viewBox="0 0 512 512"><path d=""/></svg>'
+        "</body></html>"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        build_site(root, page)
+        report = subset_stylesheet(page, base_dir=root, scripts="el.classList.add('fa-heart')")
+        css = (root / "stylesheets" / "font-awesome.min.subset.css").read_text()
+
+    assert report["icons"] == ["fa-heart", "fa-remove", "fa-star"]
+    assert report["glyphs"] == 4
+    assert report["font"] == "fonts/fa.woff2" and report["font_bytes"] == 4096
+    assert report["subset_bytes"] < report["bytes"]
+    assert css.startswith("/*! Font Awesome | License */")
+    assert "@font-face" in css and "@keyframes fa-spin" in css
+    assert '.fa-star:before{content:"\\f005"}' in css
+    assert '.fa-remove:before{content:"\\f00d"}' in css
+    assert ".fa-close" not in css and ".fa-times" not in css and ".fa-chevron-up" not in css
+
+
+def test_unused_font_is_dropped():
+    """With no font-drawn icons the @font-face goes, so the font is never downloaded."""
+    page = '<html><body><svg class="svg-inline--fa fa-chevron-up"></svg><p class="fa-star-note"></p></body></html>'
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        build_site(root, page)
+        report = subset_stylesheet(page, base_dir=root)
+        css = (root / "stylesheets" / "font-awesome.min.subset.css").read_text()
+
+    assert report["icons"] == []
+    assert report["subset_font_bytes"] == 0
+    assert "@font-face" not in css and ":before" not in css
+    assert ".fa{display:inline-block" in css
+
+
+def test_rewrite_points_links_at_subset():
+    html = (
+        '<link rel="stylesheet" href="stylesheets/font-awesome.min.css">'
+        '<link rel="stylesheet" href="stylesheets/base.css">'
+    )
+    out = rewrite_links(html, {"stylesheets/font-awesome.min.css"})
+    assert 'href="stylesheets/font-awesome.min.subset.css"' in out
+    assert 'href="stylesheets/base.css"' in out
+
+
+def test_links_stylesheet():
+    html = '<link rel="stylesheet" href="stylesheets/base.css"><a href="stylesheets/font-awesome.min.css">'
+    assert not links_stylesheet(html, "stylesheets/font-awesome.min.css")
+    assert links_stylesheet('<link href="stylesheets/font-awesome.min.css?v=4" rel="stylesheet">',
+                            "stylesheets/font-awesome.min.css")
+    assert links_stylesheet('<link rel="stylesheet" href="stylesheets/font-awesome.min.subset.css">',
+                            "stylesheets/font-awesome.min.css")
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Tests for scripts/image_metrics.py
+Run with: python3 -m pytest tests/test_image_metrics.py -v
+"""
+
+import os
+import random
+import sys
+import tempfile
+from pathlib import Path
+
+from PIL import Image, ImageDraw, ImageFilter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+import image_metrics
+from image_metrics import choose_best, duplicate_groups, load_metrics
+
+
+def pattern(seed, size=(256, 256)):
+    rng = random.Random(seed)
+    img = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(img)
+    for _ in range(30):
+        x, y = rng.randrange(size[0]), rng.randrange(size[1])
+        draw.ellipse([x, y, x + 60, y + 60], fill=(rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+    return img
+
+
+def test_duplicate_groups_matches_brute_force():
+    rng = random.Random(7)
+    hashes = [rng.getrandbits(64) for _ in range(200)]
+    hashes += [h ^ (1 << rng.randrange(64)) ^ (1 << rng.randrange(64)) for h in hashes[:50]]
+    hashes += hashes[:10]
+    groups = duplicate_groups(hashes)
+    for a in range(len(hashes)):
+        for b in range(a + 1, len(hashes)):
+            if (hashes[a] ^ hashes[b]).bit_count() <= image_metrics.DUPLICATE_DISTANCE:
+                assert groups[a] == groups[b]
+    assert len(set(groups)) == 200
+
+
+def test_choose_best_prefers_resolution_then_sharpness():
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        base = pattern(1)
+        base.resize((512, 512)).save(tmp / "c-large.png")
+        base.save(tmp / "a-small.png")
+        base.filter(ImageFilter.GaussianBlur(3)).save(tmp / "b-blurry.png")
+        pattern(2).save(tmp / "d-other.png")
+        paths = sorted(tmp.glob("*.png"))
+
+        metrics = load_metrics(paths, cache_dir=None, jobs=1)
+        best, duplicates, alternatives = choose_best(paths, metrics)
+        assert best.name == "c-large.png"
+        assert [p.name for p in duplicates] == ["a-small.png", "b-blurry.png"]
+        assert [p.name for p in alternatives] == ["d-other.png"]
+        assert metrics[tmp / "a-small.png"]["sharpness"] > metrics[tmp / "b-blurry.png"]["sharpness"]
+
+
+def test_metrics_cached_by_content():
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        pattern(3).save(tmp / "one.png")
+        (tmp / "copy.png").write_bytes((tmp / "one.png").read_bytes())
+        cache = tmp / "cache"
+
+        first = load_metrics([tmp / "one.png"], cache_dir=cache, jobs=1)
+        original = image_metrics.compute_metrics
+        image_metrics.compute_metrics = None
+        try:
+            # Same path (stat match) and same content under another name: no decode
+            again = load_metrics([tmp / "one.png", tmp / "copy.png"], cache_dir=cache, jobs=1)
+        finally:
+            image_metrics.compute_metrics = original
+        assert again[tmp / "one.png"] == again[tmp / "copy.png"] == first[tmp / "one.png"]
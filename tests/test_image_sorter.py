@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Tests for scripts/image-sorter.py
+Run with: python3 -m pytest tests/test_image_sorter.py -v
+"""
+
+import importlib.util
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+spec = importlib.util.spec_from_file_location(
+    "image_sorter", os.path.join(os.path.dirname(__file__), '..', 'scripts', 'image-sorter.py'))
+image_sorter = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(image_sorter)
+
+MAPPING = {
+    "_version": "test",
+    "sections": {
+        "product": {"folder": "images/product/", "slots": [
+            {"slot_id": "product-01", "filename": "product-01.webp", "required": True},
+            {"slot_id": "product-02", "filename": "product-02.webp", "required": True},
+        ]},
+        "testimonials": {"folder": "images/testimonials/", "slots": [
+            {"slot_id": "testimonial-07", "filename": "testimonial-07.webp"},
+        ]},
+        "universal": {"folder": "images/universal/", "slots": [
+            {"slot_id": "size-chart-hero", "filename": "size-chart-hero.webp"},
+        ]},
+    },
+}
+
+
+def make_sorter(tmp):
+    mapping_file = Path(tmp) / "IMAGE-MAPPING.json"
+    mapping_file.write_text(json.dumps(MAPPING))
+    sorter = image_sorter.DeterministicImageSorter(mapping_file, cache_dir=Path(tmp) / "cache")
+    sorter.base_dir = Path(tmp)
+    return sorter
+
+
+def test_prefix_index_matches_longest_slot():
+    with tempfile.TemporaryDirectory() as tmp:
+        sorter = make_sorter(tmp)
+        assert sorter._match_slot("product-01-hero.webp") == "product-01"
+        assert sorter._match_slot("Testimonial-7-jane.PNG") == "testimonial-07"
+        assert sorter._match_slot("size-chart-hero-v2.png") == "size-chart-hero"
+        assert sorter._match_slot("product.webp") is None
+        assert sorter._match_slot("product-03.webp") is None
+
+
+def test_index_is_cached_by_mapping_hash():
+    with tempfile.TemporaryDirectory() as tmp:
+        make_sorter(tmp)
+        original = image_sorter.DeterministicImageSorter.__dict__["_compile_index"]
+        image_sorter.DeterministicImageSorter._compile_index = None
+        try:
+            assert make_sorter(tmp).index["order"][0] == "product-01"
+        finally:
+            image_sorter.DeterministicImageSorter._compile_index = original
+
+
+def test_sort_and_validate_in_one_pass():
+    with tempfile.TemporaryDirectory() as tmp:
+        sorter = make_sorter(tmp)
+        source = Path(tmp) / "generated"
+        source.mkdir()
+        for name in ["product-01-b.webp", "product-01-a.webp", "testimonial-7.webp", "stray.png", "notes.txt"]:
+            (source / name).write_bytes(name.encode())
+
+        assert sorter.sort_images(source)
+        # First candidate by name wins, deterministically
+        assert (Path(tmp) / "images/product/product-01.webp").read_bytes() == b"product-01-a.webp"
+        assert (Path(tmp) / "images/testimonials/testimonial-07.webp").exists()
+        assert (Path(tmp) / "images/unsorted/stray.png").exists()
+        assert sorter.stats["processed"] == 4 and sorter.stats["skipped"] == 1
+
+        sorter.print_summary()
+        assert [m["slot_id"] for m in sorter.stats["missing_required"]] == ["product-02"]
+        assert not sorter.validate_placement()
+
+
+def test_place_file_modes():
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        source = tmp / "source.png"
+        source.write_bytes(b"x" * 100)
+
+        assert image_sorter.place_file(source, tmp / "copy.png", "copy") == ("copy", 0)
+        assert image_sorter.place_file(source, tmp / "hard.png", "hard") == ("hard", 100)
+        assert os.path.samefile(source, tmp / "hard.png")
+
+        # Re-placing over a hard link must not write through to the source
+        other = tmp / "other.png"
+        other.write_bytes(b"y" * 50)
+        image_sorter.place_file(other, tmp / "hard.png", "copy")
+        assert source.read_bytes() == b"x" * 100
+
+        method, saved = image_sorter.place_file(source, tmp / "clone.png", "reflink")
+        assert (method, saved) in [("reflink", 100), ("copy", 0)]
+        assert (tmp / "clone.png").read_bytes() == b"x" * 100
+
+        assert image_sorter.place_file(source, tmp / "moved.png", "move") == ("move", 100)
+        assert not source.exists() and (tmp / "moved.png").read_bytes() == b"x" * 100
+
+
+def test_sort_reports_bytes_saved():
+    with tempfile.TemporaryDirectory() as tmp:
+        sorter = make_sorter(tmp)
+        sorter.link = "hard"
+        source = Path(tmp) / "generated"
+        source.mkdir()
+        (source / "product-01.webp").write_bytes(b"z" * 10)
+        (source / "stray.png").write_bytes(b"z" * 5)
+        sorter.sort_images(source)
+        assert sorter.stats["placement"] == {"hard": 2}
+        assert sorter.stats["bytes_saved"] == 15
+
+
+def test_best_candidate_replaces_name_order():
+    """A sharper, larger generation wins over an earlier name; its resized copy is a duplicate."""
+    from PIL import Image, ImageDraw
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sorter = make_sorter(tmp)
+        source = Path(tmp) / "generated"
+        source.mkdir()
+        big = Image.new("RGB", (400, 400), "white")
+        draw = ImageDraw.Draw(big)
+        for x in range(0, 400, 40):
+            draw.rectangle([x, 0, x + 20, 400], fill=(x % 256, 40, 120))
+        big.save(source / "product-01-b.png")
+        big.resize((200, 200)).save(source / "product-01-a.png")
+
+        sorter.sort_images(source)
+        placed = Image.open(Path(tmp) / "images/product/product-01.webp")
+        assert placed.size == (400, 400)
+        assert sorter.stats["duplicates_collapsed"] == 1
+
+
+def test_failed_copy_never_leaves_partial_slot_file():
+    with tempfile.TemporaryDirectory() as tmp:
+        sorter = make_sorter(tmp)
+        source = Path(tmp) / "generated"
+        source.mkdir()
+        (source / "product-01.webp").write_bytes(b"new" * 1000)
+        (source / "product-02.webp").write_bytes(b"ok")
+        target = Path(tmp) / "images/product/product-01.webp"
+        target.parent.mkdir(parents=True)
+        target.write_bytes(b"old")
+
+        real_copy2 = image_sorter.shutil.copy2
+
+        def flaky_copy2(src, dst):
+            if Path(src).name == "product-01.webp":
+                Path(dst).write_bytes(b"ne")
+                raise OSError("disk full")
+            return real_copy2(src, dst)
+
+        image_sorter.shutil.copy2 = flaky_copy2
+        try:
+            sorter.sort_images(source)
+        finally:
+            image_sorter.shutil.copy2 = real_copy2
+
+        assert target.read_bytes() == b"old"
+        assert sorted(p.name for p in target.parent.iterdir()) == ["product-01.webp", "product-02.webp"]
+        assert sorter.placed_slots == {"product-02"}
+        assert [f["error"] for f in sorter.stats["failed"]] == ["disk full"]
+        assert sorter.stats["io"]["files"] == 1
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Tests for scripts/minify_html.py
+Run with: python3 -m pytest tests/test_minify_html.py -v
+"""
+
+import gzip
+import os
+import sys
+import tempfile
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+from html_pipeline import SLOT, TEXT, Pipeline
+from minify_html import Minifier, minify, minify_file, minify_stage
+
+PAGE = """<!DOCTYPE html>
+<html>
+  <head>
+    <!-- analytics -->
+    <meta charset="utf-8" />
+    <style>
+      .a  { color: red }
+    </style>
+    <script type="application/ld+json">
+      { "@type": "Product",  "name": "Jeans" }
+    </script>
+  </head>
+  <body>
+    <p   class="  lead   big "  id="x" id="y">Hello,
+       <b>world</b>&nbsp; !</p>
+    <pre>  keep
+    this  </pre>
+    <div style="white-space: pre-line">line one
+      line two</div>
+    <img src="a.webp" srcset="a.webp 246w, a.webp 493w" sizes="100vw" alt="A">
+    <picture><source srcset="b.webp 300w, b.webp 600w" sizes="50vw"><img src="b.jpg" alt=""></picture>
+    <script>
+      if (a < b && c > d) { el.innerHTML = "<!-- not a comment -->  x"; }
+    </script>
+    <svg viewBox="0 0 1 1"><path d="M0 0"/></svg>
+    <textarea>  raw  </textarea>
+  </body>
+</html>
+"""
+
+
+def test_minify_rules():
+    stats = Counter()
+    out = minify(PAGE, stats)
+    assert out.startswith('<!DOCTYPE html><html><head><meta charset="utf-8"><style>.a  { color: red }</style>')
+    assert '<script type="application/ld+json">{"@type":"Product","name":"Jeans"}</script></head>' in out
+    assert "analytics" not in out and stats["comments"] == 1
+    assert '<p class="lead big" id="x">Hello, <b>world</b>&nbsp; !</p>' in out
+    assert "<pre>  keep\n    this  </pre>" in out
+    assert '<div style="white-space: pre-line">line one\n      line two</div>' in out
+    assert '<img src="a.webp" alt="A">' in out
+    assert '<source srcset="b.webp">' in out and stats["srcsets"] == 2
+    assert 'if (a < b && c > d) { el.innerHTML = "<!-- not a comment -->  x"; }' in out
+    assert '<path d="M0 0"/>' in out
+    assert "<textarea>  raw  </textarea>" in out
+    assert minify(out) == out
+
+
+def test_streaming_matches_whole_page():
+    """Any split of the input gives the same output; unresolved slots pass through."""
+    expected = minify(PAGE)
+    for size in (1, 3, 17, 64):
+        minifier = Minifier()
+        parts = [minifier.feed(PAGE[i:i + size]) for i in range(0, len(PAGE), size)]
+        assert "".join(parts) + minifier.close() == expected
+
+    stage = minify_stage(Counter())
+    tokens = [(TEXT, "<p>  Hi "), (SLOT, "NAME"), (TEXT, "  </p>")]
+    assert Pipeline.write(stage(iter(tokens)), None) == "<p> Hi {{NAME}} </p>"
+
+
+def test_minify_file_writes_compressed_siblings():
+    with tempfile.TemporaryDirectory() as tmp:
+        page = Path(tmp) / "index.html"
+        page.write_text(PAGE)
+        report = minify_file(page)
+        html = page.read_text()
+        assert report["bytes"] == len(PAGE.encode("utf-8"))
+        assert report["minified_bytes"] == len(html.encode("utf-8")) < report["bytes"]
+        assert gzip.decompress((Path(tmp) / "index.html.gz").read_bytes()).decode("utf-8") == html
+        assert report["compressed"][".gz"] == (Path(tmp) / "index.html.gz").stat().st_size
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Tests for optimize_images.py
+Run with: python3 -m pytest tests/test_optimize_images.py -v
+"""
+
+import os
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from PIL import Image
+
+import optimize_images
+from optimize_images import (
+    build_variants,
+    encode_pairs,
+    group_dependent_pairs,
+    load_cache,
+    plan_folder,
+    report_folder,
+    save_cache,
+    save_image,
+    submit_folder,
+)
+
+
+def make_image(path, size=(64, 48), color=(200, 80, 40)):
+    Image.new("RGB", size, color).save(path)
+    return path
+
+
+def test_plan_folder_names_are_deterministic():
+    """Outputs are {prefix}-{NN}.webp in sorted source order."""
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = Path(tmp)
+        make_image(folder / "b.png")
+        make_image(folder / "a.png")
+        pairs = plan_folder(folder, {"prefix": "product", "count": 6})
+        assert [(s.name, o.name) for s, o in pairs] == [
+            ("a.png", "product-01.webp"),
+            ("b.png", "product-02.webp"),
+        ]
+
+
+def test_group_dependent_pairs_keeps_chains_together():
+    """A pair reading another pair's output shares its group."""
+    folder = Path("/x")
+    pairs = [
+        (folder / "p-01.png", folder / "p-01.webp"),
+        (folder / "p-01.webp", folder / "p-02.webp"),
+        (folder / "q.png", folder / "p-03.webp"),
+    ]
+    groups = group_dependent_pairs(pairs)
+    assert groups == [pairs[:2], pairs[2:]]
+
+
+def test_pool_matches_serial_output():
+    """Parallel encoding produces the same files and report as a serial run."""
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {}
+        for mode in ("serial", "pool"):
+            folder = Path(tmp) / mode
+            folder.mkdir()
+            make_image(folder / "product-01.png", color=(10, 20, 30))
+            make_image(folder / "product-02.png", color=(90, 20, 30))
+            make_image(folder / "zz.jpg", color=(10, 90, 30))
+            pairs = plan_folder(folder, {"prefix": "product", "count": 6})
+
+            timings, backups = [], []
+            if mode == "pool":
+                with ProcessPoolExecutor(max_workers=2) as pool:
+                    entries = submit_folder(pool, pairs)
+                    outcomes = [f.result()[i] for _, f, i in entries]
+            else:
+                outcomes = encode_pairs(pairs)
+            count = report_folder(pairs, outcomes, timings, backups)
+
+            results[mode] = (
+                count,
+                [p.name for p in backups],
+                {p.name: p.read_bytes() for p in folder.glob("*.webp")},
+            )
+        assert results["serial"] == results["pool"]
+        assert results["pool"][0] == 3
+
+
+def test_backups_are_not_inputs():
+    """_original_ backups from a previous run are ignored when planning."""
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = Path(tmp)
+        make_image(folder / "_original_a.png")
+        make_image(folder / "b.png")
+        pairs = plan_folder(folder, {"prefix": "product", "count": 6})
+        assert [s.name for s, _ in pairs] == ["b.png"]
+
+
+def test_cache_skips_unchanged_sources():
+    """Unchanged content is skipped; edits and setting changes re-encode."""
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = Path(tmp)
+        source = make_image(folder / "shot.webp")
+        pairs = [(source, folder / "product-01.webp")]
+        cache = {}
+
+        def run():
+            outcomes = encode_pairs(pairs, cache)
+            report_folder(pairs, outcomes, [], [], cache)
+            return outcomes[0][0]
+
+        assert run() == "ok"
+        assert run() == "cached"
+
+        # Touching without changing content is still a cache hit
+        os.utime(source, ns=(1, 1))
+        assert run() == "cached"
+
+        make_image(source, color=(1, 2, 3))
+        assert run() == "ok"
+
+        original_quality = optimize_images.QUALITY
+        optimize_images.QUALITY = original_quality - 10
+        try:
+            assert run() == "ok"
+        finally:
+            optimize_images.QUALITY = original_quality
+
+
+def test_build_variants_writes_ladder_below_source_width():
+    """Only rungs narrower than the image are written; fresh records are reused."""
+    with tempfile.TemporaryDirectory() as tmp:
+        output = make_image(Path(tmp) / "product-01.webp", size=(600, 300))
+        record, rebuilt = build_variants(output)
+        assert rebuilt
+        assert [v["width"] for v in record["variants"]] == [246, 493]
+        assert Image.open(Path(tmp) / "product-01-246w.webp").size == (246, 123)
+
+        again, rebuilt = build_variants(output, record)
+        assert not rebuilt and again == record
+
+        # An adaptive choice for the source is a different ladder
+        lower, rebuilt = build_variants(output, record, quality=60)
+        assert rebuilt and lower["quality"] == 60
+        assert not list(Path(tmp).glob(".*.tmp"))
+
+        pairs = plan_folder(Path(tmp), {"prefix": "product", "count": 6})
+        assert [s.name for s, _ in pairs] == ["product-01.webp"]
+
+
+def test_large_sources_are_reduced_before_conversion():
+    """RGBA PNGs and JPEGs come out at the fitted size in RGB; peak RSS is reported."""
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = Path(tmp)
+        Image.new("RGBA", (3000, 2000), (200, 80, 40, 128)).save(folder / "alpha.png")
+        Image.new("RGB", (2400, 4000), (20, 80, 140)).save(folder / "tall.jpg", quality=90)
+        pairs = plan_folder(folder, {"prefix": "product", "count": 6})
+
+        timings = []
+        outcomes = encode_pairs(pairs)
+        assert report_folder(pairs, outcomes, timings, []) == 2
+
+        with Image.open(folder / "product-01.webp") as img:
+            assert img.size == (1200, 800) and img.mode == "RGB"
+        with Image.open(folder / "product-02.webp") as img:
+            assert img.size == (960, 1600)
+        assert all(peak_mb > 0 for _, _, peak_mb in timings)
+
+
+def test_adaptive_quality_is_searched_once_per_content():
+    """Flat art drops below QUALITY; a known content hash reuses its choice."""
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = Path(tmp)
+        make_image(folder / "badge.png", size=(320, 240))
+        pairs = plan_folder(folder, {"prefix": "awards", "count": 5})
+        choices, cache = {}, {}
+
+        outcomes = encode_pairs(pairs, cache, choices)
+        report_folder(pairs, outcomes, [], [], cache)
+        entry = outcomes[0][3]
+        assert entry["choice"]["webp"] < optimize_images.QUALITY
+        assert entry["choice"]["webp_ssim"] >= optimize_images.SSIM_TARGET
+        choices[entry["source_hash"]] = entry["choice"]
+
+        # Same content, fresh output slot: no search, same quality
+        original_search = optimize_images.search_quality
+        optimize_images.search_quality = None
+        try:
+            again = encode_pairs([(pairs[0][0], folder / "awards-02.webp")], {}, choices)
+        finally:
+            optimize_images.search_quality = original_search
+        assert again[0][0] == "ok"
+        assert again[0][3]["choice"] == entry["choice"]
+
+
+def test_ssim_of_identical_images_is_one():
+    img = Image.new("L", (64, 64), 128)
+    assert optimize_images.ssim(img, img) == 1.0
+
+
+def test_failed_save_leaves_no_temp_file():
+    """The existing output is kept and the partial .tmp removed."""
+    class DiskFull:
+        def save(self, path, fmt, **options):
+            Path(path).write_bytes(b"partial")
+            raise OSError("No space left on device")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        output = make_image(Path(tmp) / "product-01.webp")
+        before = output.read_bytes()
+        try:
+            save_image(DiskFull(), output)
+        except OSError:
+            pass
+        else:
+            raise AssertionError("save_image should re-raise")
+        assert output.read_bytes() == before
+        assert [p.name for p in Path(tmp).iterdir()] == ["product-01.webp"]
+
+
+def test_saved_cache_drops_entries_for_missing_files():
+    """Sources count as present under their _original_ backup name too."""
+    with tempfile.TemporaryDirectory() as tmp:
+        images = Path(tmp)
+        folder = images / "product"
+        folder.mkdir()
+        for name in ("product-01.webp", "shot.webp", "product-02.webp", "_original_raw.jpg", "product-03.webp"):
+            (folder / name).write_bytes(b"x")
+        cache = {
+            "product/product-01.webp": {"source": "shot.webp"},
+            "product/product-02.webp": {"source": "raw.jpg"},
+            "product/product-03.webp": {"source": "deleted.png"},
+            "product/product-04.webp": {"source": "shot.webp"},
+        }
+        save_cache(images, cache)
+        assert sorted(load_cache(images)) == ["product/product-01.webp", "product/product-02.webp"]
+        assert len(cache) == 4
+
+
+def test_webp_run_removes_stale_avif(capsys):
+    """An .avif from an earlier --avif run goes; its remembered setting is not reported."""
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = Path(tmp)
+        make_image(folder / "badge.png", size=(320, 240))
+        pairs = plan_folder(folder, {"prefix": "awards", "count": 5})
+        (folder / "awards-01.avif").write_bytes(b"old")
+        choices = {}
+        entry = encode_pairs(pairs, {}, choices)[0][3]
+        choices[entry["source_hash"]] = {**entry["choice"], "avif": 50, "avif_ssim": 0.99}
+
+        outcomes = encode_pairs(pairs, {}, choices)
+        report_folder(pairs, outcomes, [], [], {})
+        assert not (folder / "awards-01.avif").exists()
+        quality_line = [line for line in capsys.readouterr().out.splitlines() if "Quality:" in line]
+        assert quality_line and "avif" not in quality_line[0]
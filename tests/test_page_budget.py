@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Tests for scripts/page_budget.py
+Run with: python3 -m pytest tests/test_page_budget.py -v
+"""
+
+import gzip
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+from page_budget import (TARGETS, analyze, check_budgets, load_budgets, ratchet_budgets, strip_markers,
+                         unused_inline_css, unused_inline_js)
+
+
+HEAD = ('<!--section:01-head.html--><!doctype html><link rel="stylesheet" href="stylesheets/base.css" '
+        'media="print"><noscript><link rel="stylesheet" href="stylesheets/base.css"></noscript>'
+        '<style id="critical-css">.used{a:b} .gone{c:d}</style>')
+HERO = ('<!--section:05-main-product.html--><img src="images/hero.webp"><img src="images/hero.webp">'
+        '<img loading="lazy" src="images/below.webp">')
+BELOW = ('<!--section:06-comparison.html--><div class="used"></div><img src="images/below.webp">'
+         '<script src="scripts/a.js"></script>')
+
+
+def make_site(tmp):
+    root = Path(tmp)
+    (root / "images").mkdir()
+    (root / "images" / "hero.webp").write_bytes(b"x" * 1000)
+    (root / "images" / "below.webp").write_bytes(b"x" * 5000)
+    page = root / "index.html"
+    page.write_text(HEAD + HERO + BELOW)
+    return root, page
+
+
+def test_analyze_reads_the_built_page():
+    with tempfile.TemporaryDirectory() as tmp:
+        root, page = make_site(tmp)
+        report = analyze(page)
+
+        assert [s["section"] for s in report["sections"]] == [
+            "01-head.html", "05-main-product.html", "06-comparison.html"]
+        assert report["html_bytes"] == sum(s["bytes"] for s in report["sections"]) == len(HEAD + HERO + BELOW)
+        # Inlined critical CSS counts toward the head section and the page
+        assert report["sections"][0]["inline_css_bytes"] == len(".used{a:b} .gone{c:d}")
+        assert report["inline_css_bytes"] == len(".used{a:b} .gone{c:d}")
+        assert report["sections"][1]["bytes"] == len(HERO)
+        # Hero counted once; lazy and below-the-fold images are not counted
+        assert report["above_fold_images"] == [
+            {"src": "images/hero.webp", "section": "05-main-product.html", "bytes": 1000}]
+        # The deferred link and its <noscript> copy are one request
+        assert report["requests"] == 4
+        assert report["unused_css_selectors"] == [".gone"]
+
+
+def test_unmarked_page_is_one_section():
+    with tempfile.TemporaryDirectory() as tmp:
+        page = Path(tmp) / "page.html"
+        page.write_text("<p>hi</p>")
+        report = analyze(page)
+        assert [(s["section"], s["bytes"]) for s in report["sections"]] == [("page.html", 9)]
+
+
+def test_check_budgets_reports_each_overage():
+    report = {"html_bytes": 500, "above_fold_image_bytes": 10, "requests": 3, "unused_inline_bytes": 0,
+              "sections": [{"section": "a.html", "bytes": 400}, {"section": "b.html", "bytes": 100}]}
+    over = check_budgets(report, {"html_bytes": 400, "section_bytes": 200, "requests": 3})
+    assert over == [("html_bytes", 500, 400, None), ("section_bytes", 400, 200, "a.html")]
+
+
+def test_unused_inline_detection():
+    html = ('<style>@media (max-width: 1px) { .x, .y { a: b } } #only-id { c: d } p { e: f }</style>'
+            '<div class="y"></div>'
+            '<script>document.getElementById("missing").remove()</script>'
+            '<script>document.querySelector(".y").focus()</script>')
+    words = {"div", "class", "y", "script", "document"}
+    _, selectors = unused_inline_css(html, words)
+    assert selectors == ["#only-id"]
+    unused = unused_inline_js(html, words)
+    assert [names for _, names in unused] == [["missing"]]
+
+
+def test_unresolved_image_slots_are_not_counted():
+    with tempfile.TemporaryDirectory() as tmp:
+        page = Path(tmp) / "index.html"
+        page.write_text('<img src="{{PRODUCT_IMAGE_1}}"><img src="images/missing.webp">')
+        report = analyze(page)
+        assert [i["src"] for i in report["above_fold_images"]] == ["images/missing.webp"]
+        assert report["requests"] == 1
+
+
+def test_budget_file_notes_are_skipped():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "page-budget.json"
+        path.write_text(json.dumps({"_comment": "ratchets", "requests": 50}))
+        budgets = load_budgets(path)
+        assert "_comment" not in budgets
+        assert budgets == dict(TARGETS, requests=50)
+
+
+def test_ratchet_only_lowers_limits():
+    report = {"html_bytes": 200000, "above_fold_image_bytes": 100000, "requests": 45,
+              "unused_inline_bytes": 0, "sections": [{"section": "a.html", "bytes": 50000}]}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "page-budget.json"
+        path.write_text(json.dumps({"_comment": "kept", "html_bytes": 300000, "requests": 40,
+                                    "section_bytes": 50200}))
+        lowered = ratchet_budgets(path, report)
+        data = json.loads(path.read_text())
+
+        assert lowered == {"html_bytes": (300000, 202000)}
+        assert data["html_bytes"] == 202000
+        # Never raised, never below the target, headroom not given back
+        assert data["requests"] == 40 and data["section_bytes"] == 50200
+        assert "above_fold_image_bytes" not in data and "unused_inline_bytes" not in data
+        assert data["_comment"] == "kept"
+
+
+def test_strip_markers_after_measuring():
+    with tempfile.TemporaryDirectory() as tmp:
+        root, page = make_site(tmp)
+        (root / "index.html.gz").write_bytes(gzip.compress(page.read_bytes()))
+        sections = [s["section"] for s in analyze(page)["sections"]]
+
+        removed = strip_markers(page)
+        html = page.read_text()
+        assert removed == sum(len(f"<!--section:{name}-->") for name in sections)
+        assert html.startswith("<!doctype html>") and "<!--section:" not in html
+        assert gzip.decompress((root / "index.html.gz").read_bytes()).decode() == html
+        assert strip_markers(page) == 0
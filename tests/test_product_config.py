@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Tests for scripts/product_config.py
+Run with: python3 -m pytest tests/test_product_config.py -v
+"""
+
+import os
+import sys
+import tempfile
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+import product_config
+from product_config import REQUIRED, load_config, parse_text, scan_assignments
+
+
+def test_quoting_styles():
+    values = parse_text(
+        '# header\n'
+        'A="double \\"quoted\\" \\$5"\n'
+        "B='single \\n literal'\n"
+        'C=bare  # trailing comment\n'
+        'export D="exported"\n'
+        '  E="indented"\n'
+        '# F="commented out"\n'
+    )
+    assert values == {
+        "A": 'double "quoted" $5',
+        "B": "single \\n literal",
+        "C": "bare",
+        "D": "exported",
+        "E": "indented",
+    }
+
+
+def test_loose_inner_quotes_and_multiline():
+    """Unescaped inner quotes are kept; multi-line values join with <br>."""
+    lines = ['QUOTE="She said "wow" twice"', 'STORY="First line', '  second line"', 'NEXT="x"']
+    assert list(scan_assignments(lines)) == [
+        ("QUOTE", 'She said "wow" twice', 0, 0),
+        ("STORY", "First line<br>second line", 1, 2),
+        ("NEXT", "x", 3, 3),
+    ]
+
+
+def test_typed_accessors_and_missing():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "product.config"
+        path.write_text('PRICE="59"\nSIZES="S, M,,L"\nEMPTY=""\nTODO="{{TODO}}"\n')
+        config = load_config(path, cache_dir=None)
+        assert config.get_int("PRICE") == 59
+        assert config.get_int("SIZES", default=-1) == -1
+        assert config.get_list("SIZES") == ["S", "M", "L"]
+        assert config.missing(["PRICE", "EMPTY", "TODO", "ABSENT"]) == ["EMPTY", "TODO", "ABSENT"]
+
+
+def test_cache_reused_until_file_changes():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "product.config"
+        cache_dir = Path(tmp) / "cache"
+        path.write_text('NAME="One"\n')
+
+        first = load_config(path, cache_dir=cache_dir)
+        assert load_config(path, cache_dir=cache_dir) is first
+        assert list(cache_dir.glob("config-*.pickle"))
+
+        # A fresh process (empty memo) reads the pickle instead of reparsing
+        product_config._memo.clear()
+        original = product_config.parse_text
+        product_config.parse_text = None
+        try:
+            assert load_config(path, cache_dir=cache_dir)["NAME"] == "One"
+        finally:
+            product_config.parse_text = original
+
+        path.write_text('NAME="Two, longer"\n')
+        assert load_config(path, cache_dir=cache_dir)["NAME"] == "Two, longer"
+
+
+def test_missing_file_is_empty():
+    assert len(load_config("/nonexistent/product.config", cache_dir=None)) == 0
+
+
+def test_schema_types_and_required_fields():
+    complete = "".join(f'{key}="x"\n' for key in REQUIRED)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "product.config"
+        path.write_text(complete + 'SINGLE_PRICE="19.99"\nBUNDLE_PRICE="59"\nREVIEW_COUNT="2,847"\n'
+                        'COLOR_IMAGE_MAP="{\\"a\\": \\"b.webp\\"}"\nGUARANTEE_DAYS="{{DAYS}}"\n')
+        config = load_config(path, cache_dir=None, strict=True)
+        assert config.problems == []
+        assert config.typed("SINGLE_PRICE") == Decimal("19.99")
+        assert config.typed("REVIEW_COUNT") == 2847
+        assert config.typed("COLOR_IMAGE_MAP") == {"a": "b.webp"}
+        assert config.typed("GUARANTEE_DAYS", default=30) == 30
+        assert config.typed("PRODUCT_NAME") == "x"
+
+        path.write_text(complete + 'BRAND_NAME="{{BRAND_NAME}}"\nBUNDLE_PRICE="cheap"\nCOLOR_IMAGE_MAP="[1]"\n'
+                        'SINGLE_PRICE="19"\nREVIEW_COUNT="12"\n')
+        config = load_config(path, cache_dir=None)
+        assert config.problems == [
+            "BRAND_NAME: required",
+            "BUNDLE_PRICE: expected price, got 'cheap'",
+            "COLOR_IMAGE_MAP: expected json_object, got '[1]'",
+        ]
+        assert config.typed("BUNDLE_PRICE") is None
+        with pytest.raises(ValueError, match="BRAND_NAME: required"):
+            load_config(path, cache_dir=None, strict=True)
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Tests for scripts/prune_css.py
+Run with: python3 -m pytest tests/test_prune_css.py -v
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+from prune_css import DomIndex, SelectorMatcher, prune_page, prune_stylesheet, rewrite_links
+
+PAGE = """<!doctype html>
+<html><head>
+<link rel="stylesheet" href="stylesheets/site.css">
+<link rel="stylesheet" href="https://fonts.example.com/x.css">
+</head><body>
+<header id="top" class="header"><nav class="menu"><a class="menu__link" href="#">Home</a></nav></header>
+<main><h2 class="title">Hi</h2><p class="lead md:wide">Text<br>more</p></main>
+<script>document.querySelector('.menu').classList.add('is-open');</script>
+</body></html>
+"""
+
+
+def matcher(html=PAGE, dynamic=()):
+    return SelectorMatcher(DomIndex(html), dynamic)
+
+
+def test_selectors_match_structure():
+    m = matcher()
+    assert m.matches("header .menu__link")
+    assert m.matches("#top > nav a")
+    assert m.matches(".title + .lead")
+    assert m.matches(".lead.md\\:wide")
+    assert not m.matches("main .menu__link")
+    assert not m.matches(".lead ~ .title")
+    assert not m.matches(".missing")
+    assert not m.matches("footer")
+
+
+def test_dynamic_state_is_kept():
+    """Pseudo-classes, attributes and classes named in scripts never prune a rule."""
+    m = matcher(dynamic=["is-open"])
+    assert m.matches(".menu.is-open .menu__link:hover")
+    assert m.matches("main > p[hidden]")
+    assert m.matches("a[aria-expanded=true]")
+    assert m.matches(":root")
+
+
+def test_prune_keeps_used_rules_media_and_references():
+    css = """/*! keep me */
+    /* drop me */
+    .title, .gone { color: red }
+    @media (min-width: 750px) { .gone { x: 1 } .lead { animation: fade 1s } }
+    @media print { .gone { x: 2 } }
+    @keyframes fade { from { opacity: 0 } to { opacity: 1 } }
+    @keyframes spin { to { transform: rotate(1turn) } }
+    @font-face { font-family: "Unused Sans"; src: url(u.woff2) }
+    @font-face { font-family: Used; src: url(v.woff2) }
+    .menu { font-family: var(--f, Used), serif; content: "}{" }
+    """
+    pruned, removed = prune_stylesheet(css, matcher())
+    assert pruned.startswith("/*! keep me */")
+    assert ".title{color: red}" in pruned
+    assert "@media (min-width: 750px){.lead{animation: fade 1s}}" in pruned
+    assert "@keyframes fade" in pruned and "spin" not in pruned
+    assert "Unused Sans" not in pruned and "font-family: Used" in pruned
+    assert '.menu{font-family: var(--f, Used), serif; content: "}{"}' in pruned
+    assert "print" not in pruned and "drop me" not in pruned
+    assert ".gone" in removed and "@keyframes spin" in removed
+
+
+def test_prune_page_writes_copies_and_rewrites_links():
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        (root / "stylesheets").mkdir()
+        (root / "stylesheets" / "site.css").write_text(".header{a:b}.unused{c:d}")
+        (root / "index.html").write_text(PAGE)
+
+        report = prune_page(root / "index.html")
+        [entry] = report["files"]
+        assert entry["stylesheet"] == "stylesheets/site.css"
+        assert entry["removed_rules"] == 1
+        assert (root / "stylesheets" / "site.pruned.css").read_text() == ".header{a:b}\n"
+
+        html = rewrite_links(PAGE, {"stylesheets/site.css"})
+        assert 'href="stylesheets/site.pruned.css"' in html
+        assert 'href="https://fonts.example.com/x.css"' in html
+        # A rewritten page still resolves back to the source stylesheets
+        (root / "index.html").write_text(html)
+        assert prune_page(root / "index.html")["files"][0]["stylesheet"] == "stylesheets/site.css"
+
+
+def test_links_to_emptied_stylesheets_are_removed():
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        (root / "stylesheets").mkdir()
+        (root / "stylesheets" / "site.css").write_text("/*! License */.unused{c:d}")
+        (root / "index.html").write_text(PAGE)
+
+        [entry] = prune_page(root / "index.html")["files"]
+        assert entry["empty"]
+
+        html = rewrite_links(PAGE, {"stylesheets/site.css"}, {"stylesheets/site.css"})
+        assert "stylesheets/site" not in html
+        assert 'href="https://fonts.example.com/x.css"' in html
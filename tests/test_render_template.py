@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Tests for scripts/render_template.py
+Run with: python3 -m pytest tests/test_render_template.py -v
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+from render_template import (
+    join_chunks,
+    load_compiled_sections,
+    render,
+    render_page,
+    render_page_incremental,
+    strip_section_markers,
+    strip_stray_closing_tags,
+    tokenize,
+)
+
+
+def test_tokenize_alternates_literals_and_keys():
+    """Spaced placeholders are normalized while tokenizing."""
+    assert tokenize("a {{ NAME }} b {{PRICE}}") == ["a ", "NAME", " b ", "PRICE", ""]
+
+
+def test_render_resolves_once_and_reports_unresolved():
+    chunks = tokenize("<h1>{{NAME}}</h1>{{MISSING}}{{EMPTY}}{{MISSING}}")
+    html, unresolved = render(chunks, {"NAME": "Jeans $59", "EMPTY": ""})
+    assert html == "<h1>Jeans $59</h1>{{MISSING}}{{EMPTY}}{{MISSING}}"
+    assert unresolved == {"MISSING": 2, "EMPTY": 1}
+
+
+def test_aliases_take_precedence():
+    """SECRET_HEADING_1 renders SECRET_1_HEADLINE like build.sh did."""
+    html, _ = render(tokenize("{{SECRET_HEADING_1}}"),
+                     {"SECRET_HEADING_1": "Secret #1", "SECRET_1_HEADLINE": "The Myth"})
+    assert html == "The Myth"
+
+
+def test_stray_closing_tags_are_stripped():
+    text = "  </head>\n</html>\n<body><a>skip</a>\n</body>\n<main>"
+    assert strip_stray_closing_tags(text) == "  </head>\n<body><a>skip</a>\n<main>"
+
+
+def test_render_page_reads_quoted_config():
+    """Escaped quotes in product.config come through unescaped."""
+    with tempfile.TemporaryDirectory() as tmp:
+        sections = Path(tmp) / "sections"
+        sections.mkdir()
+        (sections / "01-head.html").write_text("<title>{{PRODUCT_NAME}}</title>")
+        (sections / "02-body-start.html").write_text("<div data-map='{{MAP}}'></div>")
+        config = Path(tmp) / "product.config"
+        config.write_text('# comment\nPRODUCT_NAME="Boho Jeans"\nMAP="{\\"a\\": 1}"\n')
+
+        html, unresolved, slots, _ = render_page(config, sections, cache_dir=None)
+        assert html == ("<!--section:01-head.html--><title>Boho Jeans</title>"
+                        "<!--section:02-body-start.html--><div data-map='{\"a\": 1}'></div>")
+        assert not unresolved and slots == 2
+
+
+def test_section_markers_strip_down_to_the_doctype():
+    html = "<!--section:01-head.html-->\n<!doctype html><p>a</p> <!--section:02-x.html--><p>b</p><!--kept-->"
+    assert strip_section_markers(html) == "<!doctype html><p>a</p> <p>b</p><!--kept-->"
+
+
+def test_join_chunks_merges_literals_at_section_seams():
+    assert join_chunks([["a", "X", "b"], ["c", "Y", ""]]) == ["a", "X", "bc", "Y", ""]
+
+
+def test_compiled_sections_are_cached_by_stat_and_hash():
+    """Unchanged sections come from the cache; edits are recompiled."""
+    with tempfile.TemporaryDirectory() as tmp:
+        sections = Path(tmp) / "sections"
+        sections.mkdir()
+        head = sections / "01-head.html"
+        head.write_text("<title>{{PRODUCT_NAME}}</title>")
+        cache_dir = Path(tmp) / "cache"
+        names = ["01-head.html"]
+
+        _, stats = load_compiled_sections(sections, names, cache_dir)
+        assert stats == {"cached": 0, "compiled": 1}
+
+        _, stats = load_compiled_sections(sections, names, cache_dir)
+        assert stats == {"cached": 1, "compiled": 0}
+
+        # Same bytes, new mtime: hash matches so no recompile
+        os.utime(head, ns=(1, 1))
+        _, stats = load_compiled_sections(sections, names, cache_dir)
+        assert stats == {"cached": 1, "compiled": 0}
+
+        head.write_text("<title>{{BRAND_NAME}}</title>")
+        compiled, stats = load_compiled_sections(sections, names, cache_dir)
+        assert stats == {"cached": 0, "compiled": 1}
+        assert compiled == [("01-head.html", ["<title>", "BRAND_NAME", "</title>"])]
+
+
+def test_incremental_render_only_touches_affected_sections():
+    """Changing one value re-renders only the sections that consume it."""
+    with tempfile.TemporaryDirectory() as tmp:
+        sections = Path(tmp) / "sections"
+        sections.mkdir()
+        (sections / "01-head.html").write_text("<title>{{PRODUCT_NAME}}</title>")
+        (sections / "18-testimonials.html").write_text("<q>{{TESTIMONIAL_3_QUOTE}}</q>")
+        config = Path(tmp) / "product.config"
+        out = Path(tmp) / "index.html"
+        cache_dir = Path(tmp) / "cache"
+
+        def build(quote):
+            config.write_text(f'PRODUCT_NAME="Jeans"\nTESTIMONIAL_3_QUOTE="{quote}"\n')
+            return render_page_incremental(config, out, sections, cache_dir)
+
+        html, _, _, stats = build("Love them")
+        assert stats["rerendered"] == 2
+
+        html, _, _, stats = build("Love them")
+        assert (stats["rerendered"], stats["reused"]) == (0, 2)
+
+        html, _, _, stats = build("Obsessed")
+        assert (stats["rerendered"], stats["reused"], stats["changed_keys"]) == (1, 1, 1)
+        assert html == ("<!--section:01-head.html--><title>Jeans</title>"
+                        "<!--section:18-testimonials.html--><q>Obsessed</q>")
+        assert html == render_page(config, sections, cache_dir=None)[0]
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Tests for update_config_from_draft.py config patching
+Run with: python3 -m pytest tests/test_update_config_from_draft.py -v
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from update_config_from_draft import apply_replacements
+
+
+def test_updates_in_place_and_appends_new_keys():
+    """Comments and order are kept; unknown keys go at the end."""
+    config = '# Core\nPRODUCT_NAME="Old"\n\n# Sizes\nSIZES=\'S,M\'\nPRICE="59"\n'
+    new, updated, added = apply_replacements(
+        config, {"SIZES": "S,M,L", "PRODUCT_NAME": "New", "TAGLINE": "Hi"}
+    )
+    assert new == '# Core\nPRODUCT_NAME="New"\n\n# Sizes\nSIZES="S,M,L"\nPRICE="59"\n\nTAGLINE="Hi"'
+    assert updated == ["SIZES", "PRODUCT_NAME"]
+    assert added == ["TAGLINE"]
+
+
+def test_escaped_quotes_replace_the_whole_line():
+    """A value containing \\" is replaced entirely, not up to the first quote."""
+    config = 'TAGLINE="say \\"hi\\" now"\n'
+    new, _, _ = apply_replacements(config, {"TAGLINE": "plain"})
+    assert new == 'TAGLINE="plain"\n'
+
+
+def test_commented_keys_are_not_assignments():
+    config = '# PRODUCT_NAME="example"\n'
+    new, updated, added = apply_replacements(config, {"PRODUCT_NAME": "Jeans"})
+    assert new == '# PRODUCT_NAME="example"\n\nPRODUCT_NAME="Jeans"'
+    assert added == ["PRODUCT_NAME"] and not updated
+
+
+def test_multiline_value_is_replaced_whole():
+    """Continuation lines of a multi-line value are removed with it."""
+    config = 'STORY="line one\nline two"\nPRICE="59"\n'
+    new, updated, _ = apply_replacements(config, {"STORY": "short"})
+    assert new == 'STORY="short"\nPRICE="59"\n'
+    assert updated == ["STORY"]
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Tests for .agent/skills/brunson-auditor/scripts/validate_build.py
+Run with: python3 -m pytest tests/test_validate_build.py -v
+"""
+
+import os
+import sys
+import tempfile
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '.agent', 'skills', 'brunson-auditor', 'scripts'))
+
+from validate_build import AssetIndex, scan, validate_page, validate_tree, write_junit
+
+
+def test_scan_finds_everything_in_one_pass():
+    html = ('<h1 class="x">Hi {{NAME}}</h1><div class="hero">'
+            '<IMG alt="a" src="images/a.webp"><img src="images/a.webp">'
+            '<script src="images/b.js"></script><img data-src="{{IMG}}">{{lower}}')
+    result = scan(html)
+    assert result["placeholders"] == {"{{NAME}}", "{{IMG}}"}
+    assert result["has_h1"] and result["has_hero"] and result["has_img"]
+    assert result["image_refs"] == {"images/a.webp": 2, "images/b.js": 1}
+
+
+def test_hero_and_image_refs_ignore_case():
+    result = scan('<h1>x</h1><DIV CLASS="HERO"><img SRC="images/a.webp"><SCRIPT SRC="Images/b.js"></SCRIPT>{{Name}}')
+    assert result["has_hero"]
+    assert result["image_refs"] == {"images/a.webp": 1, "Images/b.js": 1}
+    assert result["placeholders"] == set()
+
+
+def test_placeholders_inside_consumed_spans_are_reported():
+    assert scan('<h1 title="{{HEADLINE_HOOK}}">x</h1>')["placeholders"] == {"{{HEADLINE_HOOK}}"}
+    assert scan('<source src="images/{{PRODUCT_IMAGE_1}}">')["placeholders"] == {"{{PRODUCT_IMAGE_1}}"}
+    assert scan('<div data-src="images/{{X}}"></div>')["placeholders"] == {"{{X}}"}
+    assert scan('<IMG src="{{A}}" alt="{{B}}">')["placeholders"] == {"{{A}}", "{{B}}"}
+
+
+def test_h1_needs_a_closing_tag():
+    assert not scan("</h1><h1>open")["has_h1"]
+
+
+def test_validate_page_checks_assets_against_index():
+    with tempfile.TemporaryDirectory() as tmp:
+        (Path(tmp) / "images" / "product").mkdir(parents=True)
+        (Path(tmp) / "images" / "product" / "a.webp").write_bytes(b"x")
+        page = Path(tmp) / "index.html"
+        page.write_text('<h1>x</h1><div class="hero"></div>'
+                        '<img src="images/product/a.webp"><img src="images/gone.webp">'
+                        '<img src="images/gone.webp">')
+
+        report = validate_page(page)
+        assert not report["passed"]
+        errors = [f for f in report["findings"] if f["severity"] == "error"]
+        assert errors == [{"severity": "error", "check": "missing_image",
+                           "message": "CRITICAL: Missing image: images/gone.webp",
+                           "path": "images/gone.webp", "count": 2}]
+        assert [f["check"] for f in report["findings"] if f["severity"] == "warning"] == ["size"]
+        assert {"read_ms", "index_ms", "scan_ms", "checks_ms"} <= set(report["timings"])
+
+
+def test_asset_index_notices_new_files():
+    with tempfile.TemporaryDirectory() as tmp:
+        (Path(tmp) / "images").mkdir()
+        index = AssetIndex(tmp)
+        assert "images/new.webp" not in index and not index.stale()
+        (Path(tmp) / "images" / "new.webp").write_bytes(b"x")
+        assert index.stale()
+        index.refresh()
+        assert "images/new.webp" in index
+
+
+def test_missing_page_fails():
+    report = validate_page("/nonexistent/index.html")
+    assert not report["passed"] and report["findings"][0]["check"] == "exists"
+
+
+def make_site(root, name, image=True):
+    site = Path(root) / name
+    (site / "images").mkdir(parents=True)
+    if image:
+        (site / "images" / "a.webp").write_bytes(b"x")
+    (site / "index.html").write_text('<h1>x</h1><div class="hero"></div><img src="images/a.webp">')
+
+
+def test_validate_tree_shares_one_index():
+    """Each page resolves images against its own directory within the shared index."""
+    with tempfile.TemporaryDirectory() as tmp:
+        make_site(tmp, "good")
+        make_site(tmp, "bad", image=False)
+        make_site(tmp, "also-good")
+
+        serial = validate_tree(tmp, jobs=1)
+        parallel = validate_tree(tmp, jobs=2)
+        for batch in (serial, parallel):
+            assert (batch["pages"], batch["passed"], batch["failed"]) == (3, 2, 1)
+            assert [r["passed"] for r in batch["results"]] == [True, False, True]
+        assert [r["findings"] for r in serial["results"]] == [r["findings"] for r in parallel["results"]]
+
+        junit = Path(tmp) / "junit.xml"
+        write_junit(serial, junit)
+        suite = ET.parse(junit).getroot()
+        assert (suite.get("tests"), suite.get("failures")) == ("3", "1")
+        failures = suite.findall("testcase/failure")
+        assert len(failures) == 1 and failures[0].get("message") == "CRITICAL: Missing image: images/a.webp"
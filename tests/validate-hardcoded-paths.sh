@@ -79,7 +79,7 @@ if [ -n "$HARDCODED" ]; then
     echo "🔧 ACTION REQUIRED:"
     echo "1. Replace each hardcoded path with the suggested {{VARIABLE}}"
     echo "2. Add the variable to product.config if not already present"
-    echo "3. Ensure build.sh has replace_var for this variable"
+    echo "3. Ensure the variable name matches product.config (or add it to ALIASES in scripts/render_template.py)"
     echo "4. Re-run this validation"
     echo ""
     exit 1
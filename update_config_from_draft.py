@@ -1,5 +1,10 @@
 import json
-import re
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scripts'))
+
+from product_config import scan_assignments
 
 def load_json(filepath):
     with open(filepath, 'r') as f:
@@ -13,6 +18,43 @@ def read_file(filepath):
     with open(filepath, 'r') as f:
         return f.read()
 
+def index_config(lines):
+    """
+    Maps each KEY to the (first, last) line spans that assign it, in file
+    order. Uses the shared product_config parser, so a multi-line value is
+    one span and its continuation lines are never mistaken for keys.
+    """
+    index = {}
+    for key, _, first, last in scan_assignments(lines):
+        index.setdefault(key, []).append((first, last))
+    return index
+
+def apply_replacements(config_content, replacements):
+    """
+    Applies all replacements in one pass over the config.
+    Existing assignments are rewritten in place (comments and ordering are
+    untouched); new keys are appended at the end.
+    Returns (new_content, updated_keys, added_keys).
+    """
+    lines = config_content.split('\n')
+    index = index_config(lines)
+    updated, added = [], []
+
+    for key, value in replacements.items():
+        assignment = f'{key}="{value}"'
+        if key in index:
+            for first, last in index[key]:
+                lines[first] = assignment
+                # Continuation lines of a multi-line value are dropped below
+                for i in range(first + 1, last + 1):
+                    lines[i] = None
+            updated.append(key)
+        else:
+            lines.append(assignment)
+            added.append(key)
+
+    return '\n'.join(line for line in lines if line is not None), updated, added
+
 def clean(text):
     """Escapes text for bash variables."""
     if not text: return ""
@@ -233,18 +275,14 @@ def main():
     # ==========================================
     # APPLY TO CONFIG
     # ==========================================
-    for key, value in replacements.items():
-        # Regex to find KEY="Value"
-        pattern = rf'^{key}=".*?"'
-        replacement = f'{key}="{value}"'
-        
-        if re.search(pattern, config_content, re.MULTILINE):
-            config_content = re.sub(pattern, replacement, config_content, flags=re.MULTILINE)
-        else:
-            config_content += f'\n{key}="{value}"'
+    config_content, updated, added = apply_replacements(config_content, replacements)
 
     save_file('product.config', config_content)
     print("✅ product.config updated from copy_draft.json")
+    print(f"   Updated: {len(updated)} keys")
+    print(f"   Added:   {len(added)} keys")
+    for key in added:
+        print(f"     + {key}")
 
 if __name__ == "__main__":
     main()